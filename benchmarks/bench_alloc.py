@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Allocation benchmark: bytes allocated per GET request, measured with
+tracemalloc, for every catalog route of a mock backend script.
+
+Requests run in-process through the script's own handler class on in-memory
+sockets. Measurement starts when do_GET is entered, after the request line
+and headers are parsed, so it covers routing, building the payload,
+serializing and writing it. ``peak`` is the high-water mark above the memory
+in use at that point, which is where per-request literals show up; ``kept``
+is what stayed allocated afterwards: the response held by the in-memory
+socket, plus cache entries on the first request.
+
+    python benchmarks/bench_alloc.py --script mock-backend.py
+    python benchmarks/bench_alloc.py --script mock-backend-fixed.py --requests 50
+
+Pass an older copy of a script (e.g. ``git show HEAD~1:mock-backend.py >
+/tmp/old.py``) with ``--script /tmp/old.py`` to compare revisions.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import tracemalloc
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PATHS = [
+    '/api/movie/movies/displayingMovies',
+    '/api/movie/movies/comingSoonMovies',
+    '/api/movie/movies/3',
+    '/api/movie/saloons/getSaloonsByCityId/2',
+    '/api/movie/saloons/getall',
+    '/api/movie/cities/getall',
+    '/api/movie/cities/getCitiesByMovieId/3',
+    '/api/movie/actors/getActorsByMovieId/3',
+    '/api/movie/comments/getCountOfComments/3',
+    '/api/movie/comments/getCommentsByMovieId/3/1/5',
+    '/api/movie/saloonTimes/getSaloonTimesByMovieId/1',
+    '/api/movie/saloonTimes/getMovieSaloonTimeSaloonAndMovieId/1/1',
+]
+
+
+def load_script(path):
+    path = Path(path)
+    if not path.is_absolute():
+        path = ROOT / path
+    spec = importlib.util.spec_from_file_location('mock_script', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def measured(handler_class):
+    class MeasuredHandler(handler_class):
+        def do_GET(self):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            super().do_GET()
+            after, peak = tracemalloc.get_traced_memory()
+            self.server.last = (peak - before, after - before)
+    return MeasuredHandler
+
+
+def run_request(handler_class, server, path):
+    handler = handler_class.__new__(handler_class)
+    handler.request = None
+    handler.client_address = ('127.0.0.1', 0)
+    handler.server = server
+    handler.rfile = io.BytesIO(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+    handler.wfile = io.BytesIO()
+    handler.close_connection = True
+    handler.handle_one_request()
+    return handler.wfile.getvalue()
+
+
+def measure(handler_class, server, path, requests):
+    """(first request peak, first kept, steady peak, steady kept) in bytes"""
+    results = []
+    for _ in range(requests):
+        run_request(handler_class, server, path)
+        results.append(server.last)
+    steady = results[1:] or results
+    return (results[0][0], results[0][1],
+            sum(r[0] for r in steady) // len(steady), sum(r[1] for r in steady) // len(steady))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--script', default='mock-backend-fixed.py')
+    parser.add_argument('--requests', type=int, default=20, help='requests per route')
+    args = parser.parse_args()
+
+    module = load_script(args.script)
+    server = types.SimpleNamespace(idle_timeout=5.0, max_keepalive_requests=100)
+
+    handler_class = measured(module.MockBackendHandler)
+    print(f"{'path':<64} {'1st peak':>9} {'1st kept':>9} {'peak':>8} {'kept':>6}")
+    totals = [0, 0, 0, 0]
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        # Warm up imports and lazily compiled routers outside the measurement
+        tracemalloc.start()
+        run_request(handler_class, server, '/health')
+        rows = [(path, measure(handler_class, server, path, args.requests)) for path in PATHS]
+        tracemalloc.stop()
+    for path, row in rows:
+        totals = [t + r for t, r in zip(totals, row)]
+        print(f"{path:<64} {row[0]:>9} {row[1]:>9} {row[2]:>8} {row[3]:>6}")
+    print(f"{'total':<64} {totals[0]:>9} {totals[1]:>9} {totals[2]:>8} {totals[3]:>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cost of verifying tokens on admin routes, cold and from the verified-token cache.
+
+TokenSigner.verify() per token, for tokens issued here (HS256) and tokens of
+the user service (HS512, Spring authorities):
+
+- ``cold``    signature and claims checked every time (cache size 0)
+- ``cached``  the same token again, answered from the LRU cache
+- ``churn``   --tokens distinct tokens in turn through a cache holding half
+              of them, so every lookup misses and evicts; what a cache too
+              small for the active clients costs over no cache
+
+Then directors/add of mock-backend-fixed.py in-process, with the token in an
+Authorization header, against the same route without authentication.
+
+    python benchmarks/bench_auth.py --requests 20000
+"""
+
+import argparse
+import base64
+import contextlib
+import hashlib
+import hmac
+import io
+import json
+import os
+import sys
+import time
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_alloc import load_script  # noqa: E402
+
+from mock_backend import auth  # noqa: E402
+from mock_backend.body import DEFAULT_MAX_BODY_SIZE  # noqa: E402
+
+PATH = '/api/movie/directors/add'
+
+
+def spring_token(secret, subject):
+    """A token shaped like the user service's: HS512, authorities as {"authority": name}"""
+    def encode(data):
+        return base64.urlsafe_b64encode(data).rstrip(b'=')
+    now = int(time.time())
+    claims = {"authorities": [{"authority": "ADMIN"}], "sub": subject, "iat": now, "exp": now + 3600}
+    signing_input = encode(b'{"alg":"HS512"}') + b'.' + encode(json.dumps(claims).encode())
+    return (signing_input + b'.' + encode(hmac.new(secret.encode(), signing_input, hashlib.sha512).digest())).decode()
+
+
+def per_call(function, tokens, rounds):
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for token in tokens:
+            function(token)
+        elapsed = (time.perf_counter() - started) / len(tokens)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_request(handler_class, server, payload, headers):
+    handler = handler_class.__new__(handler_class)
+    handler.request = None
+    handler.client_address = ('127.0.0.1', 0)
+    handler.server = server
+    handler.rfile = io.BytesIO(f'POST {PATH} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+                               f'{headers}Content-Length: {len(payload)}\r\n\r\n'.encode() + payload)
+    handler.wfile = io.BytesIO()
+    handler.close_connection = True
+    handler.handle_one_request()
+    return handler.wfile.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=10000, help='verifications and requests per variant')
+    parser.add_argument('--tokens', type=int, default=1000, help='distinct tokens of the churn run')
+    parser.add_argument('--rounds', type=int, default=3, help='best of this many runs')
+    args = parser.parse_args()
+
+    issuer = auth.TokenSigner()
+    kinds = (('HS256', lambda n: issuer.issue(f'user{n}@example.com', ['ADMIN'])),
+             ('HS512', lambda n: spring_token(auth.DEFAULT_SECRET, f'user{n}@example.com')))
+    print(f"{'token':<7} {'variant':<8} {'verify us':>10} {'per s':>10}")
+    for name, make in kinds:
+        token = make(0)
+        churn = [make(n) for n in range(args.tokens)]
+        variants = (
+            ('cold', auth.TokenSigner(cache_size=0), [token] * args.requests),
+            ('cached', auth.TokenSigner(), [token] * args.requests),
+            ('churn', auth.TokenSigner(cache_size=args.tokens // 2),
+             churn * max(args.requests // args.tokens, 1)),
+        )
+        for variant, signer, tokens in variants:
+            elapsed = per_call(signer.verify, tokens, args.rounds)
+            print(f"{name:<7} {variant:<8} {elapsed * 1e6:>10.2f} {1 / elapsed:>10.0f}")
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        module = load_script('mock-backend-fixed.py')
+    handler_class = module.MockBackendHandler
+    handler_class.compressor = None
+    server = types.SimpleNamespace(idle_timeout=5.0, max_keepalive_requests=100, max_body_size=DEFAULT_MAX_BODY_SIZE)
+    route, _ = module.ROUTES.resolve('POST', PATH)
+    token = module.TOKENS.issue('admin@cinevision.com', ['ADMIN'])
+    payload = b'{"directorName": "Bench Director"}'
+    header = f'Authorization: Bearer {token}\r\n'
+    requests = max(args.requests // 10, 1)
+    variants = (
+        ('no auth', None, '', None),
+        ('cold', 'ADMIN', header, 0),
+        ('cached', 'ADMIN', header, auth.DEFAULT_CACHE_SIZE),
+    )
+    print()
+    print(f"{'directors/add':<14} {'req/s':>9} {'us/req':>8}")
+    for variant, role, headers, cache_size in variants:
+        route.options['auth'] = role
+        if cache_size is not None:
+            module.TOKENS.cache_size = cache_size
+            module.TOKENS._verified.clear()
+        best = None
+        for _ in range(args.rounds):
+            # Fresh data, so every variant adds to the same number of directors
+            module.DATA = module.data.DataLayer(module.builtin_source())
+            status = run_request(handler_class, server, payload, headers).split(b' ', 2)[1]
+            assert status == b'200', (variant, status)
+            started = time.process_time()
+            for _ in range(requests):
+                run_request(handler_class, server, payload, headers)
+            elapsed = (time.process_time() - started) / requests
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{variant:<14} {1 / best:>9.0f} {best * 1e6:>8.1f}")
+    route.options['auth'] = 'ADMIN'
+
+
+if __name__ == '__main__':
+    main()
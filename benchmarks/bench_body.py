@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+POST throughput of mock-backend-fixed.py for each way of ingesting bodies.
+
+sendTicketDetail, comments/add and movies/add run in-process through the
+script's handler on in-memory sockets, with:
+
+- ``previous``  rfile.read(Content-Length), decode, json.loads(), as every
+                route did before mock_backend.body
+- ``json``      read_json() into the per-thread buffer, parsed by the json module
+- ``orjson``    the same, parsed by orjson (when it is installed)
+
+movies/add carries a --description of that many bytes, to show where the
+parser starts to matter; the other bodies are the size the frontend sends.
+
+    python benchmarks/bench_body.py --requests 5000 --description 65536
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_alloc import load_script  # noqa: E402
+
+from mock_backend import body  # noqa: E402
+
+
+def ticket(n):
+    return {"movieName": "Bench", "saloonName": "Bench Saloon", "movieDay": f"day-{n}", "movieStartTime": "20:00",
+            "chairNumbers": " A1 A2", "email": "bench@example.com", "fullName": "Bench User", "totalPrice": 180000}
+
+
+def comment(n):
+    return {"movieId": 1, "commentText": f"Great movie, seen it {n} times", "commentBy": "Bench",
+            "commentByUserId": "USER1"}
+
+
+def movie(n, description):
+    return {"movieName": f"Bench movie {n}", "description": 'x' * description, "duration": 120,
+            "categoryName": "Drama", "directorName": "Bench Director", "releaseDate": "2025-01-01",
+            "movieImageUrl": "https://example.com/poster.jpg", "trailerUrl": "https://example.com/trailer"}
+
+
+def run_request(handler_class, server, path, payload):
+    handler = handler_class.__new__(handler_class)
+    handler.request = None
+    handler.client_address = ('127.0.0.1', 0)
+    handler.server = server
+    handler.rfile = io.BytesIO(f'POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+                               f'Content-Length: {len(payload)}\r\n\r\n'.encode() + payload)
+    handler.wfile = io.BytesIO()
+    handler.close_connection = True
+    handler.handle_one_request()
+    return handler.wfile.getvalue()
+
+
+def previous_read_json(self):
+    # Decoded once per request like read_json(), as admin routes read the body's token first
+    if self._json is None:
+        content_length = int(self.headers['Content-Length'])
+        self._body_pending = False
+        try:
+            self._json = json.loads(self.rfile.read(content_length).decode('utf-8'))
+        except json.JSONDecodeError:
+            raise body.BodyError(400, "Invalid JSON data") from None
+    return self._json
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=3000, help='requests per route and variant')
+    parser.add_argument('--description', type=int, default=16384, help='bytes of the movies/add description')
+    parser.add_argument('--rounds', type=int, default=3, help='best of this many runs')
+    args = parser.parse_args()
+
+    module = load_script('mock-backend-fixed.py')
+    handler_class = module.MockBackendHandler
+    handler_class.compressor = None
+    server = types.SimpleNamespace(idle_timeout=5.0, max_keepalive_requests=100,
+                                   max_body_size=body.DEFAULT_MAX_BODY_SIZE)
+    token = module.TOKENS.issue('admin@cinevision.com', ['ADMIN'])
+    routes = [
+        ('/api/movie/payments/sendTicketDetail', ticket),
+        ('/api/movie/comments/add', comment),
+        # An admin route: the token rides in the body, as the frontend sends it
+        ('/api/movie/movies/add', lambda n: dict(movie(n, args.description), userAccessToken=token)),
+    ]
+    new_read_json = handler_class.read_json
+    orjson = body.orjson
+    variants = [('previous', previous_read_json, None), ('json', new_read_json, None)]
+    if orjson is not None:
+        variants.append(('orjson', new_read_json, orjson))
+
+    print(f"{'route':<40} {'body B':>8} {'variant':<9} {'req/s':>9} {'us/req':>8}")
+    serial = 0
+    for path, make in routes:
+        results = {}
+        for _ in range(args.rounds):
+            for name, read_json, backend in variants:
+                handler_class.read_json = read_json
+                body.orjson = backend
+                # Fresh data, so every variant adds to a catalog of the same size
+                module.DATA = module.data.DataLayer(module.builtin_source())
+                payloads = [json.dumps(make(serial + n)).encode() for n in range(args.requests)]
+                serial += args.requests
+                status = run_request(handler_class, server, path, payloads[0]).split(b' ', 2)[1]
+                assert status == b'200', (path, name, status)
+                started = time.process_time()
+                for payload in payloads[1:]:
+                    run_request(handler_class, server, path, payload)
+                elapsed = (time.process_time() - started) / (len(payloads) - 1)
+                results[name] = min(results.get(name, elapsed), elapsed)
+        for name, _, _ in variants:
+            elapsed = results[name]
+            print(f"{path:<40} {len(payloads[0]):>8} {name:<9} {1 / elapsed:>9.0f} {elapsed * 1e6:>8.1f}")
+    handler_class.read_json = new_read_json
+    body.orjson = orjson
+
+
+if __name__ == '__main__':
+    main()
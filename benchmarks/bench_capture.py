@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Replay lookups on a large capture file.
+
+Writes a capture of --records synthetic answers (movie details and comment
+pages, --body-size bytes each), then reports the time to open it with and
+without the index, the time per lookup (cold, then with the pages cached)
+and the Python memory the reader allocates, which stays flat however large
+the capture is because the records stay in the mmap'd file.
+
+    python benchmarks/bench_capture.py --records 200000 --body-size 2048
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from mock_backend.capture import CaptureReader, CaptureWriter  # noqa: E402
+
+
+def target(n):
+    if n % 2:
+        return f'/api/movie/movies/{n}'
+    return f'/api/movie/comments/getCommentsByMovieId/{n}?pageNo=1&pageSize=20'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=100000)
+    parser.add_argument('--body-size', type=int, default=1024)
+    parser.add_argument('--lookups', type=int, default=20000)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.capture')
+    os.close(fd)
+    os.unlink(path)
+    try:
+        body = (b'{"movieName": "x", "description": "' + b'y' * args.body_size)[:args.body_size - 2] + b'"}'
+        started = time.perf_counter()
+        writer = CaptureWriter(path)
+        for n in range(args.records):
+            writer.add('GET', target(n), 200, 'application/json', body)
+        writer.close()
+        written = time.perf_counter() - started
+        size = os.path.getsize(path)
+
+        rng = random.Random(0)
+        keys = [target(rng.randrange(args.records)) for _ in range(args.lookups)]
+        misses = [f'/api/movie/movies/x{n}' for n in range(args.lookups)]
+        started = time.perf_counter()
+        reader = CaptureReader(path)
+        opened = time.perf_counter() - started
+        hits = []
+        # First pass faults the pages in, the second finds them in the page cache
+        for _ in range(2):
+            started = time.perf_counter()
+            for key in keys:
+                reader.get('GET', key)
+            hits.append((time.perf_counter() - started) / len(keys))
+        started = time.perf_counter()
+        for key in misses:
+            reader.get('GET', key)
+        miss = (time.perf_counter() - started) / len(misses)
+        reader.close()
+
+        # Untimed, as tracing allocations slows every call down
+        tracemalloc.start()
+        reader = CaptureReader(path)
+        baseline = tracemalloc.get_traced_memory()[0]
+        for key in keys:
+            reader.get('GET', key)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        tracemalloc.stop()
+        reader.close()
+
+        # The same file without its index, as a recording cut short leaves it
+        with open(path, 'r+b') as f:
+            f.truncate(size - 16 * args.records - 24)
+        started = time.perf_counter()
+        scanned = CaptureReader(path)
+        scan = time.perf_counter() - started
+        assert not scanned.indexed and len(scanned) == args.records
+        scanned.close()
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+
+    print(f"{'records':<26} {args.records:>12}")
+    print(f"{'file MB':<26} {size / 1e6:>12.1f}")
+    print(f"{'write s':<26} {written:>12.2f}")
+    print(f"{'open with index ms':<26} {opened * 1000:>12.2f}")
+    print(f"{'open by scanning ms':<26} {scan * 1000:>12.1f}")
+    print(f"{'lookup hit, cold us':<26} {hits[0] * 1e6:>12.1f}")
+    print(f"{'lookup hit, warm us':<26} {hits[1] * 1e6:>12.1f}")
+    print(f"{'lookup miss us':<26} {miss * 1e6:>12.1f}")
+    print(f"{'peak Python KB in lookups':<26} {peak / 1024:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark: CommentStore paging, counting, adding and deleting on a
+comment-heavy movie. Page cost should depend on the page size only, not on
+how deep the page is.
+
+    python benchmarks/bench_comments.py --comments 100000 --page-size 5
+"""
+
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from mock_backend.comments import CommentStore  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--comments', type=int, default=100000, help='comments on the benchmarked movie')
+    parser.add_argument('--page-size', type=int, default=5)
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    records = ({"commentId": i, "movieId": 1 if i % 10 else 2, "commentText": f"comment {i}",
+                "commentBy": "bench", "commentByUserId": "u", "createdAt": "2026-01-01"}
+               for i in range(1, args.comments * 10 // 9 + 1))
+    build = timeit.default_timer()
+    store = CommentStore(records)
+    build = timeit.default_timer() - build
+    total = store.count(1)
+    print(f"built {len(store)} comments in {build * 1e3:.0f} ms, {total} on movie 1")
+
+    last_page = max(total // args.page_size, 1)
+    print(f"{'operation':<28} {'us/op':>8}")
+    for label, page_no in [('page 1', 1), ('middle page', last_page // 2), ('last page', last_page)]:
+        seconds = timeit.timeit(lambda: store.page(1, page_no, args.page_size), number=args.number)
+        print(f"{label + f' ({page_no})':<28} {seconds / args.number * 1e6:>8.3f}")
+    seconds = timeit.timeit(lambda: store.count(1), number=args.number)
+    print(f"{'count':<28} {seconds / args.number * 1e6:>8.3f}")
+
+    operations = min(args.number, 2000)
+    seconds = timeit.timeit(lambda: store.add(1, 'new comment', 'bench', 'u'), number=operations)
+    print(f"{'add':<28} {seconds / operations * 1e6:>8.3f}")
+    random.seed(1)
+    victims = iter(random.sample([c['commentId'] for c in store.page(1, 1, total)], operations))
+    seconds = timeit.timeit(lambda: store.delete(next(victims)), number=operations)
+    print(f"{'delete (random)':<28} {seconds / operations * 1e6:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
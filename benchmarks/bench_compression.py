@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bytes on the wire and CPU per request for each response coding of the
+catalog routes of mock-backend-fixed.py.
+
+Requests run in-process through the script's handler on in-memory sockets,
+with the response cache warm. ``cached`` is the steady state, where the
+compressed variant stored on the cache entry is written as it is;
+``per request`` is the cost of compressing the same body on every request,
+which is what serving without precompressed entries would cost, and what a
+cache miss adds to one request. The script's compression options apply:
+
+    python benchmarks/bench_compression.py --synthetic movies=2000
+    python benchmarks/bench_compression.py --compress-level gzip=9
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_alloc import load_script  # noqa: E402
+
+PATHS = [
+    '/api/movie/movies/displayingMovies',
+    '/api/movie/movies/comingSoonMovies',
+    '/api/movie/saloonTimes/getSaloonTimesByMovieId/1',
+]
+
+
+def run_request(handler_class, server, path, headers=()):
+    handler = handler_class.__new__(handler_class)
+    handler.request = None
+    handler.client_address = ('127.0.0.1', 0)
+    handler.server = server
+    lines = ''.join(f'{name}: {value}\r\n' for name, value in headers)
+    handler.rfile = io.BytesIO(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n{lines}\r\n'.encode())
+    handler.wfile = io.BytesIO()
+    handler.close_connection = True
+    handler.handle_one_request()
+    return handler.wfile.getvalue()
+
+
+def cpu_per_call(function, number):
+    started = time.process_time()
+    for _ in range(number):
+        function()
+    return (time.process_time() - started) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000, help='requests per route and coding')
+    parser.add_argument('--synthetic', metavar='SIZES', help='serve a synthetic catalog of these sizes')
+    module = load_script('mock-backend-fixed.py')
+    module.compression.add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        module.DATA = module.data.DataLayer(module.data.SyntheticSource(0, module.data.parse_sizes(args.synthetic)))
+    handler_class = module.MockBackendHandler
+    compressor = handler_class.compressor = module.compression.from_options(args)
+    server = types.SimpleNamespace(idle_timeout=5.0, max_keepalive_requests=100)
+
+    print(f"{'path':<52} {'coding':<8} {'wire B':>8} {'cached us':>10} {'per request us':>15}")
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        rows = []
+        for path in PATHS:
+            body = run_request(handler_class, server, path).partition(b'\r\n\r\n')[2]
+            for coding in (None, *compressor.encodings):
+                headers = [('Accept-Encoding', coding)] if coding else []
+                # The first request fills the cache entry and its compressed variant
+                wire = len(run_request(handler_class, server, path, headers))
+                cached = cpu_per_call(lambda: run_request(handler_class, server, path, headers), args.requests)
+                if coding:
+                    compress = cpu_per_call(lambda: compressor.compress(body, coding), max(args.requests // 10, 1))
+                else:
+                    compress = 0.0
+                rows.append((path, coding or 'identity', wire, cached, cached + compress))
+    for path, coding, wire, cached, per_request in rows:
+        print(f"{path:<52} {coding:<8} {wire:>8} {cached * 1e6:>10.1f} {per_request * 1e6:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Repeat page loads with and without conditional GETs: bytes on the wire and
+CPU per request for the routes the frontend polls, when the client sends
+back the ETag it got (304) and when it does not (full 200).
+
+Requests run in-process through the handler of mock-backend-fixed.py on
+in-memory sockets, with gzip accepted as a browser would.
+
+    python benchmarks/bench_conditional.py
+    python benchmarks/bench_conditional.py --synthetic movies=2000
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_alloc import load_script  # noqa: E402
+from bench_compression import cpu_per_call, run_request  # noqa: E402
+
+PATHS = [
+    '/api/movie/movies/displayingMovies',
+    '/api/movie/cities/getall',
+    '/api/movie/saloons/getall',
+    '/api/movie/movies/3',
+]
+BROWSER = [('Accept-Encoding', 'gzip, deflate, br')]
+
+
+def etag_of(response):
+    for line in response.partition(b'\r\n\r\n')[0].split(b'\r\n'):
+        name, _, value = line.partition(b':')
+        if name.lower() == b'etag':
+            return value.strip().decode()
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000, help='requests per route and case')
+    parser.add_argument('--synthetic', metavar='SIZES', help='serve a synthetic catalog of these sizes')
+    args = parser.parse_args()
+
+    module = load_script('mock-backend-fixed.py')
+    if args.synthetic:
+        module.DATA = module.data.DataLayer(module.data.SyntheticSource(0, module.data.parse_sizes(args.synthetic)))
+    handler_class = module.MockBackendHandler
+    server = types.SimpleNamespace(idle_timeout=5.0, max_keepalive_requests=100)
+
+    rows = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for path in PATHS:
+            first = run_request(handler_class, server, path, BROWSER)
+            revalidate = BROWSER + [('If-None-Match', etag_of(first))]
+            for case, headers in (('200', BROWSER), ('304', revalidate)):
+                wire = len(run_request(handler_class, server, path, headers))
+                cpu = cpu_per_call(lambda: run_request(handler_class, server, path, headers), args.requests)
+                rows.append((path, case, wire, cpu))
+    print(f"{'path':<40} {'reply':>5} {'wire B':>8} {'cpu us':>8}")
+    for path, case, wire, cpu in rows:
+        print(f"{path:<40} {case:>5} {wire:>8} {cpu * 1e6:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
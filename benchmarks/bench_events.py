@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ticket email pipeline of mock-backend-fixed.py under a burst of bookings.
+
+--events ticket events are published to an EmailPipeline as fast as one
+thread can, in bursts of --burst with --gap ms between them, for each batch
+size and linger. Reported per setting:
+
+- ``send us``   cost of publish() to the booking request, which only queues
+- ``batches``   batches committed, and their mean size
+- ``max depth`` most events queued and not rendered yet, sampled per burst
+- ``p50/p99``   latency from publish() to the email being rendered (and
+                written, with --outbox), from the pipeline's own histogram
+
+    python benchmarks/bench_events.py --events 5000 --outbox /tmp/outbox
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from mock_backend import events  # noqa: E402
+
+SETTINGS = ((1, 0.0), (16, 1.0), (64, 5.0), (256, 20.0))
+
+
+def ticket(number):
+    return {"movieName": "Avengers: Endgame", "saloonName": "Salon 1", "movieDay": "2024-12-25",
+            "movieStartTime": "19:30", "chairNumbers": [f"A{number % 20 + 1}"], "email": f"user{number}@example.com",
+            "fullName": "Nguyễn Văn A", "totalPrice": 90}
+
+
+def run(batch_size, linger_ms, args, outbox, log_file):
+    topic = events.Topic(path=log_file, batch_size=batch_size, linger=linger_ms / 1000)
+    pipeline = events.EmailPipeline(topic, outbox)
+    showtime = ('Avengers: Endgame', 'Salon 1', '2024-12-25', '19:30')
+    pending = [events.email_event(ticket(number), showtime, [f"A{number % 20 + 1}"]) for number in range(args.events)]
+    pipeline.publish(pending[0])
+    while topic.depth():
+        time.sleep(0.001)
+    sending = 0.0
+    max_depth = 0
+    for start in range(1, len(pending), args.burst):
+        started = time.perf_counter()
+        for event in pending[start:start + args.burst]:
+            pipeline.publish(event)
+        sending += time.perf_counter() - started
+        max_depth = max(max_depth, topic.depth())
+        time.sleep(args.gap / 1000)
+    pipeline.close(timeout=60.0)
+    state = pipeline.describe()
+    assert state['consumed'] == args.events and not state['failed'], state
+    return sending / (args.events - 1), state, max_depth
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=2000, help='events per setting')
+    parser.add_argument('--burst', type=int, default=20, help='events published back to back')
+    parser.add_argument('--gap', type=float, default=10.0, help='ms between bursts')
+    parser.add_argument('--outbox', metavar='DIR', help='write the emails under DIR (default: render only)')
+    parser.add_argument('--events-file', action='store_true', help='also append the batches to a topic file')
+    args = parser.parse_args()
+
+    scratch = Path(tempfile.mkdtemp(prefix='bench-events-'))
+    try:
+        print(f"{'batch':>5} {'linger ms':>9} {'send us':>8} {'batches':>8} {'mean':>6} {'max depth':>9} "
+              f"{'p50 ms':>8} {'p99 ms':>8}")
+        for batch_size, linger_ms in SETTINGS:
+            name = f'{batch_size}-{linger_ms:g}'
+            outbox = Path(args.outbox) / name if args.outbox else None
+            log_file = scratch / f'{name}.ndjson' if args.events_file else None
+            send, state, max_depth = run(batch_size, linger_ms, args, outbox, log_file)
+            latency = state['latencyMs']
+            print(f"{batch_size:>5} {linger_ms:>9g} {send * 1e6:>8.2f} {state['batches']:>8} "
+                  f"{state['meanBatchSize']:>6} {max_depth:>9} {latency['p50']:>8} {latency['p99']:>8}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Injected delays must not hold up other connections.
+
+For each serving mode, a server starts with a profile that delays one route
+by --delay ms. Then --slow clients keep requesting that route while one
+client times a fast route. Reported are the fast route's latency percentiles
+with and without the slow clients, and the slow route's measured latency
+against the injected one.
+
+    python benchmarks/bench_faults.py --modes threaded asyncio --slow 16
+"""
+
+import argparse
+import http.client
+import json
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_serving import SERVERS, start_server, stop_server  # noqa: E402
+
+SLOW_PATH = '/api/movie/movies/displayingMovies'
+FAST_PATH = '/api/movie/cities/getall'
+
+
+def timed_requests(port, path, stop, samples):
+    conn = http.client.HTTPConnection('localhost', port, timeout=30)
+    while not stop.is_set():
+        started = time.perf_counter()
+        conn.request('GET', path)
+        conn.getresponse().read()
+        samples.append(time.perf_counter() - started)
+    conn.close()
+
+
+def percentiles(samples):
+    if len(samples) < 2:
+        return samples * 3 or [float('nan')] * 3
+    cuts = statistics.quantiles(samples, n=100)
+    return [cuts[49], cuts[98], max(samples)]
+
+
+def measure(port, slow_clients, duration):
+    stop = threading.Event()
+    slow_samples, fast_samples = [], []
+    threads = [threading.Thread(target=timed_requests, args=(port, SLOW_PATH, stop, slow_samples))
+               for _ in range(slow_clients)]
+    threads.append(threading.Thread(target=timed_requests, args=(port, FAST_PATH, stop, fast_samples)))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return fast_samples, slow_samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', default=['threaded', 'asyncio'])
+    parser.add_argument('--slow', type=int, default=16, help='clients on the delayed route')
+    parser.add_argument('--delay', type=float, default=200, help='injected delay in ms')
+    parser.add_argument('--duration', type=float, default=3.0)
+    parser.add_argument('--port', type=int, default=18080)
+    args = parser.parse_args()
+
+    profile = {"routes": {SLOW_PATH: {"latency": args.delay}}}
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+        json.dump(profile, f)
+
+    print(f"{'mode':<10} {'slow clients':>12} {'fast p50 ms':>12} {'fast p99 ms':>12} {'fast max ms':>12} "
+          f"{'slow p50 ms':>12}")
+    try:
+        for mode in args.modes:
+            process = start_server(SERVERS['fixed'], mode, args.port,
+                                   ['--faults', f.name, '--log-level', 'off'])
+            try:
+                for slow_clients in (0, args.slow):
+                    fast, slow = measure(args.port, slow_clients, args.duration)
+                    fast_ms = [value * 1000 for value in percentiles(fast)]
+                    slow_ms = statistics.median(slow) * 1000 if slow else float('nan')
+                    print(f"{mode:<10} {slow_clients:>12} {fast_ms[0]:>12.1f} {fast_ms[1]:>12.1f} "
+                          f"{fast_ms[2]:>12.1f} {slow_ms:>12.1f}")
+            finally:
+                stop_server(process)
+    finally:
+        Path(f.name).unlink()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Load generator for the mock backends: many asyncio clients on keep-alive
+connections running a weighted mix of page-shaped scenarios against every
+endpoint run_server advertises.
+
+Scenarios (``--mix name=weight,...``):
+
+- ``home``       displayingMovies and comingSoonMovies, fetched in parallel
+- ``detail``     the movie detail page: the movie, its actors, cities,
+                 comment count and first comment page, fetched in parallel
+                 the way the React page fires them
+- ``aggregate``  the same parts from the one movies/{id}/detail request
+                 (fixed script only)
+- ``showtimes``  saloons of a city, then saloon times of a saloon and movie
+- ``booking``    sendTicketDetail for 1-2 random adjacent seats; 409 (seats
+                 taken) counts as a conflict, not an error
+- ``hold``       getTakenSeats, reserveSeats, then confirm the hold through
+                 sendTicketDetail (fixed script only)
+- ``comment``    add a comment, then delete it (fixed script only)
+- ``auth``       register a user, then log in (fixed script only)
+- ``login``      log in as the seeded admin; every login hashes the password
+                 (fixed script only)
+- ``health``     /health
+
+Each client runs scenarios back to back (closed loop). With ``--rate`` the
+clients start scenarios on a fixed schedule instead (open loop). Latency is
+then measured from the scheduled start, so a stalled server shows up in the
+percentiles instead of silently slowing the load down.
+
+The threaded mode holds a pool thread per open connection, so more than
+--threads connections (clients times --fanout) queue until idle ones time
+out; that shows up as multi-second latencies, not as errors.
+
+Reported per route and in total are requests, errors, conflicts, requests
+per second and p50/p95/p99/p99.9/max latency. ``--json FILE`` writes the same
+numbers, with the commit and the options, for tracking across commits.
+
+Against a server it starts (``--server fixed|legacy``, passing --mode and
+any ``--server-args``), or a running one (``--url``):
+
+    python benchmarks/bench_load.py --server fixed --clients 64 --duration 10
+    python benchmarks/bench_load.py --server legacy --mix home=3,detail=3,booking=1
+    python benchmarks/bench_load.py --url http://127.0.0.1:8080 --rate 500 --json load.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+import urllib.parse
+from array import array
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_serving import ROOT, SERVERS, start_server, stop_server  # noqa: E402
+
+DEFAULT_MIX = 'home=4,detail=4,showtimes=2,booking=1,hold=1,comment=1,auth=1,health=1'
+SCENARIOS = ('home', 'detail', 'aggregate', 'showtimes', 'booking', 'hold', 'comment', 'auth', 'login', 'health')
+FIXED_ONLY = {'aggregate', 'hold', 'comment', 'auth', 'login'}
+PERCENTILES = (('p50', 0.50), ('p95', 0.95), ('p99', 0.99), ('p999', 0.999))
+SEAT_ROWS = (('A', 8), ('B', 8), ('C', 6), ('D', 6), ('E', 6), ('F', 7))
+
+
+class HTTPConnection:
+    """One keep-alive HTTP/1.1 connection over asyncio streams"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+        # A page with more requests than connections queues them, as a browser does
+        self._lock = asyncio.Lock()
+
+    async def request(self, method, path, body=None):
+        """(status, body) of one request; reconnects when the server closed the connection"""
+        async with self._lock:
+            return await self._request(method, path, body)
+
+    async def _request(self, method, path, body):
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        head = f'{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n'
+        if body is not None:
+            head += f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n'
+        self._writer.write(head.encode() + b'\r\n' + (body or b''))
+        try:
+            return await self._response()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.close()
+            raise
+
+    async def _response(self):
+        head = await self._reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split(' ', 2)[1])
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self._reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                chunk = await self._reader.readexactly(size + 2)
+                if not size:
+                    break
+                chunks.append(chunk[:-2])
+            body = b''.join(chunks)
+        else:
+            body = await self._reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, body
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class Stats:
+    """Latency samples and outcome counts per route label"""
+
+    def __init__(self):
+        self.latency = {}
+        self.errors = {}
+        self.conflicts = {}
+        self.error_kinds = {}
+        self.recording = False
+
+    def add(self, label, seconds):
+        if not self.recording:
+            return
+        self.latency.setdefault(label, array('d')).append(seconds)
+
+    def conflict(self, label):
+        if self.recording:
+            self.conflicts[label] = self.conflicts.get(label, 0) + 1
+
+    def error(self, label, kind):
+        """Count a failed request: an unexpected status or a connection error"""
+        if self.recording:
+            self.error_kinds[kind] = self.error_kinds.get(kind, 0) + 1
+            self.errors[label] = self.errors.get(label, 0) + 1
+
+    def summary(self, duration):
+        routes = {label: _summarize(samples, self.errors.get(label, 0), self.conflicts.get(label, 0), duration)
+                  for label, samples in sorted(self.latency.items())}
+        for label in self.errors.keys() - self.latency.keys():
+            routes[label] = _summarize(array('d'), self.errors[label], 0, duration)
+        everything = array('d')
+        for samples in self.latency.values():
+            everything.extend(samples)
+        total = _summarize(everything, sum(self.errors.values()), sum(self.conflicts.values()), duration)
+        return total, routes
+
+
+def _summarize(samples, errors, conflicts, duration):
+    ordered = sorted(samples)
+    summary = {'requests': len(ordered), 'errors': errors, 'conflicts': conflicts,
+               'rps': round(len(ordered) / duration, 1)}
+    for name, fraction in PERCENTILES:
+        # Nearest rank
+        summary[name] = round(ordered[min(int(fraction * len(ordered)), len(ordered) - 1)] * 1000, 3) \
+            if ordered else None
+    summary['max'] = round(ordered[-1] * 1000, 3) if ordered else None
+    return summary
+
+
+class Client:
+    """A browser-like user: a few keep-alive connections used in parallel"""
+
+    def __init__(self, index, host, port, stats, movie_ids, run_id, fanout):
+        self.rng = random.Random(f'{run_id}:{index}')
+        self.index = index
+        self.stats = stats
+        self.movie_ids = movie_ids
+        self.run_id = run_id
+        self.connections = [HTTPConnection(host, port) for _ in range(fanout)]
+        self.requests = 0
+
+    async def call(self, label, method, path, payload=None, connection=0, started=None, accept=(200,),
+                   conflict=(409,)):
+        """Run one request, record it under label, returns the decoded JSON body or None"""
+        started = time.perf_counter() if started is None else started
+        body = json.dumps(payload).encode() if payload is not None else None
+        try:
+            status, data = await self.connections[connection % len(self.connections)].request(method, path, body)
+        except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+            self.stats.error(label, type(e).__name__)
+            return None
+        self.requests += 1
+        self.stats.add(label, time.perf_counter() - started)
+        if status in conflict:
+            self.stats.conflict(label)
+        elif status not in accept:
+            self.stats.error(label, f'HTTP {status}')
+        if status not in accept:
+            return None
+        try:
+            return json.loads(data) if data else None
+        except ValueError:
+            return None
+
+    async def fan_out(self, started, *calls):
+        """Requests of one page, in parallel over the client's connections"""
+        return await asyncio.gather(*(self.call(*call, connection=i, started=started)
+                                      for i, call in enumerate(calls)))
+
+    def movie(self):
+        return self.rng.choice(self.movie_ids)
+
+    def showtime(self):
+        # Many showtimes per run, so most bookings find free seats
+        return {"movieName": f"Load {self.rng.randrange(20)}", "saloonName": "Load Saloon",
+                "movieDay": f"{self.run_id}-{self.rng.randrange(2000)}", "movieStartTime": "20:00"}
+
+    def seats(self):
+        row, count = self.rng.choice(SEAT_ROWS)
+        size = self.rng.randint(1, 2)
+        first = self.rng.randint(1, count - size + 1)
+        return ' ' + ' '.join(f'{row}{n}' for n in range(first, first + size))
+
+    async def home(self, started):
+        await self.fan_out(started,
+                           ('displayingMovies', 'GET', '/api/movie/movies/displayingMovies'),
+                           ('comingSoonMovies', 'GET', '/api/movie/movies/comingSoonMovies'))
+
+    async def detail(self, started):
+        movie_id = self.movie()
+        await self.fan_out(started,
+                           ('movies/{id}', 'GET', f'/api/movie/movies/{movie_id}'),
+                           ('getActorsByMovieId', 'GET', f'/api/movie/actors/getActorsByMovieId/{movie_id}'),
+                           ('getCitiesByMovieId', 'GET', f'/api/movie/cities/getCitiesByMovieId/{movie_id}'),
+                           ('getCountOfComments', 'GET', f'/api/movie/comments/getCountOfComments/{movie_id}'),
+                           ('getCommentsByMovieId', 'GET', f'/api/movie/comments/getCommentsByMovieId/{movie_id}/1/5'))
+
+    async def aggregate(self, started):
+        await self.call('movies/{id}/detail', 'GET',
+                        f'/api/movie/movies/{self.movie()}/detail?parts=movie,actors,cities,commentCount,comments'
+                        f'&pageNo=1&pageSize=5', started=started)
+
+    async def showtimes(self, started):
+        movie_id = self.movie()
+        saloons = await self.call('getSaloonsByCityId', 'GET',
+                                  f'/api/movie/saloons/getSaloonsByCityId/{self.rng.randint(1, 3)}', started=started)
+        saloon_id = (self.rng.choice(saloons).get('saloonId') if saloons else None) or 1
+        await self.call('getMovieSaloonTimeSaloonAndMovieId', 'GET',
+                        f'/api/movie/saloonTimes/getMovieSaloonTimeSaloonAndMovieId/{saloon_id}/{movie_id}')
+
+    async def booking(self, started):
+        ticket = dict(self.showtime(), chairNumbers=self.seats(), email='load@example.com',
+                      fullName='Load Test', phone='0', totalPrice=90000)
+        await self.call('sendTicketDetail', 'POST', '/api/movie/payments/sendTicketDetail', ticket, started=started)
+
+    async def hold(self, started):
+        showtime = self.showtime()
+        await self.call('getTakenSeats', 'GET',
+                        f'/api/movie/payments/getTakenSeats?{urllib.parse.urlencode(showtime)}', started=started)
+        held = await self.call('reserveSeats', 'POST', '/api/movie/payments/reserveSeats',
+                               dict(showtime, chairNumbers=self.seats()))
+        if held is not None:
+            await self.call('sendTicketDetail (hold)', 'POST', '/api/movie/payments/sendTicketDetail',
+                            dict(showtime, holdId=held['holdId'], email='load@example.com', fullName='Load Test'))
+
+    async def comment(self, started):
+        added = await self.call('comments/add', 'POST', '/api/movie/comments/add',
+                                {"movieId": self.movie(), "commentText": "Load test", "commentBy": "Load"},
+                                started=started)
+        if added is not None:
+            await self.call('comments/delete', 'POST', '/api/movie/comments/delete',
+                            {"commentId": added['commentId']})
+
+    async def auth(self, started):
+        email = f'load{self.index}-{self.requests}@{self.run_id}.example.com'
+        await self.call('users/add', 'POST', '/api/user/users/add',
+                        {"fullName": "Load Test", "email": email, "password": "load-test-1"}, started=started)
+        await self.call('auth/login', 'POST', '/api/user/auth/login', {"email": email, "password": "load-test-1"})
+
+    async def login(self, started):
+        await self.call('auth/login', 'POST', '/api/user/auth/login',
+                        {"email": "admin@cinevision.com", "password": "admin123"}, started=started)
+
+    async def health(self, started):
+        await self.call('health', 'GET', '/health', started=started)
+
+    def close(self):
+        for connection in self.connections:
+            connection.close()
+
+
+def parse_mix(text, server):
+    mix = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r}, expected one of {', '.join(SCENARIOS)}")
+        if server == 'legacy' and name in FIXED_ONLY:
+            continue
+        mix[name] = float(weight or 1)
+    if not mix:
+        raise ValueError("The mix has no scenario the server supports")
+    return mix
+
+
+async def run_client(client, mix, stop_at, interval, phase):
+    names, weights = list(mix), list(mix.values())
+    scheduled = time.perf_counter() + phase
+    while True:
+        if interval:
+            # Open loop: start on schedule, and count lateness as latency
+            now = time.perf_counter()
+            if scheduled > now:
+                await asyncio.sleep(scheduled - now)
+            started = scheduled
+            scheduled += interval
+        else:
+            started = time.perf_counter()
+        if started >= stop_at:
+            break
+        name = client.rng.choices(names, weights)[0]
+        await getattr(client, name)(started)
+
+
+async def fetch_movie_ids(host, port):
+    connection = HTTPConnection(host, port)
+    try:
+        status, body = await connection.request('GET', '/api/movie/movies/displayingMovies')
+        movies = json.loads(body) if status == 200 else []
+        return [movie.get('movieId') or movie.get('id') for movie in movies if movie.get('movieId') or movie.get('id')]
+    finally:
+        connection.close()
+
+
+async def load(host, port, args, mix):
+    stats = Stats()
+    movie_ids = await fetch_movie_ids(host, port) or [1, 2, 3]
+    run_id = f'load{time.time_ns() // 1000000}'
+    clients = [Client(i, host, port, stats, movie_ids, run_id, args.fanout) for i in range(args.clients)]
+    interval = args.clients / args.rate if args.rate else 0.0
+    started = time.perf_counter()
+    record_from = started + args.warmup
+    stop_at = record_from + args.duration
+    loop = asyncio.get_running_loop()
+    loop.call_at(loop.time() + args.warmup, setattr, stats, 'recording', True)
+    try:
+        await asyncio.gather(*(run_client(client, mix, stop_at, interval, interval * i / args.clients)
+                               for i, client in enumerate(clients)))
+    finally:
+        for client in clients:
+            client.close()
+    return stats, time.perf_counter() - record_from
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=str(ROOT), capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def print_table(total, routes):
+    columns = ('requests', 'errors', 'conflicts', 'rps', 'p50', 'p95', 'p99', 'p999', 'max')
+    print(f"{'route':<36} " + ' '.join(f'{name:>9}' for name in columns))
+    for label, summary in list(routes.items()) + [('TOTAL', total)]:
+        cells = ' '.join(f"{'-' if summary[name] is None else summary[name]:>9}" for name in columns)
+        print(f"{label:<36} {cells}")
+    print("latency columns in ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--server', choices=sorted(SERVERS), default='fixed', help='script to start and load')
+    target.add_argument('--url', help='load a running server instead of starting one')
+    parser.add_argument('--mode', default='threaded', help='serving mode of the started server')
+    parser.add_argument('--server-args', default='',
+                        help='extra arguments for the started server, e.g. "--workers 2"')
+    parser.add_argument('--port', type=int, default=18080, help='port of the started server')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'scenario weights (default: {DEFAULT_MIX})')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent users')
+    parser.add_argument('--fanout', type=int, default=2, help='keep-alive connections per user')
+    parser.add_argument('--rate', type=float, help='scenarios per second over all users (open loop)')
+    parser.add_argument('--duration', type=float, default=10.0, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=1.0, help='seconds run before measuring')
+    parser.add_argument('--json', metavar='FILE', help="write the results as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    server = 'url' if args.url else args.server
+    try:
+        mix = parse_mix(args.mix, server)
+    except ValueError as e:
+        parser.error(str(e))
+    process = None
+    if args.url:
+        parts = urllib.parse.urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        host, port = 'localhost', args.port
+        # Only the fixed script has logging options; its request log would dominate the profile
+        quiet = ['--log-level', 'off'] if args.server == 'fixed' else []
+        process = start_server(SERVERS[args.server], args.mode, port, quiet + args.server_args.split())
+    try:
+        stats, elapsed = asyncio.run(load(host, port, args, mix))
+    except OSError as e:
+        sys.exit(f"Cannot reach {host}:{port}: {e}")
+    finally:
+        if process is not None:
+            stop_server(process)
+
+    total, routes = stats.summary(elapsed)
+    if args.json != '-':
+        print_table(total, routes)
+        if stats.error_kinds:
+            print("errors: " + ', '.join(f'{kind} x{count}' for kind, count in sorted(stats.error_kinds.items())))
+    if args.json:
+        document = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'commit': git_commit(),
+            'target': args.url or args.server,
+            'options': {'mode': None if args.url else args.mode,
+                        'serverArgs': None if args.url else args.server_args,
+                        'mix': mix, 'clients': args.clients, 'fanout': args.fanout, 'rate': args.rate,
+                        'duration': args.duration, 'warmup': args.warmup},
+            'total': total,
+            'routes': routes,
+            'errorKinds': stats.error_kinds,
+        }
+        if args.json == '-':
+            json.dump(document, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(document, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Requests-per-second of mock-backend-fixed.py with request logging off,
+sampled, at info level (one access line per request) and at debug level
+with payloads.
+
+Each configuration gets a fresh server process whose stdout goes to a file,
+as it would under a process manager, and is driven by keep-alive clients on
+a GET route and a POST route. The configurations take turns for --repeat
+rounds and the best round of each is reported, which keeps a noisy machine
+from favouring whichever ran first. The log volume per request is reported
+next to the throughput.
+
+    python benchmarks/bench_logging.py --clients 16 --duration 3
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_serving import SERVERS, run_clients, start_server, stop_server  # noqa: E402
+
+CONFIGS = {
+    'off': ['--log-level', 'off'],
+    'sampled 1%': ['--log-level', 'info', '--log-sample', '0.01'],
+    'info': ['--log-level', 'info'],
+    'debug+payloads': ['--log-level', 'debug', '--log-payloads'],
+}
+LOGIN = json.dumps({"email": "bench@example.com", "password": "secret"}).encode()
+
+
+def run_post_clients(port, path, body, clients, duration):
+    counts = [0] * clients
+    stop_at = time.perf_counter() + duration
+
+    def client(index):
+        conn = http.client.HTTPConnection('localhost', port, timeout=5)
+        while time.perf_counter() < stop_at:
+            conn.request('POST', path, body, {'Content-Type': 'application/json'})
+            conn.getresponse().read()
+            counts[index] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / (time.perf_counter() - started), sum(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--configs', nargs='+', choices=list(CONFIGS), default=list(CONFIGS))
+    parser.add_argument('--mode', default='threaded')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=3.0, help='seconds per measurement')
+    parser.add_argument('--get-path', default='/api/movie/movies/3')
+    parser.add_argument('--post-path', default='/api/user/auth/login')
+    parser.add_argument('--repeat', type=int, default=3, help='rounds over all configurations')
+    parser.add_argument('--port', type=int, default=18081)
+    args = parser.parse_args()
+
+    best = {name: (0, 0, 0) for name in args.configs}
+    for _ in range(args.repeat):
+        for name in args.configs:
+            get_rps, post_rps, per_request = measure(args, CONFIGS[name])
+            best[name] = (max(best[name][0], get_rps), max(best[name][1], post_rps), per_request)
+
+    print(f"{'logging':<16} {'GET req/s':>10} {'POST req/s':>11} {'log B/req':>10}")
+    for name, (get_rps, post_rps, per_request) in best.items():
+        print(f"{name:<16} {get_rps:>10.0f} {post_rps:>11.0f} {per_request:>10.0f}")
+
+
+def measure(args, extra_args):
+    """(GET req/s, POST req/s, log bytes per request) of one server run"""
+    with tempfile.TemporaryFile() as output:
+        process = start_server(SERVERS['fixed'], args.mode, args.port, extra_args, stdout=output)
+        try:
+            banner = os.fstat(output.fileno()).st_size
+            get_rps, _ = run_clients(args.port, args.get_path, args.clients, args.duration)
+            post_rps, posts = run_post_clients(args.port, args.post_path, LOGIN, args.clients, args.duration)
+        finally:
+            stop_server(process)
+        logged = os.fstat(output.fileno()).st_size - banner
+    return get_rps, post_rps, logged / (get_rps * args.duration + posts)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark: cost of recording one request in RequestMetrics, alone and
+with several threads recording at once, and the cost of a /metrics scrape
+over many routes and thread shards.
+
+    python benchmarks/bench_metrics.py --threads 1 8 32 --routes 25
+"""
+
+import argparse
+import random
+import sys
+import threading
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from mock_backend.metrics import RequestMetrics  # noqa: E402
+
+
+def record(metrics, routes, count, seed):
+    rng = random.Random(seed)
+    samples = [(rng.choice(routes), rng.choice((200, 200, 200, 404)), rng.lognormvariate(-7, 1))
+               for _ in range(1000)]
+    for i in range(count):
+        route, status, seconds = samples[i % 1000]
+        metrics.started(route, 'GET')
+        metrics.finished(route, 'GET', status, 1024, seconds, i % 3 == 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', nargs='+', type=int, default=[1, 8, 32])
+    parser.add_argument('--routes', type=int, default=25)
+    parser.add_argument('--requests', type=int, default=200000, help='requests recorded per measurement')
+    args = parser.parse_args()
+
+    routes = [f'/api/route/{i}/{{id:int}}' for i in range(args.routes)]
+    print(f"{'threads':>7} {'us/request':>11} {'scrape ms':>10} {'scrape KB':>10}")
+    for threads in args.threads:
+        metrics = RequestMetrics()
+        workers = [threading.Thread(target=record, args=(metrics, routes, args.requests // threads, i))
+                   for i in range(threads)]
+        started = timeit.default_timer()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = timeit.default_timer() - started
+        scrape = min(timeit.repeat(metrics.render, number=1, repeat=5))
+        size = len(metrics.render())
+        print(f"{threads:>7} {elapsed / args.requests * 1e6:>11.2f} {scrape * 1e3:>10.1f} {size / 1024:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark: movie detail lookup through MovieStore against the linear
+scan it replaced, on a catalog padded to production-like sizes.
+
+    python benchmarks/bench_movies.py --sizes 8 1000 10000 50000
+"""
+
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from mock_backend.movies import MovieStore  # noqa: E402
+
+CATEGORIES = ['Action', 'Adventure', 'Comedy', 'Drama', 'Horror', 'Sci-Fi']
+
+
+def make_catalog(size):
+    return [{
+        'id': i,
+        'movieId': i,
+        'movieName': f'Movie {i}',
+        'categoryName': ', '.join(random.sample(CATEGORIES, 2)),
+        'directorName': f'Director {i % 97}',
+        'releaseDate': f'{2000 + i % 27}-{1 + i % 12:02d}-{1 + i % 28:02d}',
+    } for i in range(1, size + 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[8, 1000, 10000, 50000])
+    parser.add_argument('--lookups', type=int, default=2000, help='random detail lookups per size')
+    args = parser.parse_args()
+
+    random.seed(42)
+    print(f"{'movies':>8} {'build ms':>9} {'scan us':>10} {'index us':>10} {'category us':>12}")
+    for size in args.sizes:
+        movies = make_catalog(size)
+        ids = [random.randint(1, size) for _ in range(args.lookups)]
+
+        build = timeit.timeit(lambda: MovieStore(movies), number=1)
+        store = MovieStore(movies)
+
+        def scan():
+            for movie_id in ids:
+                next((m for m in movies if m['id'] == movie_id), None)
+
+        def index():
+            for movie_id in ids:
+                store.get(movie_id)
+
+        def category():
+            for _ in ids:
+                store.by_category('Drama')
+
+        scan_time = min(timeit.repeat(scan, number=1, repeat=3)) if size <= 10000 else float('nan')
+        index_time = min(timeit.repeat(index, number=1, repeat=3))
+        category_time = min(timeit.repeat(category, number=1, repeat=3))
+        print(f"{size:>8} {build * 1e3:>9.1f} {scan_time / args.lookups * 1e6:>10.2f} "
+              f"{index_time / args.lookups * 1e6:>10.3f} {category_time / args.lookups * 1e6:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
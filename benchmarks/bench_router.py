@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark: route resolution of the compiled Router used by
+mock-backend-fixed.py against the if/elif startswith chain it replaced.
+
+The original chain only parsed the parameters of two branches, the other
+handlers ignored theirs. ``chain+params`` is the same chain also parsing
+every parameter the routed handlers now get, which is what the router is
+compared with on equal terms.
+
+Timings are the best of --repeat runs of --number resolutions each.
+
+    python benchmarks/bench_router.py --number 1000 --repeat 300
+"""
+
+import argparse
+import importlib.util
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PATHS = [
+    '/api/movie/movies/displayingMovies',
+    '/api/movie/movies/comingSoonMovies',
+    '/api/movie/movies/3',
+    '/api/movie/saloons/getSaloonsByCityId/1',
+    '/api/movie/saloons/getall',
+    '/api/movie/cities/getall',
+    '/api/movie/comments/getCountOfComments/3',
+    '/api/movie/comments/getCommentsByMovieId/3/1/5',
+    '/api/movie/saloonTimes/getSaloonTimesByMovieId/3',
+    '/api/movie/actors/getActorsByMovieId/3',
+    '/api/movie/cities/getCitiesByMovieId/3',
+    '/health',
+    '/api/movie/saloonTimes/getMovieSaloonTimeSaloonAndMovieId/2/3',
+    '/api/movie/actors/getall',
+    '/api/movie/categories/getall',
+    '/api/movie/directors/getall',
+    '/api/unknown/route',
+]
+
+
+def load_script(name, filename):
+    spec = importlib.util.spec_from_file_location(name, ROOT / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def chain_dispatch(path):
+    """The branch order and parameter parsing of the original MockBackendHandler.do_GET"""
+    if path == '/api/movie/movies/displayingMovies':
+        return 'displayingMovies'
+    elif path == '/api/movie/movies/comingSoonMovies':
+        return 'comingSoonMovies'
+    elif path.startswith('/api/movie/movies/') and path.split('/')[-1].isdigit():
+        return ('movieById', int(path.split('/')[-1]))
+    elif path.startswith('/api/movie/saloons/getByCityId/') or path.startswith('/api/movie/saloons/getSaloonsByCityId/'):
+        city_id = None
+        if '/getByCityId/' in path:
+            city_id = path.split('/getByCityId/')[-1]
+        elif '/getSaloonsByCityId/' in path:
+            city_id = path.split('/getSaloonsByCityId/')[-1]
+        return ('saloonsByCity', city_id)
+    elif path == '/api/movie/saloons/getall':
+        return 'allSaloons'
+    elif path == '/api/movie/cities/getall':
+        return 'allCities'
+    elif path.startswith('/api/movie/comments/getCountOfComments/'):
+        return 'commentCount'
+    elif '/api/movie/comments/getCommentsByMovieId/' in path:
+        return 'comments'
+    elif path.startswith('/api/movie/saloonTimes/getSaloonTimesByMovieId/'):
+        return 'saloonTimesByMovie'
+    elif path.startswith('/api/movie/actors/getActorsByMovieId/'):
+        return 'actorsByMovie'
+    elif path.startswith('/api/movie/cities/getCitiesByMovieId/'):
+        return 'citiesByMovie'
+    elif path == '/health':
+        return 'health'
+    elif path.startswith('/api/movie/saloonTimes/getMovieSaloonTimeSaloonAndMovieId/'):
+        path_parts = path.split('/')
+        return ('saloonTimes', int(path_parts[-2]), int(path_parts[-1]))
+    elif path == '/api/movie/actors/getall':
+        return 'allActors'
+    elif path == '/api/movie/categories/getall':
+        return 'allCategories'
+    elif path == '/api/movie/directors/getall':
+        return 'allDirectors'
+    return None
+
+
+def chain_dispatch_params(path):
+    """chain_dispatch() parsing the parameters the routed handlers get"""
+    if path == '/api/movie/movies/displayingMovies':
+        return 'displayingMovies'
+    elif path == '/api/movie/movies/comingSoonMovies':
+        return 'comingSoonMovies'
+    elif path.startswith('/api/movie/movies/') and path.split('/')[-1].isdigit():
+        return ('movieById', {'movieId': int(path.split('/')[-1])})
+    elif path.startswith('/api/movie/saloons/getByCityId/') or path.startswith('/api/movie/saloons/getSaloonsByCityId/'):
+        return ('saloonsByCity', {'cityId': path.split('/')[-1]})
+    elif path == '/api/movie/saloons/getall':
+        return 'allSaloons'
+    elif path == '/api/movie/cities/getall':
+        return 'allCities'
+    elif path.startswith('/api/movie/comments/getCountOfComments/'):
+        return ('commentCount', {'movieId': path.split('/')[-1]})
+    elif '/api/movie/comments/getCommentsByMovieId/' in path:
+        path_parts = path.split('/')
+        return ('comments', {'movieId': path_parts[-3], 'pageNo': int(path_parts[-2]),
+                             'pageSize': int(path_parts[-1])})
+    elif path.startswith('/api/movie/saloonTimes/getSaloonTimesByMovieId/'):
+        return ('saloonTimesByMovie', {'movieId': path.split('/')[-1]})
+    elif path.startswith('/api/movie/actors/getActorsByMovieId/'):
+        return ('actorsByMovie', {'movieId': path.split('/')[-1]})
+    elif path.startswith('/api/movie/cities/getCitiesByMovieId/'):
+        return ('citiesByMovie', {'movieId': path.split('/')[-1]})
+    elif path == '/health':
+        return 'health'
+    elif path.startswith('/api/movie/saloonTimes/getMovieSaloonTimeSaloonAndMovieId/'):
+        path_parts = path.split('/')
+        return ('saloonTimes', {'saloonId': int(path_parts[-2]), 'movieId': int(path_parts[-1])})
+    elif path == '/api/movie/actors/getall':
+        return 'allActors'
+    elif path == '/api/movie/categories/getall':
+        return 'allCategories'
+    elif path == '/api/movie/directors/getall':
+        return 'allDirectors'
+    return None
+
+
+def per_call(function, path, number, repeat):
+    """Best time of one call over repeat runs of number calls, in seconds"""
+    calls = range(number)
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in calls:
+            function(path)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=1000, help='resolutions per run')
+    parser.add_argument('--repeat', type=int, default=300, help='runs per path, the best one counts')
+    args = parser.parse_args()
+
+    routes = load_script('mock_backend_fixed', 'mock-backend-fixed.py').ROUTES
+
+    def resolve(path):
+        return routes.resolve('GET', path)
+
+    variants = (chain_dispatch, chain_dispatch_params, resolve)
+    print(f"{'path':<64} {'chain ns':>9} {'+params ns':>10} {'router ns':>9}")
+    totals = [0.0] * len(variants)
+    for path in PATHS:
+        timings = [per_call(function, path, args.number, args.repeat) for function in variants]
+        totals = [total + timing for total, timing in zip(totals, timings)]
+        chain, params, router = (timing * 1e9 for timing in timings)
+        print(f"{path:<64} {chain:>9.0f} {params:>10.0f} {router:>9.0f}")
+    chain, params, router = (total / len(PATHS) * 1e9 for total in totals)
+    print(f"{'mean':<64} {chain:>9.0f} {params:>10.0f} {router:>9.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Movie search latency against catalog size.
+
+For synthetic catalogs of growing size, MovieStore.search() answers a set of
+queries from its SearchIndex, compared with what a client does without a
+search route: fetch every movie and keep those whose title, director,
+category or description contain each word (``scan``, lowercased substring
+matching, no diacritic folding, no ranking). Reported per catalog:
+
+- ``build ms``  building the index, paid by the first search
+- ``add us``    indexing one movie added afterwards
+- per query, the median time of a search with the index and of the scan,
+                and how many movies the search matched
+
+    python benchmarks/bench_search.py --movies 1000 10000 50000
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from mock_backend import data  # noqa: E402
+from mock_backend.movies import MovieStore  # noqa: E402
+
+QUERIES = (
+    ('word', 'storm'),
+    ('prefix', 'sto'),
+    ('two words', 'dark kingdom'),
+    ('director', 'director 7'),
+    ('rare', '4321'),
+    ('miss', 'zzzz'),
+)
+FIELDS = ('movieName', 'directorName', 'categoryName', 'description')
+
+
+def scan(movies, query, limit):
+    words = query.casefold().split()
+    found = []
+    for movie in movies:
+        text = ' '.join(str(movie.get(field) or '') for field in FIELDS).casefold()
+        if all(word in text for word in words):
+            found.append(movie)
+    return found[:limit]
+
+
+def median_time(function, rounds):
+    times = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--movies', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--rounds', type=int, default=21, help='median of this many searches per query')
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'movies':>8} {'build ms':>9} {'add us':>8} {'query':<10} {'q':<14} {'index us':>10} {'scan us':>10} "
+          f"{'matches':>8}")
+    for size in args.movies:
+        source = data.SyntheticSource(0, {'movies': size})
+        store = MovieStore(source.records('movies'))
+        started = time.perf_counter()
+        store.search('warm up')
+        build = time.perf_counter() - started
+        adds = []
+        for n in range(100):
+            movie = {"id": store.next_id(), "movieName": f"Added Movie {n}", "directorName": "Bench"}
+            started = time.perf_counter()
+            store.add(movie)
+            adds.append(time.perf_counter() - started)
+        for name, query in QUERIES:
+            indexed = median_time(lambda: store.search(query, args.limit), args.rounds)
+            scanned = median_time(lambda: scan(store.all(), query, args.limit), max(args.rounds // 7, 3))
+            matches = len(store.search(query, len(store)))
+            print(f"{size:>8} {build * 1000:>9.1f} {statistics.median(adds) * 1e6:>8.1f} {name:<10} {query:<14} "
+                  f"{indexed * 1e6:>10.1f} {scanned * 1e6:>10.1f} {matches:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Booking-rush benchmark: many clients booking overlapping seats of the same
+few showtimes at once, until every seat is sold.
+
+Each client picks 1-4 adjacent seats of a random hot showtime and books them;
+most attempts collide with another booking. Reported are attempts per second,
+the share that got a 409-style SeatConflict, and a check that no seat was
+sold twice and no ticket id repeated.
+
+In-process, against SeatInventory directly from N threads:
+
+    python benchmarks/bench_seats.py --threads 8 --showtimes 4
+
+Over HTTP, against a running mock backend (POST sendTicketDetail, one
+keep-alive connection per client thread):
+
+    python mock-backend-fixed.py --port 8080 &
+    python benchmarks/bench_seats.py --url http://127.0.0.1:8080 --threads 16
+"""
+
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+import timeit
+import urllib.parse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from mock_backend.seats import SEAT_ROWS, SeatConflict, SeatInventory  # noqa: E402
+
+
+def seat_groups(rng):
+    """Random run of 1-4 adjacent seats of one row"""
+    row, count = rng.choice(SEAT_ROWS)
+    size = rng.randint(1, min(4, count))
+    first = rng.randint(1, count - size + 1)
+    return [f'{row}{number}' for number in range(first, first + size)]
+
+
+def local_booker(inventory):
+    def book(showtime, seats):
+        try:
+            ticket_id, _ = inventory.book(showtime, seats)
+            return ticket_id
+        except SeatConflict:
+            return None
+    return book
+
+
+def http_booker(url):
+    parts = urllib.parse.urlsplit(url)
+    local = threading.local()
+
+    def book(showtime, seats):
+        if not hasattr(local, 'connection'):
+            local.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80)
+        body = json.dumps(dict(zip(('movieName', 'saloonName', 'movieDay', 'movieStartTime'), showtime),
+                               chairNumbers=' ' + ' '.join(seats), email='bench@example.com',
+                               fullName='Bench', phone='0')).encode()
+        local.connection.request('POST', '/api/movie/payments/sendTicketDetail', body,
+                                 {'Content-Type': 'application/json'})
+        response = local.connection.getresponse()
+        payload = json.loads(response.read())
+        if response.status == 409:
+            return None
+        if response.status != 200:
+            raise RuntimeError(f"{response.status}: {payload}")
+        return payload['ticketId']
+    return book
+
+
+def rush(book, showtimes, threads, seed):
+    """Book until every seat of every showtime is sold, returns stats"""
+    capacity = sum(count for _, count in SEAT_ROWS)
+    sold = {showtime: [] for showtime in showtimes}
+    tickets = []
+    attempts = [0]
+    conflicts = [0]
+    lock = threading.Lock()
+    full = set()
+
+    def client(index):
+        rng = random.Random(f'{seed}:{index}')
+        while len(full) < len(showtimes):
+            showtime = rng.choice(showtimes)
+            if showtime in full:
+                continue
+            seats = seat_groups(rng)
+            ticket_id = book(showtime, seats)
+            with lock:
+                attempts[0] += 1
+                if ticket_id is None:
+                    conflicts[0] += 1
+                    continue
+                tickets.append(ticket_id)
+                sold[showtime].extend(seats)
+                if len(sold[showtime]) == capacity:
+                    full.add(showtime)
+
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(threads)]
+    started = timeit.default_timer()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = timeit.default_timer() - started
+
+    double_sold = sum(len(seats) - len(set(seats)) for seats in sold.values())
+    return {
+        "attempts": attempts[0],
+        "conflicts": conflicts[0],
+        "seconds": elapsed,
+        "seatsSold": sum(len(seats) for seats in sold.values()),
+        "doubleSold": double_sold,
+        "duplicateTickets": len(tickets) - len(set(tickets)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--showtimes', type=int, default=4, help='hot showtimes booked at once')
+    parser.add_argument('--rounds', type=int, default=50, help='sell out the hot showtimes this many times')
+    parser.add_argument('--url', help='book through a running mock backend instead of in-process')
+    args = parser.parse_args()
+
+    book = http_booker(args.url) if args.url else local_booker(SeatInventory())
+    # A fresh movieDay per run and round, so a long-running server starts every round with an empty hall
+    run = f'bench-{time.time_ns() // 1000000}'
+    totals = {}
+    for round_no in range(args.rounds):
+        showtimes = [(f'Bench Movie {i}', 'Bench Saloon', f'{run}-{round_no}', '20:00')
+                     for i in range(args.showtimes)]
+        for key, value in rush(book, showtimes, args.threads, round_no).items():
+            totals[key] = totals.get(key, 0) + value
+
+    print(f"{'attempts':<18} {totals['attempts']:>10}")
+    print(f"{'attempts/s':<18} {totals['attempts'] / totals['seconds']:>10.0f}")
+    print(f"{'conflicts':<18} {totals['conflicts'] / totals['attempts']:>10.1%}")
+    print(f"{'seats sold':<18} {totals['seatsSold']:>10}")
+    print(f"{'double sold':<18} {totals['doubleSold']:>10}")
+    print(f"{'duplicate tickets':<18} {totals['duplicateTickets']:>10}")
+    if totals['doubleSold'] or totals['duplicateTickets']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
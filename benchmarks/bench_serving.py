@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Requests-per-second of the mock backend for each serving mode as the number
+of concurrent clients grows.
+
+Every mode gets a fresh server process. Optional "slow clients" open a
+connection, send half a request line and stall, which is what starves the
+single-threaded HTTPServer.
+
+    python benchmarks/bench_serving.py --clients 1 4 16 64 --duration 3
+    python benchmarks/bench_serving.py --modes threaded asyncio --workers 1 2 4
+"""
+
+import argparse
+import http.client
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SERVERS = {
+    'fixed': ROOT / 'mock-backend-fixed.py',
+    'legacy': ROOT / 'mock-backend.py',
+}
+
+
+def start_server(script, mode, port, extra_args=(), stdout=subprocess.DEVNULL):
+    process = subprocess.Popen(
+        [sys.executable, str(script), '--mode', mode, '--port', str(port), *extra_args],
+        cwd=str(ROOT), stdout=stdout, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('localhost', port), timeout=0.2):
+                return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError(f"Server did not start on port {port}")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def open_slow_clients(port, count):
+    sockets = []
+    for _ in range(count):
+        sock = socket.create_connection(('localhost', port))
+        sock.sendall(b'GET /api/movie/movies/displayingMovies HTTP/1.1\r\nHost: loc')
+        sockets.append(sock)
+    return sockets
+
+
+def run_clients(port, path, clients, duration):
+    counts = [0] * clients
+    errors = [0] * clients
+    stop_at = time.perf_counter() + duration
+
+    def client(index):
+        conn = http.client.HTTPConnection('localhost', port, timeout=5)
+        while time.perf_counter() < stop_at:
+            try:
+                conn.request('GET', path)
+                conn.getresponse().read()
+                counts[index] += 1
+            except (OSError, http.client.HTTPException):
+                errors[index] += 1
+                conn.close()
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return sum(counts) / elapsed, sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--server', choices=sorted(SERVERS), default='fixed')
+    parser.add_argument('--modes', nargs='+', default=['single', 'threaded', 'asyncio'])
+    parser.add_argument('--clients', nargs='+', type=int, default=[1, 4, 16, 64])
+    parser.add_argument('--workers', nargs='+', type=int, default=[1], help='worker process counts to compare')
+    parser.add_argument('--duration', type=float, default=3.0, help='seconds per measurement')
+    parser.add_argument('--slow-clients', type=int, default=0,
+                        help='stalled connections held open during each measurement')
+    parser.add_argument('--path', default='/api/movie/movies/displayingMovies')
+    parser.add_argument('--port', type=int, default=18080)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'workers':>7} {'clients':>7} {'req/s':>10} {'errors':>7}")
+    for mode in args.modes:
+        for workers in args.workers:
+            process = start_server(SERVERS[args.server], mode, args.port, ['--workers', str(workers)])
+            try:
+                for clients in args.clients:
+                    slow = open_slow_clients(args.port, args.slow_clients)
+                    try:
+                        rps, errors = run_clients(args.port, args.path, clients, args.duration)
+                    finally:
+                        for sock in slow:
+                            sock.close()
+                    print(f"{mode:<10} {workers:>7} {clients:>7} {rps:>10.0f} {errors:>7}")
+            finally:
+                stop_server(process)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark: ShowtimeStore build cost, memory and lookup latency on a
+synthetic schedule.
+
+    python benchmarks/bench_showtimes.py --showtimes 2000000 --movies 50000 --saloons 2000
+"""
+
+import argparse
+import random
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from mock_backend.data import SyntheticSource  # noqa: E402
+from mock_backend.showtimes import ShowtimeStore  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--showtimes', type=int, default=2000000)
+    parser.add_argument('--movies', type=int, default=50000)
+    parser.add_argument('--saloons', type=int, default=2000)
+    parser.add_argument('--lookups', type=int, default=20000)
+    args = parser.parse_args()
+
+    source = SyntheticSource(0, {'movies': args.movies, 'saloons': args.saloons, 'saloon_times': args.showtimes})
+    started = timeit.default_timer()
+    store = ShowtimeStore(source.records('saloon_times'))
+    build = timeit.default_timer() - started
+    # tracemalloc slows allocation-heavy code several times over: measure memory on a second build
+    del store
+    tracemalloc.start()
+    store = ShowtimeStore(source.records('saloon_times'))
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{len(store)} showtimes built in {build:.1f} s, "
+          f"{current / len(store):.1f} bytes/row kept, peak {peak / 2**20:.0f} MiB")
+
+    random.seed(3)
+    movies = [random.randint(1, args.movies) for _ in range(args.lookups)]
+    pairs = [(store.saloon_ids[row], store.movie_ids[row])
+             for row in random.sample(range(len(store)), args.lookups)]
+    dates = store.date_values
+    lookups = {
+        'movie': lambda: [store.rows_for_movie(m) for m in movies],
+        'movie + date range': lambda: [store.rows_for_movie(m, dates[2], dates[5]) for m in movies],
+        '(saloonId, movieId)': lambda: [store.rows_at(s, m) for s, m in pairs],
+        '(saloonId, movieId, date)': lambda: [store.rows_at(s, m, dates[4], dates[4]) for s, m in pairs],
+    }
+    print(f"{'lookup':<28} {'us/op':>8}")
+    for label, run in lookups.items():
+        seconds = min(timeit.repeat(run, number=1, repeat=3))
+        print(f"{label:<28} {seconds / args.lookups * 1e6:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
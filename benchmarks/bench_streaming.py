@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Building list responses item by item against json.dumps() of the whole list.
+
+For synthetic catalogs of growing size, displayingMovies of
+mock-backend-fixed.py runs in-process, once with send_json_list() and once
+with the previous send_json(), which encodes the whole list as one string.
+Reported per catalog:
+
+- ``miss ms``     building and writing the body with an empty cache, which
+                  is what the first byte waits for
+- ``rebuild ms``  the same after one movie was added; item by item, only
+                  the new movie is encoded
+- ``hit us``      a response cache hit
+- ``peak MB``     Python memory allocated at the peak of a miss, against
+                  the body size; the body stays allocated in the cache
+
+    python benchmarks/bench_streaming.py --movies 1000 10000 50000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_alloc import load_script  # noqa: E402
+
+PATH = '/api/movie/movies/displayingMovies'
+
+
+class Sink:
+    """wfile that counts bytes instead of keeping them"""
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+
+    def writelines(self, parts):
+        self.size += sum(map(len, parts))
+
+    def flush(self):
+        pass
+
+
+def run_request(handler_class, server):
+    handler = handler_class.__new__(handler_class)
+    handler.request = None
+    handler.client_address = ('127.0.0.1', 0)
+    handler.server = server
+    handler.rfile = io.BytesIO(f'GET {PATH} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+    handler.wfile = Sink()
+    handler.close_connection = True
+    handler.handle_one_request()
+    return handler.wfile.size
+
+
+def timed(function):
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+
+def peak(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def add_movie(module):
+    module.DATA.movies.add({"id": module.DATA.movies.next_id(), "movieName": "Added"})
+    module.RESPONSES.bump('movies')
+
+
+def measure(module, handler_class, server, rounds):
+    responses = module.RESPONSES
+    misses, rebuilds, hits = [], [], []
+    for _ in range(rounds):
+        responses.clear()
+        misses.append(timed(lambda: run_request(handler_class, server)))
+        hits.append(timed(lambda: run_request(handler_class, server)))
+        add_movie(module)
+        rebuilds.append(timed(lambda: run_request(handler_class, server)))
+    responses.clear()
+    # Untimed, as tracing allocations slows every call down
+    memory = peak(lambda: run_request(handler_class, server))
+    return min(misses), min(rebuilds), min(hits), memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--movies', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--rounds', type=int, default=3, help='best of this many runs')
+    args = parser.parse_args()
+
+    module = load_script('mock-backend-fixed.py')
+    handler_class = module.MockBackendHandler
+    # Plain bodies: compression would dominate the timings
+    handler_class.compressor = None
+    server = types.SimpleNamespace(idle_timeout=5.0, max_keepalive_requests=100)
+    item_by_item = handler_class.send_json_list
+
+    def whole_list(self, status, records, stored=True, envelope=None):
+        self.send_json(status, dict(envelope, data=records) if envelope else list(records))
+
+    print(f"{'movies':>8} {'body MB':>8} {'encoding':<13} {'miss ms':>9} {'rebuild ms':>11} {'hit us':>8} "
+          f"{'peak MB':>8}")
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        rows = []
+        for movies in args.movies:
+            module.DATA = module.data.DataLayer(module.data.SyntheticSource(0, {'movies': movies}))
+            module.RESPONSES.clear()
+            size = run_request(handler_class, server)
+            for name, method in (('json.dumps', whole_list), ('item by item', item_by_item)):
+                handler_class.send_json_list = method
+                rows.append((movies, size, name, *measure(module, handler_class, server, args.rounds)))
+        handler_class.send_json_list = item_by_item
+    for movies, size, name, miss, rebuild, hit, memory in rows:
+        print(f"{movies:>8} {size / 1e6:>8.2f} {name:<13} {miss * 1000:>9.1f} {rebuild * 1000:>11.1f} "
+              f"{hit * 1e6:>8.1f} {memory / 1e6:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
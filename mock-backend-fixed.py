@@ -5,11 +5,19 @@ Mock Backend Server for CineVision Frontend
 Runs on port 8080 to serve mock movie data
 """
 
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import json
+import signal
+import sys
 import urllib.parse as urlparse
 import time
 
+from mock_backend import auth, cache, capture, compression, data, events, faults, log, serving, users, workers
+from mock_backend.body import JSON_BACKEND, BodyError
+from mock_backend.handler import KeepAliveRequestHandler
+from mock_backend.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, RequestMetrics
+from mock_backend.routing import Router
+from mock_backend.seats import SeatConflict, SeatInventory, showtime_key
+from mock_backend.streaming import encode_item, encode_list, encode_object
+
 # Mock data
 MOCK_MOVIES = [
     {
@@ -174,7 +182,252 @@ MOCK_MOVIES = [
     }
 ]
 
-class MockBackendHandler(BaseHTTPRequestHandler):
+MOCK_COMING_SOON = [
+    {
+        "id": 4,
+        "movieId": 4,
+        "movieName": "Guardians of the Galaxy Vol. 3",
+        "moviePoster": "https://image.tmdb.org/t/p/w500/r2J02Z2OpNTctfOSN1Ydgii51I3.jpg",
+        "movieImageUrl": "https://image.tmdb.org/t/p/w500/r2J02Z2OpNTctfOSN1Ydgii51I3.jpg",
+        "description": "Peter Quill, still reeling from the loss of Gamora, must rally his team around him to defend the universe along with protecting one of their own.",
+        "movieDescription": "Peter Quill, still reeling from the loss of Gamora, must rally his team around him to defend the universe along with protecting one of their own.",
+        "movieTrailerUrl": "https://www.youtube.com/embed/JqcncLPi9zw?autoplay=0",
+        "movieTrailer": "https://www.youtube.com/embed/JqcncLPi9zw?autoplay=0",
+        "directorName": "James Gunn",
+        "movieDirector": "James Gunn",
+        "releaseDate": "2026-05-05",
+        "movieReleaseDate": "2026-05-05",
+        "duration": 150,
+        "movieDuration": 150,
+        "categoryName": "Action, Adventure, Comedy",
+        "movieCategory": "Action, Adventure, Comedy",
+        "rating": 8.0
+    },
+    {
+        "id": 7,
+        "movieId": 7,
+        "movieName": "Deadpool 3",
+        "moviePoster": "https://image.tmdb.org/t/p/w500/8cdWjvZQUExUUTzyp4t6EDMubfO.jpg",
+        "movieImageUrl": "https://image.tmdb.org/t/p/w500/8cdWjvZQUExUUTzyp4t6EDMubfO.jpg",
+        "description": "Wade Wilson's world is about to change. Marvel Studios presents Deadpool & Wolverine - an epic team-up featuring everyone's favorite regenerating degenerate.",
+        "movieDescription": "Wade Wilson's world is about to change. Marvel Studios presents Deadpool & Wolverine - an epic team-up featuring everyone's favorite regenerating degenerate.",
+        "movieTrailerUrl": "https://www.youtube.com/embed/73_1biulkYk?autoplay=0",
+        "movieTrailer": "https://www.youtube.com/embed/73_1biulkYk?autoplay=0",
+        "directorName": "Shawn Levy",
+        "movieDirector": "Shawn Levy",
+        "releaseDate": "2026-07-26",
+        "movieReleaseDate": "2026-07-26",
+        "duration": 128,
+        "movieDuration": 128,
+        "categoryName": "Action, Comedy, Superhero",
+        "movieCategory": "Action, Comedy, Superhero",
+        "rating": 8.1
+    },
+    {
+        "id": 8,
+        "movieId": 8,
+        "movieName": "Avatar 3",
+        "moviePoster": "https://image.tmdb.org/t/p/w500/t6HIqrRAclMCA60NsSmeqe9RmNV.jpg",
+        "movieImageUrl": "https://image.tmdb.org/t/p/w500/t6HIqrRAclMCA60NsSmeqe9RmNV.jpg",
+        "description": "The third installment in James Cameron's Avatar saga continues the story of Jake Sully and his family on Pandora.",
+        "movieDescription": "The third installment in James Cameron's Avatar saga continues the story of Jake Sully and his family on Pandora.",
+        "movieTrailerUrl": "https://www.youtube.com/embed/d9MyW72ELq0?autoplay=0",
+        "movieTrailer": "https://www.youtube.com/embed/d9MyW72ELq0?autoplay=0",
+        "directorName": "James Cameron",
+        "movieDirector": "James Cameron",
+        "releaseDate": "2026-12-20",
+        "movieReleaseDate": "2026-12-20",
+        "duration": 180,
+        "movieDuration": 180,
+        "categoryName": "Action, Adventure, Sci-Fi",
+        "movieCategory": "Action, Adventure, Sci-Fi",
+        "rating": 8.2
+    }
+]
+
+MOCK_CITIES = [
+    {"cityId": 1, "cityName": "Hà Nội"},
+    {"cityId": 2, "cityName": "Hồ Chí Minh"},
+    {"cityId": 3, "cityName": "Đà Nẵng"}
+]
+
+MOCK_SALOONS = [
+    {"saloonId": 1, "saloonName": "CGV Vincom Center", "cityId": 1},
+    {"saloonId": 2, "saloonName": "Galaxy Cinema", "cityId": 1},
+    {"saloonId": 3, "saloonName": "Lotte Cinema", "cityId": 2},
+    {"saloonId": 4, "saloonName": "BHD Star Cineplex", "cityId": 2},
+    {"saloonId": 5, "saloonName": "Cinestar Cinema", "cityId": 3}
+]
+
+MOCK_ACTORS = [
+    {"id": 1, "name": "Robert Downey Jr.", "actorName": "Robert Downey Jr."},
+    {"id": 2, "name": "Chris Evans", "actorName": "Chris Evans"},
+    {"id": 3, "name": "Scarlett Johansson", "actorName": "Scarlett Johansson"},
+    {"id": 4, "name": "Tom Holland", "actorName": "Tom Holland"},
+    {"id": 5, "name": "Robert Pattinson", "actorName": "Robert Pattinson"}
+]
+
+MOCK_CATEGORIES = [
+    {"id": 1, "name": "Action", "categoryName": "Action"},
+    {"id": 2, "name": "Comedy", "categoryName": "Comedy"},
+    {"id": 3, "name": "Drama", "categoryName": "Drama"},
+    {"id": 4, "name": "Sci-Fi", "categoryName": "Sci-Fi"},
+    {"id": 5, "name": "Horror", "categoryName": "Horror"}
+]
+
+MOCK_DIRECTORS = [
+    {"id": 1, "name": "Anthony Russo", "directorName": "Anthony Russo"},
+    {"id": 2, "name": "Joe Russo", "directorName": "Joe Russo"},
+    {"id": 3, "name": "Jon Watts", "directorName": "Jon Watts"},
+    {"id": 4, "name": "Matt Reeves", "directorName": "Matt Reeves"},
+    {"id": 5, "name": "Christopher Nolan", "directorName": "Christopher Nolan"}
+]
+
+# Cast, comments and showtimes below are repeated for every built-in movie
+MOCK_MOVIE_ACTORS = [
+    {"id": 1, "name": "Robert Downey Jr.", "character": "Tony Stark / Iron Man"},
+    {"id": 2, "name": "Chris Evans", "character": "Steve Rogers / Captain America"},
+    {"id": 3, "name": "Scarlett Johansson", "character": "Natasha Romanoff / Black Widow"}
+]
+
+MOCK_COMMENTS = [
+    {
+        "commentText": "Phim tuyệt vời! Rất khuyến khích xem.",
+        "commentBy": "Nguyễn Văn An",
+        "commentByUserId": "user_an",
+        "createdAt": "2023-10-01"
+    },
+    {
+        "commentText": "Hiệu ứng hình ảnh và cốt truyện tuyệt vời.",
+        "commentBy": "Trần Thị Bình",
+        "commentByUserId": "user_binh",
+        "createdAt": "2023-10-02"
+    },
+    {
+        "commentText": "Phim hay, diễn viên diễn xuất rất tốt!",
+        "commentBy": "Lê Minh Châu",
+        "commentByUserId": "user_chau",
+        "createdAt": "2023-10-03"
+    },
+    {
+        "commentText": "Cảnh hành động kịch tính, đáng xem.",
+        "commentBy": "Phạm Thu Dung",
+        "commentByUserId": "user_dung",
+        "createdAt": "2023-10-04"
+    }
+]
+
+MOCK_SHOWTIME_DATE = "2025-10-30"
+MOCK_BEGIN_TIMES = ["10:00", "13:00", "16:00", "19:00", "22:00"]
+
+def builtin_source():
+    """The sample data above as a data source, per-movie lists expanded to every movie"""
+    movie_ids = sorted({m['id'] for m in MOCK_MOVIES + MOCK_COMING_SOON})
+    saloon_times = []
+    for movie_id in movie_ids:
+        for saloon in MOCK_SALOONS:
+            for begin_time in MOCK_BEGIN_TIMES:
+                saloon_times.append({"id": len(saloon_times) + 1, "movieId": movie_id,
+                                     "saloonId": saloon['saloonId'], "movieDate": MOCK_SHOWTIME_DATE,
+                                     "movieBeginTime": begin_time})
+    return data.MemorySource({
+        'movies': MOCK_MOVIES,
+        'coming_soon': MOCK_COMING_SOON,
+        'cities': MOCK_CITIES,
+        'saloons': MOCK_SALOONS,
+        'actors': MOCK_ACTORS,
+        'directors': MOCK_DIRECTORS,
+        'categories': MOCK_CATEGORIES,
+        'movie_actors': [dict(actor, movieId=movie_id) for movie_id in movie_ids for actor in MOCK_MOVIE_ACTORS],
+        'comments': [dict(comment, movieId=movie_id, commentId=comment_id)
+                     for comment_id, (movie_id, comment) in enumerate(
+                         ((movie_id, comment) for movie_id in movie_ids for comment in MOCK_COMMENTS), 1)],
+        'saloon_times': saloon_times,
+    })
+
+# Every route reads from DATA; run_server() replaces it when --data or
+# --synthetic is given
+DATA = data.DataLayer(builtin_source())
+
+ROUTES = Router()
+# POST routes may lower the --max-body-size limit with max_body=BYTES
+AUTH_MAX_BODY = 16 * 1024
+# Keys of the movie detail object, the requests the movie page made one by one
+DETAIL_PARTS = ('movie', 'actors', 'cities', 'saloonTimes', 'commentCount', 'comments')
+DETAIL_DATASETS = ('movies', 'actors', 'cities', 'saloon_times', 'comments')
+# Query parameters of the routes narrowing their results to a date range
+DATE_QUERY = ('date', 'from', 'to')
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+# Login signs tokens with it and routes registered with auth=ROLE verify
+# them; run_server applies the --jwt-* options
+TOKENS = auth.TokenSigner()
+# GET routes registered with cache=(datasets) are answered from here until
+# one of those datasets is bumped by a mutation; their query=(names) are the
+# query parameters that go into the key. run_server applies --response-cache-size
+RESPONSES = cache.ResponseCache()
+
+# Every mutation of DATA and SEATS runs in STATE.mutation(); with --workers
+# the changes are replayed into the other worker processes
+STATE = workers.SharedState()
+
+# Sold and held chairs of every showtime booked through the payment routes
+SEATS = SeatInventory(on_change=lambda change: STATE.record('seats', change))
+STATE.register('seats', SEATS.apply)
+
+def _movie_added(movie):
+    DATA.movies.add(movie)
+    RESPONSES.bump('movies')
+
+def _director_added(director):
+    DATA.add_director(director)
+    RESPONSES.bump('directors')
+
+def _comment_added(comment):
+    DATA.comments.restore(comment)
+    RESPONSES.bump('comments')
+
+def _comment_deleted(comment_id):
+    DATA.comments.delete(comment_id)
+    RESPONSES.bump('comments')
+
+STATE.register('movies.add', _movie_added)
+STATE.register('directors.add', _director_added)
+STATE.register('comments.add', _comment_added)
+STATE.register('comments.delete', _comment_deleted)
+
+# Registered users; run_server applies the --pbkdf2-iterations and
+# --hash-threads options, then seeds the admin account
+USERS = users.UserStore()
+STATE.register('users.add', USERS.add)
+
+def seed_users():
+    """Add the admin account, its password hashed with the iterations USERS is set to"""
+    if USERS.by_email("admin@cinevision.com") is None:
+        USERS.add(users.user_record("ADMIN_001", "admin@cinevision.com", "Administrator",
+                                    users.hash_password("admin123", USERS.iterations), roles=["ADMIN"]))
+
+# Ticket emails of sendTicketDetail, batched into a topic and rendered by a
+# consumer thread; run_server applies the --outbox and --events-* options
+EMAILS = events.EmailPipeline()
+
+# Per-route request counters and latency histograms, scraped from /metrics
+METRICS = RequestMetrics()
+
+# Recorder (--record) or Replayer (--replay) consulted before the routes
+# registered without local=True; None otherwise
+CAPTURE = None
+
+# Latency and fault profiles; run_server loads --faults, /admin/faults switches them
+FAULTS = faults.FaultInjector()
+STATE.register('faults', lambda request: FAULTS.configure(request))
+
+class MockBackendHandler(KeepAliveRequestHandler):
+    metrics = METRICS
+    faults = FAULTS
+    # gzip (br/zstd when installed) for bodies of 1 KB and up; run_server applies the options
+    compressor = compression.Compressor()
+
     def log_message(self, format, *args):
         """Suppress default request logging"""
         return
@@ -186,755 +439,823 @@ class MockBackendHandler(BaseHTTPRequestHandler):
             self.send_header('Access-Control-Allow-Origin', '*')
             self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
             self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+            self.send_header('Content-Length', '0')
             self.end_headers()
         except (ConnectionAbortedError, BrokenPipeError):
-            print("🔌 Client disconnected during OPTIONS")
+            self.log_event(log.DEBUG, 'Client disconnected during OPTIONS')
             return
 
     def do_GET(self):
         """Handle GET requests"""
         try:
-            path = self.path
-            print(f"📥 GET request to: {path}")
-            
-            if path == '/api/movie/movies/displayingMovies':
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(MOCK_MOVIES)
-                self.wfile.write(response.encode())
-                print("✅ Served displaying movies")
-                
-            elif path == '/api/movie/movies/comingSoonMovies':
-                # Coming soon movies - with complete movie data for detail pages
-                coming_soon = [
-                    {
-                        "id": 4,
-                        "movieId": 4,
-                        "movieName": "Guardians of the Galaxy Vol. 3",
-                        "moviePoster": "https://image.tmdb.org/t/p/w500/r2J02Z2OpNTctfOSN1Ydgii51I3.jpg",
-                        "movieImageUrl": "https://image.tmdb.org/t/p/w500/r2J02Z2OpNTctfOSN1Ydgii51I3.jpg",
-                        "description": "Peter Quill, still reeling from the loss of Gamora, must rally his team around him to defend the universe along with protecting one of their own.",
-                        "movieDescription": "Peter Quill, still reeling from the loss of Gamora, must rally his team around him to defend the universe along with protecting one of their own.",
-                        "movieTrailerUrl": "https://www.youtube.com/embed/JqcncLPi9zw?autoplay=0",
-                        "movieTrailer": "https://www.youtube.com/embed/JqcncLPi9zw?autoplay=0",
-                        "directorName": "James Gunn",
-                        "movieDirector": "James Gunn",
-                        "releaseDate": "2026-05-05",
-                        "movieReleaseDate": "2026-05-05",
-                        "duration": 150,
-                        "movieDuration": 150,
-                        "categoryName": "Action, Adventure, Comedy",
-                        "movieCategory": "Action, Adventure, Comedy",
-                        "rating": 8.0
-                    },
-                    {
-                        "id": 7,
-                        "movieId": 7,
-                        "movieName": "Deadpool 3",
-                        "moviePoster": "https://image.tmdb.org/t/p/w500/8cdWjvZQUExUUTzyp4t6EDMubfO.jpg",
-                        "movieImageUrl": "https://image.tmdb.org/t/p/w500/8cdWjvZQUExUUTzyp4t6EDMubfO.jpg",
-                        "description": "Wade Wilson's world is about to change. Marvel Studios presents Deadpool & Wolverine - an epic team-up featuring everyone's favorite regenerating degenerate.",
-                        "movieDescription": "Wade Wilson's world is about to change. Marvel Studios presents Deadpool & Wolverine - an epic team-up featuring everyone's favorite regenerating degenerate.",
-                        "movieTrailerUrl": "https://www.youtube.com/embed/73_1biulkYk?autoplay=0",
-                        "movieTrailer": "https://www.youtube.com/embed/73_1biulkYk?autoplay=0",
-                        "directorName": "Shawn Levy",
-                        "movieDirector": "Shawn Levy",
-                        "releaseDate": "2026-07-26",
-                        "movieReleaseDate": "2026-07-26",
-                        "duration": 128,
-                        "movieDuration": 128,
-                        "categoryName": "Action, Comedy, Superhero",
-                        "movieCategory": "Action, Comedy, Superhero",
-                        "rating": 8.1
-                    },
-                    {
-                        "id": 8,
-                        "movieId": 8,
-                        "movieName": "Avatar 3",
-                        "moviePoster": "https://image.tmdb.org/t/p/w500/t6HIqrRAclMCA60NsSmeqe9RmNV.jpg",
-                        "movieImageUrl": "https://image.tmdb.org/t/p/w500/t6HIqrRAclMCA60NsSmeqe9RmNV.jpg",
-                        "description": "The third installment in James Cameron's Avatar saga continues the story of Jake Sully and his family on Pandora.",
-                        "movieDescription": "The third installment in James Cameron's Avatar saga continues the story of Jake Sully and his family on Pandora.",
-                        "movieTrailerUrl": "https://www.youtube.com/embed/d9MyW72ELq0?autoplay=0",
-                        "movieTrailer": "https://www.youtube.com/embed/d9MyW72ELq0?autoplay=0",
-                        "directorName": "James Cameron",
-                        "movieDirector": "James Cameron",
-                        "releaseDate": "2026-12-20",
-                        "movieReleaseDate": "2026-12-20",
-                        "duration": 180,
-                        "movieDuration": 180,
-                        "categoryName": "Action, Adventure, Sci-Fi",
-                        "movieCategory": "Action, Adventure, Sci-Fi",
-                        "rating": 8.2
-                    }
-                ]
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(coming_soon)
-                self.wfile.write(response.encode())
-                print("✅ Served coming soon movies")
-                
-            elif path.startswith('/api/movie/movies/') and path.split('/')[-1].isdigit():
-                # Get specific movie by ID
-                movie_id = int(path.split('/')[-1])
-                movie = next((m for m in MOCK_MOVIES if m['id'] == movie_id), None)
-                
-                if movie:
-                    self.send_response(200)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    response = json.dumps(movie)
-                    self.wfile.write(response.encode())
-                    print(f"✅ Served movie {movie_id}")
-                else:
-                    self.send_response(404)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    self.wfile.write(b'{"error": "Movie not found"}')
-                    print(f"❌ Movie {movie_id} not found")
-            
-            elif path.startswith('/api/movie/saloons/getByCityId/') or path.startswith('/api/movie/saloons/getSaloonsByCityId/'):
-                # Get saloons by city ID (support both endpoint formats)
-                city_id = None
-                if '/getByCityId/' in path:
-                    city_id = path.split('/getByCityId/')[-1]
-                elif '/getSaloonsByCityId/' in path:
-                    city_id = path.split('/getSaloonsByCityId/')[-1]
-                
-                # Mock saloons based on city ID
-                all_saloons = [
-                    {"saloonId": 1, "saloonName": "CGV Vincom Center", "cityId": 1},
-                    {"saloonId": 2, "saloonName": "Galaxy Cinema", "cityId": 1}, 
-                    {"saloonId": 3, "saloonName": "Lotte Cinema", "cityId": 2},
-                    {"saloonId": 4, "saloonName": "BHD Star Cineplex", "cityId": 2},
-                    {"saloonId": 5, "saloonName": "Cinestar Cinema", "cityId": 3}
-                ]
-                
-                # Filter by city ID if provided
-                if city_id and city_id.isdigit():
-                    city_id = int(city_id)
-                    filtered_saloons = [s for s in all_saloons if s['cityId'] == city_id]
-                    mock_saloons = filtered_saloons if filtered_saloons else all_saloons[:2]  # Fallback
-                else:
-                    mock_saloons = all_saloons[:3]  # Default saloons
-                
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(mock_saloons)
-                self.wfile.write(response.encode())
-                print(f"✅ Served saloons for city {city_id}")
-            
-            elif path == '/api/movie/saloons/getall':
-                # Get all saloons
-                mock_saloons = [
-                    {"saloonId": 1, "saloonName": "CGV Vincom Center", "cityId": 1},
-                    {"saloonId": 2, "saloonName": "Galaxy Cinema", "cityId": 1},
-                    {"saloonId": 3, "saloonName": "Lotte Cinema", "cityId": 2}
-                ]
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(mock_saloons)
-                self.wfile.write(response.encode())
-                print("✅ Served all saloons")
-                
-            elif path == '/api/movie/cities/getall':
-                # Get all cities
-                mock_cities = [
-                    {"cityId": 1, "cityName": "Hà Nội"},
-                    {"cityId": 2, "cityName": "Hồ Chí Minh"},
-                    {"cityId": 3, "cityName": "Đà Nẵng"}
-                ]
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(mock_cities)
-                self.wfile.write(response.encode())
-                print("✅ Served all cities")
-                
-            elif path.startswith('/api/movie/comments/getCountOfComments/'):
-                # Get comment count - mock data
-                mock_count = {"count": 5}
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(mock_count)
-                self.wfile.write(response.encode())
-                print("✅ Served comment count")
-                
-            elif '/api/movie/comments/getCommentsByMovieId/' in path:
-                # Get comments by movie ID - mock comments
-                mock_comments = [
-                    {
-                        "id": 1,
-                        "content": "Phim tuyệt vời! Rất khuyến khích xem.",
-                        "user": {"name": "Nguyễn Văn An"},
-                        "createdAt": "2023-10-01"
-                    },
-                    {
-                        "id": 2,
-                        "content": "Hiệu ứng hình ảnh và cốt truyện tuyệt vời.",
-                        "user": {"name": "Trần Thị Bình"},
-                        "createdAt": "2023-10-02"
-                    },
-                    {
-                        "id": 3,
-                        "content": "Phim hay, diễn viên diễn xuất rất tốt!",
-                        "user": {"name": "Lê Minh Châu"},
-                        "createdAt": "2023-10-03"
-                    },
-                    {
-                        "id": 4,
-                        "content": "Cảnh hành động kịch tính, đáng xem.",
-                        "user": {"name": "Phạm Thu Dung"},
-                        "createdAt": "2023-10-04"
-                    }
-                ]
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(mock_comments)
-                self.wfile.write(response.encode())
-                print("✅ Served comments")
-            
-            elif path.startswith('/api/movie/saloonTimes/getSaloonTimesByMovieId/'):
-                # Get saloon times by movie ID - mock showtime data
-                mock_saloon_times = [
-                    {
-                        "id": 1,
-                        "movieBeginTime": "14:00",
-                        "movieDate": "2025-10-30",
-                        "movieId": 1,
-                        "saloonId": 1,
-                        "saloon": {"saloonName": "CGV Vincom Center"}
-                    },
-                    {
-                        "id": 2,
-                        "movieBeginTime": "16:30",
-                        "movieDate": "2025-10-30",
-                        "movieId": 1,
-                        "saloonId": 1,
-                        "saloon": {"saloonName": "CGV Vincom Center"}
-                    },
-                    {
-                        "id": 3,
-                        "movieBeginTime": "19:00",
-                        "movieDate": "2025-10-30",
-                        "movieId": 1,
-                        "saloonId": 2,
-                        "saloon": {"saloonName": "Galaxy Cinema"}
-                    }
-                ]
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(mock_saloon_times)
-                self.wfile.write(response.encode())
-                print("✅ Served saloon times")
-                
-            elif path.startswith('/api/movie/actors/getActorsByMovieId/'):
-                # Get actors by movie ID - mock actors data
-                mock_actors = [
-                    {"id": 1, "name": "Robert Downey Jr.", "character": "Tony Stark / Iron Man"},
-                    {"id": 2, "name": "Chris Evans", "character": "Steve Rogers / Captain America"},
-                    {"id": 3, "name": "Scarlett Johansson", "character": "Natasha Romanoff / Black Widow"}
-                ]
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(mock_actors)
-                self.wfile.write(response.encode())
-                print("✅ Served actors")
-                
-            elif path.startswith('/api/movie/cities/getCitiesByMovieId/'):
-                # Get cities by movie ID - mock cities for movie
-                mock_movie_cities = [
-                    {"cityId": 1, "cityName": "Hà Nội"},
-                    {"cityId": 2, "cityName": "Hồ Chí Minh"}
-                ]
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(mock_movie_cities)
-                self.wfile.write(response.encode())
-                print("✅ Served cities for movie")
-                
-            elif path == '/health':
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps({"status": "OK", "message": "Mock Backend đang hoạt động"})
-                self.wfile.write(response.encode())
-                print("✅ Health check")
-                
-            elif path.startswith('/api/movie/saloonTimes/getMovieSaloonTimeSaloonAndMovieId/'):
-                # Get movie saloon times by saloonId and movieId
-                # Extract saloonId and movieId from path
-                path_parts = path.split('/')
-                if len(path_parts) >= 6:
-                    saloon_id = path_parts[-2]
-                    movie_id = path_parts[-1]
-                    
-                    mock_saloon_times = [
-                        {"movieBeginTime": "10:00", "saloonId": int(saloon_id), "movieId": int(movie_id)},
-                        {"movieBeginTime": "13:00", "saloonId": int(saloon_id), "movieId": int(movie_id)},
-                        {"movieBeginTime": "16:00", "saloonId": int(saloon_id), "movieId": int(movie_id)},
-                        {"movieBeginTime": "19:00", "saloonId": int(saloon_id), "movieId": int(movie_id)},
-                        {"movieBeginTime": "22:00", "saloonId": int(saloon_id), "movieId": int(movie_id)}
-                    ]
-                else:
-                    mock_saloon_times = []
-                    
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(mock_saloon_times)
-                self.wfile.write(response.encode())
-                print(f"✅ Served saloon times for saloon {saloon_id} movie {movie_id}")
-                
-            # Admin endpoints
-            elif path == '/api/movie/actors/getall':
-                mock_actors = [
-                    {"id": 1, "name": "Robert Downey Jr.", "actorName": "Robert Downey Jr."},
-                    {"id": 2, "name": "Chris Evans", "actorName": "Chris Evans"},
-                    {"id": 3, "name": "Scarlett Johansson", "actorName": "Scarlett Johansson"},
-                    {"id": 4, "name": "Tom Holland", "actorName": "Tom Holland"},
-                    {"id": 5, "name": "Robert Pattinson", "actorName": "Robert Pattinson"}
-                ]
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps({"success": True, "data": mock_actors})
-                self.wfile.write(response.encode())
-                print("✅ Served all actors")
-                
-            elif path == '/api/movie/categories/getall':
-                mock_categories = [
-                    {"id": 1, "name": "Action", "categoryName": "Action"},
-                    {"id": 2, "name": "Comedy", "categoryName": "Comedy"},
-                    {"id": 3, "name": "Drama", "categoryName": "Drama"},
-                    {"id": 4, "name": "Sci-Fi", "categoryName": "Sci-Fi"},
-                    {"id": 5, "name": "Horror", "categoryName": "Horror"}
-                ]
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps({"success": True, "data": mock_categories})
-                self.wfile.write(response.encode())
-                print("✅ Served all categories")
-                
-            elif path == '/api/movie/directors/getall':
-                mock_directors = [
-                    {"id": 1, "name": "Anthony Russo", "directorName": "Anthony Russo"},
-                    {"id": 2, "name": "Joe Russo", "directorName": "Joe Russo"},
-                    {"id": 3, "name": "Jon Watts", "directorName": "Jon Watts"},
-                    {"id": 4, "name": "Matt Reeves", "directorName": "Matt Reeves"},
-                    {"id": 5, "name": "Christopher Nolan", "directorName": "Christopher Nolan"}
-                ]
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps({"success": True, "data": mock_directors})
-                self.wfile.write(response.encode())
-                print("✅ Served all directors")
-                
-            else:
-                self.send_response(404)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                self.wfile.write(b'{"error": "Endpoint not found"}')
-                print(f"❌ Unknown endpoint: {path}")
-                
+            url = urlparse.urlsplit(self.path)
+            path = url.path
+
+            STATE.sync()
+            route, params = ROUTES.resolve('GET', path)
+            if CAPTURE is not None and not (route and route.options.get('local')) and CAPTURE.handle(self, route):
+                return
+            if route is None:
+                self.send_body(404, b'{"error": "Endpoint not found"}')
+                self.log_event(log.WARNING, 'Unknown endpoint', path=path)
+                return
+            self.begin_route(route.template)
+            if route.options.get('faults', True) and self.inject_faults(route.template):
+                return
+            datasets = route.options.get('cache')
+            if datasets and self.serve_cached(RESPONSES, cache_key(route, params, url.query), datasets):
+                return
+            route.handler(self, params)
+
         except ConnectionAbortedError:
-            print("🔌 Client disconnected")
+            self.log_event(log.DEBUG, 'Client disconnected')
             return
         except BrokenPipeError:
-            print("🔧 Broken pipe")
+            self.log_event(log.DEBUG, 'Broken pipe')
             return
         except Exception as e:
             try:
-                self.send_response(500)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                error_response = json.dumps({"error": str(e)})
-                self.wfile.write(error_response.encode())
-                print(f"💥 Error: {e}")
+                self.send_json(500, {"error": str(e)})
+                self.log_event(log.ERROR, 'GET failed', exc_info=True)
             except (ConnectionAbortedError, BrokenPipeError):
-                print("🔌 Client disconnected during error response")
+                self.log_event(log.DEBUG, 'Client disconnected during error response')
                 return
 
     def do_POST(self):
         """Handle POST requests"""
         try:
-            path = self.path
-            print(f"📥 POST request to: {path}")
-            
-            if path == '/api/movie/payments/sendTicketDetail':
-                # Get the content length and read the request body
-                content_length = int(self.headers['Content-Length'])
-                post_data = self.rfile.read(content_length)
-                
-                try:
-                    # Parse the JSON data
-                    ticket_data = json.loads(post_data.decode('utf-8'))
-                    print(f"🎫 Received ticket data: {ticket_data}")
-                    
-                    # Mock successful payment response
-                    payment_response = {
-                        "success": True,
-                        "message": "Đặt vé thành công!",
-                        "ticketId": "TK" + str(int(time.time())),
-                        "bookingDetails": {
-                            "movieTitle": ticket_data.get("movieTitle", "Unknown Movie"),
-                            "seats": ticket_data.get("chairNumbers", []),
-                            "totalPrice": ticket_data.get("totalPrice", 0),
-                            "bookingTime": time.strftime("%Y-%m-%d %H:%M:%S")
-                        }
-                    }
-                    
-                    self.send_response(200)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    response = json.dumps(payment_response)
-                    self.wfile.write(response.encode())
-                    print("✅ Payment processed successfully")
-                    
-                except json.JSONDecodeError:
-                    self.send_response(400)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    error_response = json.dumps({"error": "Invalid JSON data"})
-                    self.wfile.write(error_response.encode())
-                    print("❌ Invalid JSON in payment request")
-                    
-            elif path == '/api/user/users/add':
-                # User registration endpoint
-                content_length = int(self.headers['Content-Length'])
-                post_data = self.rfile.read(content_length)
-                
-                try:
-                    # Parse the JSON data
-                    user_data = json.loads(post_data.decode('utf-8'))
-                    print(f"👤 Received user registration: {user_data}")
-                    
-                    # Mock successful registration response
-                    registration_response = {
-                        "success": True,
-                        "message": "Đăng ký người dùng thành công!",
-                        "userId": "USER" + str(int(time.time())),
-                        "userDetails": {
-                            "email": user_data.get("email", ""),
-                            "name": user_data.get("name", ""),
-                            "registeredAt": time.strftime("%Y-%m-%d %H:%M:%S")
-                        }
-                    }
-                    
-                    self.send_response(200)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    response = json.dumps(registration_response)
-                    self.wfile.write(response.encode())
-                    print("✅ User registered successfully")
-                    
-                except json.JSONDecodeError:
-                    self.send_response(400)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    error_response = json.dumps({"error": "Invalid JSON data"})
-                    self.wfile.write(error_response.encode())
-                    print("❌ Invalid JSON in registration request")
-                    
-            elif path == '/api/user/auth/login':
-                # User login endpoint
-                content_length = int(self.headers['Content-Length'])
-                post_data = self.rfile.read(content_length)
-                
-                try:
-                    # Parse the JSON data
-                    login_data = json.loads(post_data.decode('utf-8'))
-                    print(f"🔐 Received login attempt: {login_data}")
-                    
-                    # Mock successful login response with admin check
-                    user_email = login_data.get("email", "")
-                    user_password = login_data.get("password", "")
-                    user_id = "USER_" + str(int(time.time()))
-                    user_name = user_email.split('@')[0] if '@' in user_email else "Demo User"
-                    
-                    # Check for admin credentials
-                    if user_email == "admin@cinevision.com" and user_password == "admin123":
-                        user_roles = ["ADMIN"]
-                        user_name = "Administrator"
-                        user_id = "ADMIN_001"
-                    else:
-                        user_roles = ["User"]
-                    
-                    login_response = {
-                        "success": True,
-                        "message": "Đăng nhập thành công!",
-                        "token": "mock_jwt_token_" + str(int(time.time())),
-                        "userId": user_id,
-                        "email": user_email,
-                        "fullName": user_name,
-                        "name": user_name,
-                        "roles": user_roles,
-                        "user": {
-                            "email": user_email,
-                            "name": user_name,
-                            "role": user_roles[0].lower(),
-                            "userId": user_id,
-                            "loginTime": time.strftime("%Y-%m-%d %H:%M:%S")
-                        }
-                    }
-                    
-                    self.send_response(200)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    response = json.dumps(login_response)
-                    self.wfile.write(response.encode())
-                    print("✅ User logged in successfully")
-                    
-                except json.JSONDecodeError:
-                    self.send_response(400)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    error_response = json.dumps({"error": "Invalid JSON data"})
-                    self.wfile.write(error_response.encode())
-                    print("❌ Invalid JSON in login request")
-                    
-            elif path == '/api/movie/comments/add':
-                # Add comment endpoint
-                content_length = int(self.headers['Content-Length'])
-                post_data = self.rfile.read(content_length)
-                
-                try:
-                    # Parse the JSON data
-                    comment_data = json.loads(post_data.decode('utf-8'))
-                    print(f"💬 Received comment: {comment_data}")
-                    
-                    # Mock new comment response
-                    new_comment = {
-                        "commentId": "COMMENT" + str(int(time.time())),
-                        "commentText": comment_data.get("commentText", ""),
-                        "commentBy": comment_data.get("commentBy", "Khách ẩn danh"),
-                        "commentByUserId": comment_data.get("commentByUserId", ""),
-                        "movieId": comment_data.get("movieId", ""),
-                        "createdAt": time.strftime("%Y-%m-%d %H:%M:%S")
-                    }
-                    
-                    self.send_response(200)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    response = json.dumps(new_comment)
-                    self.wfile.write(response.encode())
-                    print("✅ Comment added successfully")
-                    
-                except json.JSONDecodeError:
-                    self.send_response(400)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    error_response = json.dumps({"error": "Invalid JSON data"})
-                    self.wfile.write(error_response.encode())
-                    print("❌ Invalid JSON in comment request")
-                    
-            elif path == '/api/movie/comments/delete':
-                # Delete comment endpoint
-                content_length = int(self.headers['Content-Length'])
-                post_data = self.rfile.read(content_length)
-                
-                try:
-                    # Parse the JSON data
-                    delete_data = json.loads(post_data.decode('utf-8'))
-                    print(f"🗑️ Deleting comment: {delete_data}")
-                    
-                    # Mock successful deletion response
-                    delete_response = {
-                        "success": True,
-                        "message": "Xóa bình luận thành công!",
-                        "deletedCommentId": delete_data.get("commentId", "")
-                    }
-                    
-                    self.send_response(200)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    response = json.dumps(delete_response)
-                    self.wfile.write(response.encode())
-                    print("✅ Comment deleted successfully")
-                    
-                except json.JSONDecodeError:
-                    self.send_response(400)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    error_response = json.dumps({"error": "Invalid JSON data"})
-                    self.wfile.write(error_response.encode())
-                    print("❌ Invalid JSON in delete comment request")
-                    
-            elif path == '/api/movie/movies/add':
-                # Handle movie addition by admin
-                content_length = int(self.headers['Content-Length'])
-                post_data = self.rfile.read(content_length)
-                
-                try:
-                    movie_data = json.loads(post_data.decode('utf-8'))
-                    print(f"🎬 Received movie addition: {movie_data}")
-                    
-                    # Mock successful movie addition response
-                    new_movie_id = len(MOCK_MOVIES) + 1
-                    add_response = {
-                        "success": True,
-                        "message": "Thêm phim thành công!",
-                        "movieId": new_movie_id,
-                        "data": {
-                            "id": new_movie_id,
-                            "movieId": new_movie_id,
-                            "movieName": movie_data.get("movieName", "New Movie"),
-                            "addedAt": time.strftime("%Y-%m-%d %H:%M:%S")
-                        }
-                    }
-                    
-                    self.send_response(200)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    response = json.dumps(add_response)
-                    self.wfile.write(response.encode())
-                    print("✅ Movie added successfully")
-                    
-                except json.JSONDecodeError:
-                    self.send_response(400)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    error_response = json.dumps({"error": "Invalid JSON data"})
-                    self.wfile.write(error_response.encode())
-                    print("❌ Invalid JSON in movie addition request")
-                    
-            elif path == '/api/movie/directors/add':
-                # Handle director addition by admin
-                content_length = int(self.headers['Content-Length'])
-                post_data = self.rfile.read(content_length)
-                
-                try:
-                    director_data = json.loads(post_data.decode('utf-8'))
-                    print(f"🎭 Received director addition: {director_data}")
-                    
-                    # Mock successful director addition response
-                    new_director_id = 100 + int(time.time() % 1000)
-                    add_response = {
-                        "success": True,
-                        "message": "Thêm đạo diễn thành công!",
-                        "data": {
-                            "directorId": new_director_id,
-                            "id": new_director_id,
-                            "directorName": director_data.get("directorName", "New Director"),
-                            "addedAt": time.strftime("%Y-%m-%d %H:%M:%S")
-                        }
-                    }
-                    
-                    self.send_response(200)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    response = json.dumps(add_response)
-                    self.wfile.write(response.encode())
-                    print("✅ Director added successfully")
-                    
-                except json.JSONDecodeError:
-                    self.send_response(400)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    error_response = json.dumps({"error": "Invalid JSON data"})
-                    self.wfile.write(error_response.encode())
-                    print("❌ Invalid JSON in director addition request")
-                    
-            else:
-                self.send_response(404)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                error_response = json.dumps({"error": "POST endpoint not found"})
-                self.wfile.write(error_response.encode())
-                print(f"❌ Unknown POST endpoint: {path}")
-                
+            path = urlparse.urlsplit(self.path).path
+
+            STATE.sync()
+            route, params = ROUTES.resolve('POST', path)
+            if CAPTURE is not None and not (route and route.options.get('local')) and CAPTURE.handle(self, route):
+                return
+            if route is None:
+                self.send_json(404, {"error": "POST endpoint not found"})
+                self.log_event(log.WARNING, 'Unknown POST endpoint', path=path)
+                return
+            self.begin_route(route.template)
+            if route.options.get('faults', True) and self.inject_faults(route.template):
+                return
+            self.body_limit = route.options.get('max_body')
+            if route.options.get('auth'):
+                self.authenticate(route.options['auth'])
+            route.handler(self, params)
+
+        except BodyError as e:
+            self.send_json(e.status, {"error": str(e)})
+            self.log_event(log.INFO, 'Rejected request body', status=e.status, error=str(e))
+        except auth.AuthError as e:
+            self.send_json(e.status, {"error": str(e)})
+            self.log_event(log.INFO, 'Rejected token', status=e.status, error=str(e))
         except (ConnectionAbortedError, BrokenPipeError):
-            print("🔌 Client disconnected during POST")
+            self.log_event(log.DEBUG, 'Client disconnected during POST')
             return
         except Exception as e:
             try:
-                self.send_response(500)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                error_response = json.dumps({"error": str(e)})
-                self.wfile.write(error_response.encode())
-                print(f"💥 POST Error: {e}")
+                self.send_json(500, {"error": str(e)})
+                self.log_event(log.ERROR, 'POST failed', exc_info=True)
             except (ConnectionAbortedError, BrokenPipeError):
-                print("🔌 Client disconnected during error response")
+                self.log_event(log.DEBUG, 'Client disconnected during error response')
                 return
 
-def run_server():
-    server_address = ('localhost', 8080)
-    httpd = HTTPServer(server_address, MockBackendHandler)
+    def authenticate(self, role):
+        """Claims of the request's token if it grants role; raises AuthError"""
+        # The header is checked first, so a request that has one is not parsed for the body's token
+        token = auth.bearer_token(self.headers)
+        if token is None:
+            token = auth.body_token(self.read_json())
+        claims = TOKENS.authorize(token, role)
+        self.log_event(log.DEBUG, 'Token accepted', sub=claims.get('sub'))
+        return claims
+
+    # Movies
+
+    @ROUTES.get('/api/movie/movies/displayingMovies', cache=('movies',))
+    def displaying_movies(self, params):
+        self.send_json_list(200, DATA.movies.all())
+        self.log_event(log.DEBUG, 'Served displaying movies')
+
+    @ROUTES.get('/api/movie/movies/comingSoonMovies', cache=('movies',))
+    def coming_soon_movies(self, params):
+        # Coming soon movies - with complete movie data for detail pages
+        self.send_json_list(200, DATA.coming_soon)
+        self.log_event(log.DEBUG, 'Served coming soon movies')
+
+    @ROUTES.get('/api/movie/movies/search')
+    def search_movies(self, params):
+        # Movies matching ?q= in title, director, category or description, best first; ?limit= up to 100
+        query = urlparse.parse_qs(urlparse.urlsplit(self.path).query, keep_blank_values=True)
+        text = query.get('q', [''])[0]
+        limit = query.get('limit', [str(SEARCH_LIMIT)])[0]
+        if not (limit.isascii() and limit.isdigit()) or not 1 <= int(limit) <= MAX_SEARCH_LIMIT:
+            self.send_json(400, {"error": f"limit must be between 1 and {MAX_SEARCH_LIMIT}"})
+            self.log_event(log.INFO, 'Invalid search limit', limit=limit)
+            return
+        movies = DATA.movies.search(text, int(limit))
+        # Not cached, every keystroke of an autocomplete is a new query; the movies' encoded items are reused
+        encode = RESPONSES.items(('movies',)).encoder(RESPONSES.versions(('movies',)))
+        self.send_body(200, encode_list(movies, encode))
+        self.log_event(log.DEBUG, 'Served movie search', q=text, movies=len(movies))
+
+    @ROUTES.get('/api/movie/movies/{movieId:int}', cache=('movies',))
+    def movie_by_id(self, params):
+        # Get specific movie by ID
+        movie_id = params['movieId']
+        movie = DATA.movies.get(movie_id)
+
+        if movie:
+            self.send_json(200, movie)
+            self.log_event(log.DEBUG, 'Served movie', movieId=movie_id)
+        else:
+            self.send_body(404, b'{"error": "Movie not found"}')
+            self.log_event(log.INFO, 'Movie not found', movieId=movie_id)
+
+    @ROUTES.get('/api/movie/movies/{movieId:int}/detail', cache=DETAIL_DATASETS,
+                query=('parts', 'pageNo', 'pageSize') + DATE_QUERY)
+    def movie_detail(self, params):
+        # Everything the movie page fetches, in one object; ?parts=movie,actors,... selects the keys
+        movie_id = params['movieId']
+        query = urlparse.parse_qs(urlparse.urlsplit(self.path).query)
+        parts = [part for value in query.get('parts', [','.join(DETAIL_PARTS)]) for part in value.split(',') if part]
+        unknown = [part for part in parts if part not in DETAIL_PARTS]
+        page = query.get('pageNo', [None])[0], query.get('pageSize', [None])[0]
+        try:
+            if unknown:
+                raise ValueError(f"Unknown parts {', '.join(unknown)}, expected some of {', '.join(DETAIL_PARTS)}")
+            if page != (None, None):
+                page = int(page[0] or 1), int(page[1] or 10)
+                DATA.comments.page(movie_id, *page)
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            self.log_event(log.INFO, 'Invalid movie detail request', error=str(e))
+            return
+
+        movie = DATA.movies.get(movie_id)
+        if not movie:
+            self.send_body(404, b'{"error": "Movie not found"}')
+            self.log_event(log.INFO, 'Movie not found', movieId=movie_id)
+            return
+
+        # Each part is encoded once per change of its datasets and shared by every selection
+        start, end = date_range(self.path)
+        builders = {
+            'movie': (('movies',), (), lambda encode: encode(movie)),
+            'actors': (('actors',), (), lambda encode: encode_list(DATA.actors_for_movie(movie_id), encode)),
+            'cities': (('cities',), (), lambda encode: encode_list(DATA.cities_for_movie(movie_id), encode)),
+            'saloonTimes': (('saloon_times',), (start, end),
+                            lambda encode: encode_list(DATA.saloon_times_for_movie(movie_id, start, end))),
+            'commentCount': (('comments',), (),
+                             lambda encode: encode_item({"count": DATA.comments.count(movie_id)})),
+            'comments': (('comments',), page, lambda encode: encode_list(
+                DATA.comments.page(movie_id, *page) if page != (None, None) else DATA.comments.for_movie(movie_id),
+                encode)),
+        }
+        fields = []
+        for part in dict.fromkeys(parts):
+            datasets, extra, build = builders[part]
+            fields.append((part, RESPONSES.fragment(('fragment', part, movie_id, extra), datasets, build)))
+        self.send_body(200, encode_object(fields))
+        self.log_event(log.DEBUG, 'Served movie detail', movieId=movie_id, parts=len(fields))
+
+    # Saloons and cities
+
+    @ROUTES.get('/api/movie/saloons/getByCityId/{cityId}', cache=('saloons',))
+    @ROUTES.get('/api/movie/saloons/getSaloonsByCityId/{cityId}', cache=('saloons',))
+    def saloons_by_city(self, params):
+        # Get saloons by city ID (support both endpoint formats)
+        city_id = params['cityId']
+
+        # Filter by city ID if provided
+        if city_id.isascii() and city_id.isdigit():
+            city_id = int(city_id)
+            mock_saloons = DATA.saloons_in_city(city_id) or DATA.saloons[:2]  # Fallback
+        else:
+            mock_saloons = DATA.saloons[:3]  # Default saloons
+
+        self.send_json_list(200, mock_saloons)
+        self.log_event(log.DEBUG, 'Served saloons for city', cityId=city_id)
+
+    @ROUTES.get('/api/movie/saloons/getall', cache=('saloons',))
+    def all_saloons(self, params):
+        self.send_json_list(200, DATA.saloons)
+        self.log_event(log.DEBUG, 'Served all saloons')
+
+    @ROUTES.get('/api/movie/cities/getall', cache=('cities',))
+    def all_cities(self, params):
+        self.send_json_list(200, DATA.cities)
+        self.log_event(log.DEBUG, 'Served all cities')
+
+    @ROUTES.get('/api/movie/cities/getCitiesByMovieId/{movieId}', cache=('cities',))
+    def cities_by_movie(self, params):
+        # Get cities by movie ID - cities with a saloon showing the movie
+        self.send_json_list(200, DATA.cities_for_movie(movie_id_param(params)))
+        self.log_event(log.DEBUG, 'Served cities for movie')
+
+    # Comments
+
+    @ROUTES.get('/api/movie/comments/getCountOfComments/{movieId}', cache=('comments',))
+    def comment_count(self, params):
+        comment_count = {"count": DATA.comments.count(movie_id_param(params))}
+        self.send_json(200, comment_count)
+        self.log_event(log.DEBUG, 'Served comment count')
+
+    @ROUTES.get('/api/movie/comments/getCommentsByMovieId/{movieId}', cache=('comments',))
+    def comments_by_movie(self, params):
+        # Get all comments of a movie
+        self.send_json_list(200, DATA.comments.for_movie(movie_id_param(params)))
+        self.log_event(log.DEBUG, 'Served comments')
+
+    @ROUTES.get('/api/movie/comments/getCommentsByMovieId/{movieId}/{pageNo:int}/{pageSize:int}', cache=('comments',))
+    def comments_page(self, params):
+        # Get one page of comments, pageNo starts at 1
+        try:
+            comments = DATA.comments.page(movie_id_param(params), params['pageNo'], params['pageSize'])
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            self.log_event(log.INFO, 'Invalid comments page', error=str(e))
+            return
+        self.send_json_list(200, comments)
+        self.log_event(log.DEBUG, 'Served comments page', pageNo=params['pageNo'], comments=len(comments))
+
+    # Saloon times
+
+    @ROUTES.get('/api/movie/saloonTimes/getSaloonTimesByMovieId/{movieId}', cache=('saloon_times',),
+                query=DATE_QUERY)
+    def saloon_times_by_movie(self, params):
+        # Get saloon times by movie ID, ?date= or ?from=&to= narrow it to ISO dates
+        start, end = date_range(self.path)
+        self.send_json_list(200, DATA.saloon_times_for_movie(movie_id_param(params), start, end), stored=False)
+        self.log_event(log.DEBUG, 'Served saloon times')
+
+    @ROUTES.get('/api/movie/saloonTimes/getMovieSaloonTimeSaloonAndMovieId/{saloonId:int}/{movieId:int}',
+                cache=('saloon_times',), query=DATE_QUERY)
+    def saloon_times_by_saloon_and_movie(self, params):
+        saloon_id = params['saloonId']
+        movie_id = params['movieId']
+        start, end = date_range(self.path)
+        self.send_json_list(200, DATA.saloon_times_at(saloon_id, movie_id, start, end), stored=False)
+        self.log_event(log.DEBUG, 'Served saloon times', saloonId=saloon_id, movieId=movie_id)
+
+    # Actors
+
+    @ROUTES.get('/api/movie/actors/getActorsByMovieId/{movieId}', cache=('actors',))
+    def actors_by_movie(self, params):
+        # Get actors by movie ID
+        self.send_json_list(200, DATA.actors_for_movie(movie_id_param(params)))
+        self.log_event(log.DEBUG, 'Served actors')
+
+    @ROUTES.get('/health')
+    def health(self, params):
+        self.send_json(200, {"status": "OK", "message": "Mock Backend đang hoạt động"})
+        self.log_event(log.DEBUG, 'Health check')
+
+    @ROUTES.get('/metrics', faults=False, local=True)
+    def metrics_endpoint(self, params):
+        # Prometheus text format, see mock_backend.metrics
+        self.send_body(200, METRICS.render() + EMAILS.render(), METRICS_CONTENT_TYPE)
+        self.log_event(log.DEBUG, 'Served metrics')
+
+    @ROUTES.get('/admin/events', faults=False, local=True)
+    def email_events(self, params):
+        # Depth, batching and latency of the ticket email pipeline
+        self.send_json(200, EMAILS.describe())
+        self.log_event(log.DEBUG, 'Served email event stats')
+
+    @ROUTES.get('/admin/faults', faults=False, local=True)
+    def fault_profiles(self, params):
+        self.send_json(200, FAULTS.describe())
+        self.log_event(log.DEBUG, 'Served fault profiles')
+
+    @ROUTES.post('/admin/faults', faults=False, local=True)
+    def switch_fault_profile(self, params):
+        # {"profile": name or null} switches, {"routes": {...}} installs and activates a profile
+        try:
+            fault_request = self.read_json()
+            with STATE.mutation():
+                described = STATE.apply('faults', fault_request)
+            self.send_json(200, described)
+            self.log_event(log.INFO, 'Fault profile switched', profile=described['active'])
+
+        except ValueError as e:
+            self.send_json(400, {"success": False, "message": str(e)})
+            self.log_event(log.INFO, 'Invalid fault profile', error=str(e))
+
+    # Admin endpoints
+
+    @ROUTES.get('/api/movie/actors/getall', cache=('actors',))
+    def all_actors(self, params):
+        self.send_json_list(200, DATA.actors, envelope={"success": True})
+        self.log_event(log.DEBUG, 'Served all actors')
+
+    @ROUTES.get('/api/movie/categories/getall', cache=('categories',))
+    def all_categories(self, params):
+        self.send_json_list(200, DATA.categories, envelope={"success": True})
+        self.log_event(log.DEBUG, 'Served all categories')
+
+    @ROUTES.get('/api/movie/directors/getall', cache=('directors',))
+    def all_directors(self, params):
+        self.send_json_list(200, DATA.directors, envelope={"success": True})
+        self.log_event(log.DEBUG, 'Served all directors')
+
+    # Payments
+
+    @ROUTES.post('/api/movie/payments/sendTicketDetail')
+    def send_ticket_detail(self, params):
+        # Book the chairs of a showtime, or confirm the seats held by holdId
+        try:
+            # Parse the JSON data
+            ticket_data = self.read_json()
+            self.log_payload('Received ticket data', ticket_data)
+
+            with STATE.mutation():
+                if ticket_data.get("holdId"):
+                    confirmed = SEATS.confirm(ticket_data["holdId"])
+                    if confirmed is None:
+                        self.send_json(404, {"success": False, "message": "Seat hold not found or expired"})
+                        self.log_event(log.INFO, 'Unknown seat hold', holdId=ticket_data['holdId'])
+                        return
+                    ticket_id, showtime, seats = confirmed
+                else:
+                    showtime = showtime_key(ticket_data)
+                    ticket_id, seats = SEATS.book(showtime, ticket_data.get("chairNumbers"))
+            # What PaymentServiceImpl publishes for the email service; the booking stands either way
+            if not EMAILS.publish(events.email_event(ticket_data, showtime, seats)):
+                self.log_event(log.WARNING, 'Ticket email dropped', ticketId=ticket_id)
+
+            payment_response = {
+                "success": True,
+                "message": "Đặt vé thành công!",
+                "ticketId": ticket_id,
+                "bookingDetails": {
+                    "movieTitle": showtime[0],
+                    "saloonName": showtime[1],
+                    "movieDay": showtime[2],
+                    "movieStartTime": showtime[3],
+                    "seats": seats,
+                    "totalPrice": ticket_data.get("totalPrice", 0),
+                    "bookingTime": time.strftime("%Y-%m-%d %H:%M:%S")
+                }
+            }
+
+            self.send_json(200, payment_response)
+            self.log_event(log.INFO, 'Ticket booked', ticketId=ticket_id, seats=seats)
+
+        except SeatConflict as e:
+            self.send_json(409, {"success": False, "message": str(e), "takenSeats": e.seats})
+            self.log_event(log.INFO, 'Seats already taken', seats=e.seats)
+        except ValueError as e:
+            self.send_json(400, {"success": False, "message": str(e)})
+            self.log_event(log.INFO, 'Invalid ticket request', error=str(e))
+
+    @ROUTES.post('/api/movie/payments/reserveSeats')
+    def reserve_seats(self, params):
+        # Hold chairs for a showtime until sendTicketDetail confirms the holdId
+        try:
+            seat_data = self.read_json()
+            with STATE.mutation():
+                hold_id, seats = SEATS.reserve(showtime_key(seat_data), seat_data.get("chairNumbers"))
+            self.send_json(200, {"success": True, "holdId": hold_id, "seats": seats,
+                                 "expiresIn": SEATS.hold_seconds})
+            self.log_event(log.INFO, 'Seats held', holdId=hold_id, seats=seats)
+
+        except SeatConflict as e:
+            self.send_json(409, {"success": False, "message": str(e), "takenSeats": e.seats})
+            self.log_event(log.INFO, 'Seats already taken', seats=e.seats)
+        except ValueError as e:
+            self.send_json(400, {"success": False, "message": str(e)})
+            self.log_event(log.INFO, 'Invalid seat reservation', error=str(e))
+
+    @ROUTES.post('/api/movie/payments/releaseSeats')
+    def release_seats(self, params):
+        seat_data = self.read_json()
+        with STATE.mutation():
+            seats = SEATS.release(seat_data.get("holdId"))
+        if seats is None:
+            self.send_json(404, {"success": False, "message": "Seat hold not found or expired"})
+            self.log_event(log.INFO, 'Unknown seat hold', holdId=seat_data.get('holdId'))
+            return
+        self.send_json(200, {"success": True, "seats": seats})
+        self.log_event(log.INFO, 'Seats released', seats=seats)
+
+    @ROUTES.get('/api/movie/payments/getTakenSeats')
+    def taken_seats(self, params):
+        # ?movieName=&saloonName=&movieDay=&movieStartTime= as in sendTicketDetail
+        query = dict(urlparse.parse_qsl(urlparse.urlsplit(self.path).query))
+        try:
+            showtime = showtime_key(query)
+        except ValueError as e:
+            self.send_json(400, {"success": False, "message": str(e)})
+            self.log_event(log.INFO, 'Invalid showtime', error=str(e))
+            return
+        taken = SEATS.taken(showtime)
+        self.send_json(200, {"takenSeats": taken, "availableCount": len(SEATS.layout) - len(taken)})
+        self.log_event(log.DEBUG, 'Served taken seats', taken=len(taken))
+
+    # Users
+
+    @ROUTES.post('/api/user/users/add', max_body=AUTH_MAX_BODY)
+    def add_user(self, params):
+        # User registration endpoint; the password is hashed in the hashing pool
+        user_data = self.read_json()
+        self.log_payload('Received user registration', user_data)
+        email = user_data.get("email")
+        password = user_data.get("password")
+        if not isinstance(email, str) or '@' not in email or not isinstance(password, str) or not password:
+            self.send_json(400, {"success": False, "message": "Email và mật khẩu là bắt buộc"})
+            self.log_event(log.INFO, 'Invalid user registration')
+            return
+        if USERS.by_email(email):
+            # Refused before paying for a hash; checked again once the hash is done
+            self.send_json(409, {"success": False, "message": "Email đã được sử dụng"})
+            self.log_event(log.INFO, 'Email already registered')
+            return
+        self.defer(USERS.hash_password(password), lambda password_hash: self.register_user(user_data, password_hash))
+
+    def register_user(self, user_data, password_hash):
+        name = user_data.get("customerName") or user_data.get("name") or user_data.get("fullName") or ""
+        with STATE.mutation():
+            if USERS.by_email(user_data["email"]):
+                user = None
+            else:
+                user = users.user_record(USERS.next_id(), user_data["email"], name, password_hash,
+                                         phone=user_data.get("phone") or "")
+                STATE.apply('users.add', user)
+        if user is None:
+            self.send_json(409, {"success": False, "message": "Email đã được sử dụng"})
+            self.log_event(log.INFO, 'Email already registered')
+            return
+
+        registration_response = {
+            "success": True,
+            "message": "Đăng ký người dùng thành công!",
+            "userId": user["userId"],
+            "userDetails": {
+                "email": user["email"],
+                "name": name,
+                "registeredAt": user["registeredAt"]
+            }
+        }
+
+        self.send_json(200, registration_response)
+        self.log_event(log.INFO, 'User registered', userId=user["userId"])
+
+    @ROUTES.post('/api/user/auth/login', max_body=AUTH_MAX_BODY)
+    def login(self, params):
+        # User login endpoint, checked against USERS; the password is checked in the hashing pool
+        login_data = self.read_json()
+        self.log_payload('Received login attempt', login_data)
+        email = login_data.get("email")
+        password = login_data.get("password")
+        if not isinstance(email, str) or not isinstance(password, str):
+            self.send_json(400, {"success": False, "message": "Email và mật khẩu là bắt buộc"})
+            self.log_event(log.INFO, 'Invalid login request')
+            return
+        user = USERS.by_email(email)
+        self.defer(USERS.check_password(user, password), lambda valid: self.logged_in(user if valid else None))
+
+    def logged_in(self, user):
+        if user is None:
+            self.send_json(401, {"success": False, "message": "Email hoặc mật khẩu không đúng"})
+            self.log_event(log.INFO, 'Login failed')
+            return
+        user_id = user["userId"]
+        user_name = user["fullName"] or user["email"].split('@')[0]
+        user_roles = user["roles"]
+
+        login_response = {
+            "success": True,
+            "message": "Đăng nhập thành công!",
+            "token": TOKENS.issue(user["email"], user_roles, userId=user_id),
+            "userId": user_id,
+            "email": user["email"],
+            "fullName": user_name,
+            "name": user_name,
+            "roles": user_roles,
+            "user": {
+                "email": user["email"],
+                "name": user_name,
+                "role": user_roles[0].lower(),
+                "userId": user_id,
+                "loginTime": time.strftime("%Y-%m-%d %H:%M:%S")
+            }
+        }
+
+        self.send_json(200, login_response)
+        self.log_event(log.INFO, 'User logged in', userId=user_id)
+
+    # Comment mutations
+
+    @ROUTES.post('/api/movie/comments/add')
+    def add_comment(self, params):
+        # Add comment endpoint
+        # Parse the JSON data
+        comment_data = self.read_json()
+        self.log_payload('Received comment', comment_data)
+
+        movie_id = comment_data.get("movieId")
+        if isinstance(movie_id, str) and movie_id.isascii() and movie_id.isdigit():
+            movie_id = int(movie_id)
+        with STATE.mutation():
+            if DATA.movies.get(movie_id) is None:
+                self.send_json(404, {"error": "Movie not found"})
+                self.log_event(log.INFO, 'Comment for unknown movie', movieId=movie_id)
+                return
+
+            new_comment = DATA.comments.add(
+                movie_id,
+                comment_data.get("commentText", ""),
+                comment_data.get("commentBy", "Khách ẩn danh"),
+                comment_data.get("commentByUserId", ""))
+            RESPONSES.bump('comments')
+            STATE.record('comments.add', new_comment)
+
+        self.send_json(200, new_comment)
+        self.log_event(log.INFO, 'Comment added', commentId=new_comment['commentId'])
+
+    @ROUTES.post('/api/movie/comments/delete')
+    def delete_comment(self, params):
+        # Delete comment endpoint
+        # Parse the JSON data
+        delete_data = self.read_json()
+        self.log_payload('Deleting comment', delete_data)
+
+        comment_id = delete_data.get("commentId", "")
+        if isinstance(comment_id, str) and comment_id.isascii() and comment_id.isdigit():
+            comment_id = int(comment_id)
+        with STATE.mutation():
+            deleted = DATA.comments.delete(comment_id) if isinstance(comment_id, int) else None
+            if deleted is None:
+                self.send_json(404, {"success": False, "message": "Comment not found"})
+                self.log_event(log.INFO, 'Comment not found', commentId=comment_id)
+                return
+            RESPONSES.bump('comments')
+            STATE.record('comments.delete', comment_id)
+
+        delete_response = {
+            "success": True,
+            "message": "Xóa bình luận thành công!",
+            "deletedCommentId": comment_id
+        }
+
+        self.send_json(200, delete_response)
+        self.log_event(log.INFO, 'Comment deleted', commentId=comment_id)
+
+    # Admin mutations
+
+    @ROUTES.post('/api/movie/movies/add', auth='ADMIN')
+    def add_movie(self, params):
+        # Handle movie addition by admin
+        movie_data = self.read_json()
+        self.log_payload('Received movie addition', movie_data)
+
+        with STATE.mutation():
+            new_movie_id = DATA.movies.next_id()
+            STATE.apply('movies.add', new_movie_record(new_movie_id, movie_data))
+
+        add_response = {
+            "success": True,
+            "message": "Thêm phim thành công!",
+            "movieId": new_movie_id,
+            "data": {
+                "id": new_movie_id,
+                "movieId": new_movie_id,
+                "movieName": movie_data.get("movieName", "New Movie"),
+                "addedAt": time.strftime("%Y-%m-%d %H:%M:%S")
+            }
+        }
+
+        self.send_json(200, add_response)
+        self.log_event(log.INFO, 'Movie added', movieId=new_movie_id)
+
+    @ROUTES.post('/api/movie/directors/add', auth='ADMIN')
+    def add_director(self, params):
+        # Handle director addition by admin
+        director_data = self.read_json()
+        self.log_payload('Received director addition', director_data)
+
+        with STATE.mutation():
+            new_director_id = max((d['id'] for d in DATA.directors), default=0) + 1
+            director_name = director_data.get("directorName", "New Director")
+            STATE.apply('directors.add', {"id": new_director_id, "name": director_name,
+                                          "directorName": director_name})
+
+        add_response = {
+            "success": True,
+            "message": "Thêm đạo diễn thành công!",
+            "data": {
+                "directorId": new_director_id,
+                "id": new_director_id,
+                "directorName": director_name,
+                "addedAt": time.strftime("%Y-%m-%d %H:%M:%S")
+            }
+        }
+
+        self.send_json(200, add_response)
+        self.log_event(log.INFO, 'Director added')
+
+def movie_id_param(params):
+    """movieId path parameter as an int, None for values such as 'undefined'"""
+    movie_id = params['movieId']
+    return int(movie_id) if movie_id.isascii() and movie_id.isdigit() else None
+
+def cache_key(route, params, query):
+    """Response cache key of a request: its route, path parameters and the query parameters the route reads"""
+    names = route.options.get('query')
+    if not names:
+        return route.template, tuple(params.items())
+    values = urlparse.parse_qs(query) if query else {}
+    return route.template, tuple(params.items()), tuple(tuple(values.get(name, ())) for name in names)
+
+def date_range(url):
+    """(from, to) ISO dates of ?date=YYYY-MM-DD or ?from=...&to=..., None when absent"""
+    query = urlparse.parse_qs(urlparse.urlsplit(url).query)
+    if 'date' in query:
+        return query['date'][0], query['date'][0]
+    return query.get('from', [None])[0], query.get('to', [None])[0]
+
+def new_movie_record(movie_id, movie_data):
+    """Full movie record, in the shape of MOCK_MOVIES, for a movie added by an admin"""
+    trailer = movie_data.get("trailerUrl") or movie_data.get("movieTrailerUrl") or ""
+    director = movie_data.get("directorName") or ""
+    category = movie_data.get("categoryName") or ""
+    release_date = movie_data.get("releaseDate") or ""
+    description = movie_data.get("description") or ""
+    try:
+        duration = int(movie_data.get("duration") or 0)
+    except (TypeError, ValueError):
+        duration = 0
+    image = movie_data.get("movieImageUrl") or ""
+    return {
+        "id": movie_id,
+        "movieId": movie_id,
+        "movieName": movie_data.get("movieName", "New Movie"),
+        "moviePoster": image,
+        "movieImageUrl": image,
+        "description": description,
+        "movieDescription": description,
+        "movieTrailerUrl": trailer,
+        "movieTrailer": trailer,
+        "directorName": director,
+        "movieDirector": director,
+        "releaseDate": release_date,
+        "movieReleaseDate": release_date,
+        "duration": duration,
+        "movieDuration": duration,
+        "categoryName": category,
+        "movieCategory": category,
+        "rating": 0
+    }
+
+def build_arg_parser():
+    parser = serving.build_arg_parser(__doc__)
+    for add_arguments in (data.add_arguments, compression.add_arguments, log.add_arguments, faults.add_arguments,
+                          capture.add_arguments, auth.add_arguments, users.add_arguments, events.add_arguments,
+                          cache.add_arguments):
+        add_arguments(parser)
+    return parser
+
+def load_data(options):
+    """Replace DATA from --data or --synthetic, returns False when loading failed"""
+    global DATA
+    if options.data or options.synthetic is not None:
+        started = time.time()
+        try:
+            DATA = data.load(options, builtin_source())
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not load data: {e}")
+            return False
+        print(f"📦 Loaded {DATA.summary()} in {time.time() - started:.1f}s")
+    return True
+
+def make_httpd(options, sock=None):
+    return serving.make_server(options.mode, (options.host, options.port), MockBackendHandler,
+                               threads=options.threads, backlog=options.backlog,
+                               idle_timeout=options.idle_timeout,
+                               max_keepalive_requests=options.max_keepalive_requests,
+                               max_body_size=options.max_body_size, sock=sock)
+
+def start_worker(options, sock):
+    # Runs in each worker process: the log writer thread does not survive fork()
+    log.setup(options)
+    return make_httpd(options, sock)
+
+def _terminate(signum, frame):
+    # Process managers stop services with SIGTERM: stop as on Ctrl+C, so the capture index gets written
+    raise KeyboardInterrupt
+
+def run_server(options=None):
+    global CAPTURE, EMAILS, FAULTS, TOKENS
+    if options is None:
+        options = build_arg_parser().parse_args([])
+    if not load_data(options):
+        return
+    try:
+        MockBackendHandler.faults = FAULTS = faults.from_options(options)
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not load fault profiles: {e}")
+        return
+    try:
+        EMAILS = events.from_options(options)
+    except OSError as e:
+        print(f"❌ Could not set up ticket emails: {e}")
+        return
+    if options.record and options.workers > 1:
+        print("❌ --record writes one capture file and needs a single worker")
+        return
+    if options.record and options.mode == 'asyncio':
+        print("❌ --record forwards each request with a blocking call, which would stall the event loop; "
+              "use --mode threaded")
+        return
+    try:
+        CAPTURE = capture.from_options(options)
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not open capture: {e}")
+        return
+    MockBackendHandler.compressor = compression.from_options(options)
+    TOKENS = auth.from_options(options)
+    USERS.iterations = options.pbkdf2_iterations
+    USERS.hash_threads = options.hash_threads
+    # Before the workers fork, so they share the one hash
+    seed_users()
+    RESPONSES.max_entries = options.response_cache_size
+    if options.workers <= 1:
+        log.setup(options)
+        httpd = make_httpd(options)
     
     print("🚀 Mock Backend Server starting...")
-    print(f"📍 Server running at http://localhost:8080")
+    # The port bound, for --port 0; workers and the asyncio server only bind once they run
+    port = httpd.server_address[1] if options.workers <= 1 else options.port
+    base_url = f"http://{options.host}:{port}"
+    print(f"📍 Server running at {base_url}")
+    print(f"⚙️  Serving mode: {options.mode} (threads={options.threads}, backlog={options.backlog}, "
+          f"workers={options.workers}{', SO_REUSEPORT' if options.reuse_port and options.workers > 1 else ''})")
+    compressor = MockBackendHandler.compressor
+    print(f"🗜️  Compression: {' '.join(compressor.encodings) + f' from {compressor.min_size} bytes' if compressor else 'off'}")
+    print(f"📨 Request bodies: up to {options.max_body_size} bytes, JSON parsed with {JSON_BACKEND}")
+    print(f"📝 Logging: {options.log_level} (sample={options.log_sample}, payloads={'on' if options.log_payloads else 'off'})")
+    print(f"🔑 Tokens: HS256, valid {options.jwt_ttl}s, {options.token_cache_size} verified tokens cached; "
+          f"admin routes need an ADMIN token")
+    print(f"👤 Users: {len(USERS)} registered, passwords hashed with PBKDF2-SHA256 x{USERS.iterations} "
+          f"on {USERS.hash_threads} threads")
+    email_state = EMAILS.describe()
+    print(f"📧 Ticket emails: topic {email_state['topic']}, batches of up to {email_state['batchSize']} "
+          f"(linger {email_state['lingerMs']:g} ms), outbox {email_state['outbox'] or 'off'}, "
+          f"log file {email_state['file'] or 'off'}")
+    fault_state = FAULTS.describe()
+    print(f"💥 Faults: {fault_state['active'] or 'off'} (profiles: {', '.join(fault_state['profiles']) or 'none'})")
+    if options.record:
+        print(f"⏺️  Recording {options.upstream} into {options.record} ({len(CAPTURE.writer)} requests so far)")
+    elif options.replay:
+        print(f"⏯️  Replaying {len(CAPTURE.reader)} recorded requests from {options.replay}"
+              f"{'' if CAPTURE.reader.indexed else ' (no index, scanned)'}")
     print("📺 Available endpoints:")
-    print("   GET http://localhost:8080/api/movie/movies/displayingMovies")
-    print("   GET http://localhost:8080/api/movie/movies/comingSoonMovies") 
-    print("   GET http://localhost:8080/api/movie/movies/{id}")
-    print("   GET http://localhost:8080/api/movie/actors/getActorsByMovieId/{id}")
-    print("   GET http://localhost:8080/api/movie/cities/getCitiesByMovieId/{id}")
-    print("   GET http://localhost:8080/api/movie/saloons/getSaloonsByCityId/{id}")
-    print("   GET http://localhost:8080/api/movie/saloonTimes/getMovieSaloonTimeSaloonAndMovieId/{saloonId}/{movieId}")
-    print("   GET http://localhost:8080/api/movie/comments/getCommentsByMovieId/{id}/{page}/{size}")
-    print("   GET http://localhost:8080/api/movie/comments/getCountOfComments/{id}")
-    print("   POST http://localhost:8080/api/movie/comments/add")
-    print("   POST http://localhost:8080/api/movie/comments/delete")
-    print("   POST http://localhost:8080/api/movie/payments/sendTicketDetail")
-    print("   POST http://localhost:8080/api/user/users/add")
-    print("   POST http://localhost:8080/api/user/auth/login")
-    print("   GET http://localhost:8080/health")
+    print(f"   GET {base_url}/api/movie/movies/displayingMovies")
+    print(f"   GET {base_url}/api/movie/movies/comingSoonMovies")
+    print(f"   GET {base_url}/api/movie/movies/search?q=&limit=")
+    print(f"   GET {base_url}/api/movie/movies/{{id}}")
+    print(f"   GET {base_url}/api/movie/movies/{{id}}/detail?parts=movie,actors,cities,saloonTimes,commentCount,comments")
+    print(f"   GET {base_url}/api/movie/actors/getActorsByMovieId/{{id}}")
+    print(f"   GET {base_url}/api/movie/cities/getCitiesByMovieId/{{id}}")
+    print(f"   GET {base_url}/api/movie/saloons/getSaloonsByCityId/{{id}}")
+    print(f"   GET {base_url}/api/movie/saloonTimes/getMovieSaloonTimeSaloonAndMovieId/{{saloonId}}/{{movieId}}")
+    print(f"   GET {base_url}/api/movie/comments/getCommentsByMovieId/{{id}}/{{page}}/{{size}}")
+    print(f"   GET {base_url}/api/movie/comments/getCountOfComments/{{id}}")
+    print(f"   POST {base_url}/api/movie/comments/add")
+    print(f"   POST {base_url}/api/movie/comments/delete")
+    print(f"   POST {base_url}/api/movie/payments/sendTicketDetail")
+    print(f"   POST {base_url}/api/movie/payments/reserveSeats")
+    print(f"   POST {base_url}/api/movie/payments/releaseSeats")
+    print(f"   GET {base_url}/api/movie/payments/getTakenSeats?movieName=&saloonName=&movieDay=&movieStartTime=")
+    print(f"   POST {base_url}/api/user/users/add")
+    print(f"   POST {base_url}/api/user/auth/login")
+    print(f"   GET {base_url}/health")
+    print(f"   GET {base_url}/metrics")
+    print(f"   GET {base_url}/admin/events")
+    print(f"   GET/POST {base_url}/admin/faults")
     print("🎬 Frontend should now work at http://localhost:3000")
     print("Press Ctrl+C to stop the server")
     
+    if options.workers > 1:
+        # Workers fork from this process, so SIGHUP reloads --data fixtures for the new generation
+        supervisor = workers.Supervisor(options, lambda sock: start_worker(options, sock), STATE,
+                                        reload=lambda: load_data(options))
+        status = supervisor.run()
+        print("✅ Server stopped")
+        sys.exit(status)
+
+    signal.signal(signal.SIGTERM, _terminate)
     try:
         httpd.serve_forever()
     except KeyboardInterrupt:
         print("\n🛑 Server stopping...")
+    finally:
         httpd.server_close()
-        print("✅ Server stopped")
+        EMAILS.close()
+        if CAPTURE is not None:
+            CAPTURE.close()
+        log.shutdown()
+    print("✅ Server stopped")
 
 if __name__ == '__main__':
-    run_server()
\ No newline at end of file
+    run_server(build_arg_parser().parse_args())
\ No newline at end of file
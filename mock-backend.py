@@ -4,10 +4,16 @@ Mock Backend Server for CineVision Frontend
 Runs on port 8080 to serve mock movie data
 """
 
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import json
+import sys
 import urllib.parse as urlparse
 import time
+from types import MappingProxyType
+
+from mock_backend import serving, workers
+from mock_backend.body import BodyError
+from mock_backend.handler import KeepAliveRequestHandler
+from mock_backend.movies import MovieStore
+from mock_backend.seats import SeatConflict, SeatInventory, showtime_key
 
 # Mock data
 MOCK_MOVIES = [
@@ -46,13 +52,130 @@ MOCK_MOVIES = [
     }
 ]
 
-class MockBackendHandler(BaseHTTPRequestHandler):
+# Indexed by movieId, category, director and release date
+MOVIES = MovieStore(MOCK_MOVIES)
+
+# Response data is built once here and only read by the handler
+MOCK_MOVIE_ACTORS = (
+    {"firstName": "Robert", "lastName": "Downey Jr."},
+    {"firstName": "Chris", "lastName": "Evans"},
+    {"firstName": "Scarlett", "lastName": "Johansson"}
+)
+
+MOCK_CITIES = (
+    {"cityId": 1, "cityName": "Ho Chi Minh City"},
+    {"cityId": 2, "cityName": "Ha Noi"},
+    {"cityId": 3, "cityName": "Da Nang"},
+    {"cityId": 4, "cityName": "Can Tho"},
+    {"cityId": 5, "cityName": "Hai Phong"}
+)
+MOCK_MOVIE_CITIES = MOCK_CITIES[:3]
+
+MOCK_SALOONS = (
+    {"saloonId": 1, "saloonName": "CGV Vincom Center", "cityId": 1},
+    {"saloonId": 2, "saloonName": "Galaxy Cinema", "cityId": 1},
+    {"saloonId": 3, "saloonName": "Lotte Cinema", "cityId": 1},
+    {"saloonId": 4, "saloonName": "CGV Landmark", "cityId": 2},
+    {"saloonId": 5, "saloonName": "BHD Star Cinema", "cityId": 2}
+)
+SALOONS_BY_CITY = MappingProxyType({
+    city_id: tuple(s for s in MOCK_SALOONS if s['cityId'] == city_id)
+    for city_id in sorted({s['cityId'] for s in MOCK_SALOONS})
+})
+DEFAULT_CITY_ID = 1
+
+MOCK_COMMENT_COUNT = {"count": 5}
+MOCK_COMMENTS = (
+    {
+        "id": 1,
+        "content": "Great movie! Highly recommend.",
+        "user": {"name": "John Doe"},
+        "createdAt": "2023-10-01"
+    },
+    {
+        "id": 2,
+        "content": "Amazing visual effects and storyline.",
+        "user": {"name": "Jane Smith"},
+        "createdAt": "2023-10-02"
+    }
+)
+
+MOCK_SALOON_TIMES = (
+    {
+        "id": 1,
+        "movieBeginTime": "14:00",
+        "movieDate": "2025-10-30",
+        "saloonName": "Saloon A",
+        "movieId": 1
+    },
+    {
+        "id": 2,
+        "movieBeginTime": "17:30",
+        "movieDate": "2025-10-30",
+        "saloonName": "Saloon B",
+        "movieId": 1
+    },
+    {
+        "id": 3,
+        "movieBeginTime": "20:00",
+        "movieDate": "2025-10-30",
+        "saloonName": "Saloon A",
+        "movieId": 1
+    }
+)
+
+MOCK_SALOON_MOVIE_TIMES = (
+    {
+        "id": 1,
+        "movieBeginTime": "14:00",
+        "movieDate": "2025-10-30",
+        "saloonName": "CGV Vincom Center",
+        "movieId": 1,
+        "saloonId": 1
+    },
+    {
+        "id": 2,
+        "movieBeginTime": "17:30",
+        "movieDate": "2025-10-30",
+        "saloonName": "CGV Vincom Center",
+        "movieId": 1,
+        "saloonId": 1
+    },
+    {
+        "id": 3,
+        "movieBeginTime": "20:00",
+        "movieDate": "2025-10-30",
+        "saloonName": "CGV Vincom Center",
+        "movieId": 1,
+        "saloonId": 1
+    }
+)
+SALOON_TIMES_BY_SALOON_AND_MOVIE = MappingProxyType({
+    key: tuple(t for t in MOCK_SALOON_MOVIE_TIMES if (t['saloonId'], t['movieId']) == key)
+    for key in sorted({(t['saloonId'], t['movieId']) for t in MOCK_SALOON_MOVIE_TIMES})
+})
+DEFAULT_SALOON_AND_MOVIE = (1, 1)
+
+# Sold chairs of every showtime booked through sendTicketDetail; with
+# --workers every booking is replayed into the other worker processes.
+# A request naming its showtime (movieName, saloonName, movieDay,
+# movieStartTime) only gets seats of the hall plan that are still free,
+# else 400 or 409; one without them is booked as sent, untracked.
+STATE = workers.SharedState()
+SEATS = SeatInventory(on_change=lambda change: STATE.record('seats', change))
+STATE.register('seats', SEATS.apply)
+
+def int_segment(value, default):
+    return int(value) if value.isdigit() else default
+
+class MockBackendHandler(KeepAliveRequestHandler):
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        self.send_header('Content-Length', '0')
         self.end_headers()
     
     def do_GET(self):
@@ -64,25 +187,15 @@ class MockBackendHandler(BaseHTTPRequestHandler):
         try:
             if path == '/api/movie/movies/displayingMovies':
                 try:
-                    self.send_response(200)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    response = json.dumps(MOCK_MOVIES)
-                    self.wfile.write(response.encode())
+                    self.send_json(200, MOVIES.all())
                     print("✅ Served displaying movies")
                 except (ConnectionAbortedError, BrokenPipeError):
                     print("🔌 Client disconnected during response")
                     return
                 
             elif path == '/api/movie/movies/comingSoonMovies':
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
                 # Return only first movie for coming soon
-                response = json.dumps(MOCK_MOVIES[:1])
-                self.wfile.write(response.encode())
+                self.send_json(200, MOVIES.all()[:1])
                 print("✅ Served coming soon movies")
                 
             elif path.startswith('/api/movie/movies/'):
@@ -92,240 +205,78 @@ class MockBackendHandler(BaseHTTPRequestHandler):
                 # Handle undefined case
                 if movie_id_str == 'undefined' or not movie_id_str.isdigit():
                     # Return first movie as default
-                    movie = MOCK_MOVIES[0] if MOCK_MOVIES else None
+                    movie = MOVIES.first()
                     movie_id = movie['movieId'] if movie else 1
                 else:
                     movie_id = int(movie_id_str)
-                    movie = next((m for m in MOCK_MOVIES if m['movieId'] == movie_id), None)
+                    movie = MOVIES.by_movie_id(movie_id)
                 
                 if movie:
-                    self.send_response(200)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    response = json.dumps(movie)
-                    self.wfile.write(response.encode())
+                    self.send_json(200, movie)
                     print(f"✅ Served movie ID: {movie_id} (requested: {movie_id_str})")
                 else:
-                    self.send_response(404)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    self.wfile.write(b'{"error": "Movie not found"}')
+                    self.send_body(404, b'{"error": "Movie not found"}')
                     print(f"❌ Movie not found: {movie_id} (requested: {movie_id_str})")
                     
             elif path.startswith('/api/movie/actors/getActorsByMovieId/'):
                 # Get actors by movie ID - mock actors data
                 movie_id_str = path.split('/')[-1]
-                mock_actors = [
-                    {"firstName": "Robert", "lastName": "Downey Jr."},
-                    {"firstName": "Chris", "lastName": "Evans"},
-                    {"firstName": "Scarlett", "lastName": "Johansson"}
-                ]
-                
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(mock_actors)
-                self.wfile.write(response.encode())
+                self.send_json(200, MOCK_MOVIE_ACTORS)
                 print(f"✅ Served actors for movie: {movie_id_str}")
                 
             elif path.startswith('/api/movie/cities/getCitiesByMovieId/'):
                 # Get cities by movie ID - mock cities data
-                mock_cities = [
-                    {"cityId": 1, "cityName": "Ho Chi Minh City"},
-                    {"cityId": 2, "cityName": "Ha Noi"},
-                    {"cityId": 3, "cityName": "Da Nang"}
-                ]
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(mock_cities)
-                self.wfile.write(response.encode())
+                self.send_json(200, MOCK_MOVIE_CITIES)
                 print("✅ Served cities")
                 
             elif path.startswith('/api/movie/saloons/getSaloonsByCityId/'):
-                # Get saloons by city ID - mock saloons data
-                mock_saloons = [
-                    {
-                        "saloonId": 1,
-                        "saloonName": "CGV Vincom Center",
-                        "cityId": 1
-                    },
-                    {
-                        "saloonId": 2, 
-                        "saloonName": "Galaxy Cinema",
-                        "cityId": 1
-                    },
-                    {
-                        "saloonId": 3,
-                        "saloonName": "Lotte Cinema",
-                        "cityId": 1
-                    }
-                ]
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(mock_saloons)
-                self.wfile.write(response.encode())
+                # Get saloons by city ID, the first city's saloons for unknown cities
+                city_id = int_segment(path.split('/')[-1], DEFAULT_CITY_ID)
+                saloons = SALOONS_BY_CITY.get(city_id) or SALOONS_BY_CITY[DEFAULT_CITY_ID]
+                self.send_json(200, saloons)
                 print("✅ Served saloons")
             
             elif path == '/api/movie/saloons/getall':
                 # Get all saloons
-                mock_saloons = [
-                    {"saloonId": 1, "saloonName": "CGV Vincom Center", "cityId": 1},
-                    {"saloonId": 2, "saloonName": "Galaxy Cinema", "cityId": 1},
-                    {"saloonId": 3, "saloonName": "Lotte Cinema", "cityId": 1},
-                    {"saloonId": 4, "saloonName": "CGV Landmark", "cityId": 2},
-                    {"saloonId": 5, "saloonName": "BHD Star Cinema", "cityId": 2}
-                ]
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(mock_saloons)
-                self.wfile.write(response.encode())
+                self.send_json(200, MOCK_SALOONS)
                 print("✅ Served all saloons")
             
             elif path == '/api/movie/cities/getall':
                 # Get all cities
-                mock_cities = [
-                    {"cityId": 1, "cityName": "Ho Chi Minh City"},
-                    {"cityId": 2, "cityName": "Ha Noi"}, 
-                    {"cityId": 3, "cityName": "Da Nang"},
-                    {"cityId": 4, "cityName": "Can Tho"},
-                    {"cityId": 5, "cityName": "Hai Phong"}
-                ]
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(mock_cities)
-                self.wfile.write(response.encode())
+                self.send_json(200, MOCK_CITIES)
                 print("✅ Served all cities")
                 
             elif path.startswith('/api/movie/comments/getCountOfComments/'):
                 # Get comment count - mock data
-                mock_count = {"count": 5}
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(mock_count)
-                self.wfile.write(response.encode())
+                self.send_json(200, MOCK_COMMENT_COUNT)
                 print("✅ Served comment count")
                 
             elif '/api/movie/comments/getCommentsByMovieId/' in path:
                 # Get comments by movie ID - mock comments
-                mock_comments = [
-                    {
-                        "id": 1,
-                        "content": "Great movie! Highly recommend.",
-                        "user": {"name": "John Doe"},
-                        "createdAt": "2023-10-01"
-                    },
-                    {
-                        "id": 2,
-                        "content": "Amazing visual effects and storyline.",
-                        "user": {"name": "Jane Smith"},
-                        "createdAt": "2023-10-02"
-                    }
-                ]
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(mock_comments)
-                self.wfile.write(response.encode())
+                self.send_json(200, MOCK_COMMENTS)
                 print("✅ Served comments")
             
             elif path.startswith('/api/movie/saloonTimes/getSaloonTimesByMovieId/'):
                 # Get saloon times by movie ID - mock showtime data
-                mock_saloon_times = [
-                    {
-                        "id": 1,
-                        "movieBeginTime": "14:00",
-                        "movieDate": "2025-10-30",
-                        "saloonName": "Saloon A",
-                        "movieId": 1
-                    },
-                    {
-                        "id": 2,
-                        "movieBeginTime": "17:30",
-                        "movieDate": "2025-10-30", 
-                        "saloonName": "Saloon B",
-                        "movieId": 1
-                    },
-                    {
-                        "id": 3,
-                        "movieBeginTime": "20:00",
-                        "movieDate": "2025-10-30",
-                        "saloonName": "Saloon A", 
-                        "movieId": 1
-                    }
-                ]
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(mock_saloon_times)
-                self.wfile.write(response.encode())
+                self.send_json(200, MOCK_SALOON_TIMES)
                 print("✅ Served saloon times")
             
             elif path.startswith('/api/movie/saloonTimes/getMovieSaloonTimeSaloonAndMovieId/'):
-                # Get movie saloon times by saloon ID and movie ID - return array
-                mock_saloon_times = [
-                    {
-                        "id": 1,
-                        "movieBeginTime": "14:00",
-                        "movieDate": "2025-10-30",
-                        "saloonName": "CGV Vincom Center",
-                        "movieId": 1,
-                        "saloonId": 1
-                    },
-                    {
-                        "id": 2,
-                        "movieBeginTime": "17:30",
-                        "movieDate": "2025-10-30",
-                        "saloonName": "CGV Vincom Center", 
-                        "movieId": 1,
-                        "saloonId": 1
-                    },
-                    {
-                        "id": 3,
-                        "movieBeginTime": "20:00",
-                        "movieDate": "2025-10-30",
-                        "saloonName": "CGV Vincom Center",
-                        "movieId": 1,
-                        "saloonId": 1
-                    }
-                ]
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps(mock_saloon_times)
-                self.wfile.write(response.encode())
+                # Get movie saloon times by saloon ID and movie ID - return array,
+                # the sample saloon's times for pairs without showtimes
+                path_parts = path.split('/')
+                key = (int_segment(path_parts[-2], 0), int_segment(path_parts[-1], 0))
+                saloon_times = (SALOON_TIMES_BY_SALOON_AND_MOVIE.get(key)
+                                or SALOON_TIMES_BY_SALOON_AND_MOVIE[DEFAULT_SALOON_AND_MOVIE])
+                self.send_json(200, saloon_times)
                 print("✅ Served specific saloon times")
                     
             elif path == '/health':
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                response = json.dumps({"status": "OK", "message": "Mock Backend is running"})
-                self.wfile.write(response.encode())
+                self.send_json(200, {"status": "OK", "message": "Mock Backend is running"})
                 print("✅ Health check")
                 
             else:
-                self.send_response(404)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                self.wfile.write(b'{"error": "Endpoint not found"}')
+                self.send_body(404, b'{"error": "Endpoint not found"}')
                 print(f"❌ Unknown endpoint: {path}")
                 
         except ConnectionAbortedError:
@@ -338,12 +289,7 @@ class MockBackendHandler(BaseHTTPRequestHandler):
             return
         except Exception as e:
             try:
-                self.send_response(500)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                error_response = json.dumps({"error": str(e)})
-                self.wfile.write(error_response.encode())
+                self.send_json(500, {"error": str(e)})
                 print(f"💥 Error: {e}")
             except (ConnectionAbortedError, BrokenPipeError):
                 print("🔌 Client disconnected during error response")
@@ -356,6 +302,7 @@ class MockBackendHandler(BaseHTTPRequestHandler):
             self.send_header('Access-Control-Allow-Origin', '*')
             self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
             self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+            self.send_header('Content-Length', '0')
             self.end_headers()
         except (ConnectionAbortedError, BrokenPipeError):
             print("🔌 Client disconnected during OPTIONS")
@@ -368,52 +315,53 @@ class MockBackendHandler(BaseHTTPRequestHandler):
             print(f"📥 POST request to: {path}")
             
             if path == '/api/movie/payments/sendTicketDetail':
-                # Get the content length and read the request body
-                content_length = int(self.headers['Content-Length'])
-                post_data = self.rfile.read(content_length)
-                
                 try:
-                    # Parse the JSON data
-                    ticket_data = json.loads(post_data.decode('utf-8'))
+                    ticket_data = self.read_json()
                     print(f"🎫 Received ticket data: {ticket_data}")
                     
-                    # Mock successful payment response
+                    try:
+                        showtime = showtime_key(ticket_data)
+                    except ValueError:
+                        showtime = None
+                    if showtime is not None:
+                        with STATE.mutation():
+                            ticket_id, seats = SEATS.book(showtime, ticket_data.get("chairNumbers"))
+                        movie_title = showtime[0]
+                    else:
+                        # No showtime to track the seats against: book them as sent, untracked
+                        ticket_id = f"TK{time.time_ns() // 1000}"
+                        seats = ticket_data.get("chairNumbers", [])
+                        movie_title = ticket_data.get("movieTitle", "Unknown Movie")
                     payment_response = {
                         "success": True,
                         "message": "Ticket booked successfully!",
-                        "ticketId": "TK" + str(int(time.time())),
+                        "ticketId": ticket_id,
                         "bookingDetails": {
-                            "movieTitle": ticket_data.get("movieTitle", "Unknown Movie"),
-                            "seats": ticket_data.get("chairNumbers", []),
+                            "movieTitle": movie_title,
+                            "seats": seats,
                             "totalPrice": ticket_data.get("totalPrice", 0),
                             "bookingTime": time.strftime("%Y-%m-%d %H:%M:%S")
                         }
                     }
                     
-                    self.send_response(200)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    response = json.dumps(payment_response)
-                    self.wfile.write(response.encode())
-                    print("✅ Payment processed successfully")
+                    self.send_json(200, payment_response)
+                    if showtime is not None:
+                        print(f"✅ Ticket {ticket_id} booked: {' '.join(seats)}")
+                    else:
+                        print(f"✅ Ticket {ticket_id} booked without seat tracking: {seats}")
                     
-                except json.JSONDecodeError:
-                    self.send_response(400)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    error_response = json.dumps({"error": "Invalid JSON data"})
-                    self.wfile.write(error_response.encode())
-                    print("❌ Invalid JSON in payment request")
+                except BodyError as e:
+                    self.send_json(e.status, {"error": str(e)})
+                    print(f"❌ Rejected payment request body: {e}")
+                except SeatConflict as e:
+                    self.send_json(409, {"success": False, "message": str(e), "takenSeats": e.seats})
+                    print(f"❌ {e}")
+                except ValueError as e:
+                    self.send_json(400, {"success": False, "message": str(e)})
+                    print(f"❌ Invalid ticket request: {e}")
                     
             else:
-                self.send_response(404)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                error_response = json.dumps({"error": "POST endpoint not found"})
-                self.wfile.write(error_response.encode())
+                self.send_json(404, {"error": "POST endpoint not found"})
                 print(f"❌ Unknown POST endpoint: {path}")
                 
         except (ConnectionAbortedError, BrokenPipeError):
@@ -421,31 +369,47 @@ class MockBackendHandler(BaseHTTPRequestHandler):
             return
         except Exception as e:
             try:
-                self.send_response(500)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                error_response = json.dumps({"error": str(e)})
-                self.wfile.write(error_response.encode())
+                self.send_json(500, {"error": str(e)})
                 print(f"💥 POST Error: {e}")
             except (ConnectionAbortedError, BrokenPipeError):
                 print("🔌 Client disconnected during error response")
                 return
 
-def run_server():
-    server_address = ('localhost', 8080)
-    httpd = HTTPServer(server_address, MockBackendHandler)
+def run_server(options=None):
+    if options is None:
+        options = serving.build_arg_parser().parse_args([])
+    server_address = (options.host, options.port)
+
+    def make_httpd(sock=None):
+        return serving.make_server(options.mode, server_address, MockBackendHandler,
+                                   threads=options.threads, backlog=options.backlog,
+                                   idle_timeout=options.idle_timeout,
+                                   max_keepalive_requests=options.max_keepalive_requests,
+                                   max_body_size=options.max_body_size, sock=sock)
+
+    if options.workers <= 1:
+        httpd = make_httpd()
     
     print("🚀 Mock Backend Server starting...")
-    print(f"📍 Server running at http://localhost:8080")
+    # The port bound, for --port 0; workers and the asyncio server only bind once they run
+    port = httpd.server_address[1] if options.workers <= 1 else options.port
+    base_url = f"http://{options.host}:{port}"
+    print(f"📍 Server running at {base_url}")
+    print(f"⚙️  Serving mode: {options.mode} (threads={options.threads}, backlog={options.backlog}, "
+          f"workers={options.workers}{', SO_REUSEPORT' if options.reuse_port and options.workers > 1 else ''})")
     print("📺 Available endpoints:")
-    print("   GET http://localhost:8080/api/movie/movies/displayingMovies")
-    print("   GET http://localhost:8080/api/movie/movies/comingSoonMovies") 
-    print("   GET http://localhost:8080/api/movie/movies/{id}")
-    print("   GET http://localhost:8080/health")
+    print(f"   GET {base_url}/api/movie/movies/displayingMovies")
+    print(f"   GET {base_url}/api/movie/movies/comingSoonMovies")
+    print(f"   GET {base_url}/api/movie/movies/{{id}}")
+    print(f"   GET {base_url}/health")
     print("🎬 Frontend should now work at http://localhost:3000")
     print("Press Ctrl+C to stop the server")
     
+    if options.workers > 1:
+        status = workers.Supervisor(options, make_httpd, STATE).run()
+        print("✅ Server stopped")
+        sys.exit(status)
+
     try:
         httpd.serve_forever()
     except KeyboardInterrupt:
@@ -454,4 +418,4 @@ def run_server():
         print("✅ Server stopped")
 
 if __name__ == "__main__":
-    run_server()
\ No newline at end of file
+    run_server(serving.build_arg_parser(__doc__).parse_args())
\ No newline at end of file
@@ -0,0 +1,4 @@
+"""
+Shared building blocks for the CineVision mock backend scripts
+(mock-backend.py and mock-backend-fixed.py).
+"""
@@ -0,0 +1,170 @@
+"""
+Signed tokens for the mock user service.
+
+Login hands out JWTs signed with HMAC, carrying the user's email (``sub``),
+id, roles (``authorities``), issue time and expiry. Routes registered with
+``auth=ROLE`` only run for a request bearing a valid, unexpired token with
+that role:
+
+- 401  no token, a malformed or forged one, or an expired one
+- 403  a valid token without the role
+
+The token is read from an ``Authorization: Bearer`` header or, as the
+frontend sends it, from the ``token`` or ``userAccessToken`` field of the
+JSON body.
+
+The default secret is the user service's ``jwt.secret.key``, so tokens it
+issued verify here too. That service signs with HS512 (its key is longer
+than 64 bytes); HS256, HS384 and HS512 are all accepted, and tokens issued
+here use HS256.
+
+Checking a signature means decoding the token, an HMAC and a JSON parse.
+Tokens that passed are kept in a bounded LRU cache with their claims, so a
+client sending the same token again costs one dict lookup plus the expiry
+check.
+"""
+
+import base64
+import binascii
+import collections
+import hashlib
+import hmac
+import json
+import threading
+import time
+
+DEFAULT_SECRET = 'secret_secret_secret_secret_secret_secret_secret_secret_secret_secret'
+DEFAULT_TTL = 14 * 24 * 3600
+DEFAULT_CACHE_SIZE = 10000
+ALGORITHMS = {'HS256': hashlib.sha256, 'HS384': hashlib.sha384, 'HS512': hashlib.sha512}
+BODY_FIELDS = ('token', 'userAccessToken')
+
+
+class AuthError(Exception):
+    """A request that may not run the route, and the status to answer it with"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+def _decode(segment):
+    return base64.urlsafe_b64decode(segment + b'=' * (-len(segment) % 4))
+
+
+class TokenSigner:
+    def __init__(self, secret=DEFAULT_SECRET, ttl=DEFAULT_TTL, cache_size=DEFAULT_CACHE_SIZE):
+        self._key = secret.encode()
+        self.ttl = ttl
+        self.cache_size = cache_size
+        # token -> claims of tokens whose signature checked out, least recently used first
+        self._verified = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def issue(self, subject, roles, **claims):
+        """Signed HS256 token for subject with roles, valid for ttl seconds from now"""
+        now = int(time.time())
+        header = _encode(b'{"alg":"HS256","typ":"JWT"}')
+        payload = _encode(json.dumps(dict(claims, sub=subject, authorities=list(roles), iat=now,
+                                          exp=now + self.ttl), separators=(',', ':')).encode())
+        signing_input = header + b'.' + payload
+        signature = _encode(hmac.new(self._key, signing_input, hashlib.sha256).digest())
+        return (signing_input + b'.' + signature).decode()
+
+    def _check(self, token):
+        """Claims of a token whose signature is valid; raises AuthError"""
+        try:
+            signing_input, _, signature = token.encode('ascii').rpartition(b'.')
+            header, _, payload = signing_input.partition(b'.')
+            algorithm = ALGORITHMS.get(json.loads(_decode(header)).get('alg'))
+            if algorithm is None:
+                raise AuthError(401, "Unsupported token algorithm")
+            expected = hmac.new(self._key, signing_input, algorithm).digest()
+            if not hmac.compare_digest(expected, _decode(signature)):
+                raise AuthError(401, "Invalid token signature")
+            claims = json.loads(_decode(payload))
+        except (UnicodeError, binascii.Error, ValueError, AttributeError):
+            raise AuthError(401, "Malformed token") from None
+        if not isinstance(claims, dict) or not isinstance(claims.get('exp'), (int, float)):
+            raise AuthError(401, "Token has no expiry")
+        return claims
+
+    def verify(self, token):
+        """Claims of a valid, unexpired token; raises AuthError"""
+        verified = self._verified
+        claims = verified.get(token)
+        if claims is None:
+            claims = self._check(token)
+            with self._lock:
+                verified[token] = claims
+                if len(verified) > self.cache_size:
+                    verified.popitem(last=False)
+        else:
+            try:
+                verified.move_to_end(token)
+            except KeyError:
+                # Evicted by another thread meanwhile
+                pass
+        if claims['exp'] <= time.time():
+            with self._lock:
+                verified.pop(token, None)
+            raise AuthError(401, "Token expired")
+        return claims
+
+    def authorize(self, token, role):
+        """Claims of token if it is valid and grants role; raises AuthError"""
+        if not token:
+            raise AuthError(401, "Authentication required")
+        claims = self.verify(token)
+        if role not in _roles(claims.get('authorities')):
+            raise AuthError(403, f"{role} role required")
+        return claims
+
+
+def _roles(authorities):
+    """Role names of an authorities claim, plain strings or Spring's {"authority": name}"""
+    roles = set()
+    for authority in authorities or ():
+        if isinstance(authority, dict):
+            authority = authority.get('authority')
+        if isinstance(authority, str):
+            roles.add(authority.removeprefix('ROLE_'))
+    return roles
+
+
+def bearer_token(headers):
+    """Token of an Authorization: Bearer header, None without one"""
+    scheme, _, token = (headers.get('Authorization') or '').strip().partition(' ')
+    if scheme.lower() == 'bearer' and token.strip():
+        return token.strip()
+    return None
+
+
+def body_token(payload):
+    """Token of the token or userAccessToken field of a JSON body, None without one"""
+    for field in BODY_FIELDS:
+        token = payload.get(field)
+        if isinstance(token, str) and token:
+            return token
+    return None
+
+
+def add_arguments(parser):
+    """Token options for a script's argument parser"""
+    group = parser.add_argument_group('authentication')
+    group.add_argument('--jwt-secret', default=DEFAULT_SECRET, metavar='SECRET',
+                       help="HMAC key of issued and accepted tokens (default: the user service's jwt.secret.key)")
+    group.add_argument('--jwt-ttl', type=int, default=DEFAULT_TTL, metavar='SECONDS',
+                       help=f'lifetime of issued tokens (default: {DEFAULT_TTL})')
+    group.add_argument('--token-cache-size', type=int, default=DEFAULT_CACHE_SIZE, metavar='TOKENS',
+                       help=f'verified tokens kept so they are not checked again (default: {DEFAULT_CACHE_SIZE})')
+    return parser
+
+
+def from_options(options):
+    """TokenSigner for the options added by add_arguments()"""
+    return TokenSigner(options.jwt_secret, options.jwt_ttl, options.token_cache_size)
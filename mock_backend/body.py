@@ -0,0 +1,127 @@
+"""
+Request bodies of POST routes.
+
+A body is announced by Content-Length or sent with chunked transfer
+encoding, and may be at most ``limit`` bytes (``--max-body-size``, or a
+route's ``max_body`` option). A request that breaks the rules gets a
+BodyError carrying the status to answer with:
+
+- 411  a POST with neither Content-Length nor chunked encoding
+- 413  a body over the limit; a Content-Length over it is refused before
+       reading anything, a chunked body as soon as a chunk would cross it
+- 400  a malformed Content-Length or chunk, or a body that is not a JSON
+       object when one is expected
+
+Bodies are read into a bytearray kept per thread and grown up to the
+largest body seen, so serving a POST does not allocate a fresh buffer for
+it. parse_json() decodes straight from that buffer, with orjson when it is
+installed and the json module otherwise.
+"""
+
+import json
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DEFAULT_MAX_BODY_SIZE = 1024 * 1024
+_INITIAL_BUFFER = 16 * 1024
+# Longest chunk size line accepted, extensions included
+_MAX_CHUNK_LINE = 1024
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+
+_local = threading.local()
+
+
+class BodyError(Exception):
+    """A request body that cannot be accepted, and the status to answer it with"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _buffer(size, keep=0):
+    """This thread's buffer, at least size bytes long, with its first keep bytes preserved"""
+    buffer = getattr(_local, 'buffer', None)
+    if buffer is None or len(buffer) < size:
+        grown = bytearray(max(size, 2 * len(buffer) if buffer else _INITIAL_BUFFER))
+        if keep:
+            grown[:keep] = buffer[:keep]
+        buffer = _local.buffer = grown
+    return buffer
+
+
+def _read_exactly(rfile, view):
+    filled = 0
+    while filled < len(view):
+        count = rfile.readinto(view[filled:])
+        if not count:
+            raise BodyError(400, "Request body ended early")
+        filled += count
+
+
+def _read_chunked(rfile, limit):
+    size = 0
+    while True:
+        line = rfile.readline(_MAX_CHUNK_LINE + 2)
+        if not line.endswith(b'\n'):
+            raise BodyError(400, "Malformed chunk size line")
+        try:
+            length = int(line.split(b';', 1)[0].strip(), 16)
+        except ValueError:
+            raise BodyError(400, "Malformed chunk size") from None
+        if length < 0:
+            raise BodyError(400, "Malformed chunk size")
+        if not length:
+            break
+        if size + length > limit:
+            raise BodyError(413, f"Request body is larger than {limit} bytes")
+        buffer = _buffer(size + length, size)
+        _read_exactly(rfile, memoryview(buffer)[size:size + length])
+        size += length
+        if rfile.readline(3) not in (b'\r\n', b'\n'):
+            raise BodyError(400, "Malformed chunk")
+    # Trailer fields are read and ignored
+    while True:
+        line = rfile.readline(_MAX_CHUNK_LINE + 2)
+        if line in (b'\r\n', b'\n'):
+            break
+        if not line.endswith(b'\n'):
+            raise BodyError(400, "Malformed chunked trailer")
+    return memoryview(_buffer(size, size))[:size]
+
+
+def read(rfile, headers, limit=DEFAULT_MAX_BODY_SIZE, required=True):
+    """Body of a request as a memoryview of this thread's buffer, valid until its next read"""
+    if headers.get('Transfer-Encoding', '').strip().lower() == 'chunked':
+        return _read_chunked(rfile, limit)
+    content_length = headers.get('Content-Length')
+    if content_length is None:
+        if required:
+            raise BodyError(411, "Content-Length required")
+        return memoryview(b'')
+    if not content_length.strip().isdigit():
+        raise BodyError(400, f"Invalid Content-Length {content_length!r}")
+    length = int(content_length)
+    if length > limit:
+        raise BodyError(413, f"Request body is larger than {limit} bytes")
+    view = memoryview(_buffer(length))[:length]
+    _read_exactly(rfile, view)
+    return view
+
+
+def parse_json(data):
+    """Decoded JSON object of a body; raises BodyError when it is not one"""
+    try:
+        if orjson is not None:
+            value = orjson.loads(data)
+        else:
+            value = json.loads(str(data, 'utf-8'))
+    except ValueError:
+        raise BodyError(400, "Invalid JSON data") from None
+    if not isinstance(value, dict):
+        raise BodyError(400, "Expected a JSON object")
+    return value
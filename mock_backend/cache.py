@@ -0,0 +1,206 @@
+"""
+Pre-serialized response cache.
+
+A cached response is the status plus the encoded header lines and body, so a
+hit costs one dict lookup and one write. Every entry records the versions of
+the datasets it was built from; bumping a dataset (after a POST mutated it)
+makes those entries stale without having to know which keys they live under.
+
+    RESPONSES = ResponseCache()
+
+    entry = RESPONSES.get(key)            # None on a miss or a stale entry
+    RESPONSES.put(key, entry, versions)   # versions taken before building
+    RESPONSES.bump('movies')              # after MOCK_MOVIES changed
+
+The cache holds at most ``max_entries`` entries and evicts the least
+recently used one to store another, so keys made of request parameters
+(one entry per page, per date range, ...) cannot grow it without bound.
+A stale entry is dropped as soon as a lookup finds it.
+
+Entries need not be responses: fragment() keeps encoded JSON fragments,
+parts of responses assembled per request, under the same versioning.
+
+Cached responses also carry a strong ETag of their body, computed once when
+the entry is built, so a rebuilt entry (after a bump) gets a new one only if
+its body actually changed.
+
+List routes also keep the encoded bytes of each record they list, in the
+ItemCache of their datasets (``RESPONSES.items(datasets)``). Records are
+keyed by identity, which is safe because a stored record is never modified
+in place: changing one means storing a new dict. An ItemCache moves to a new
+generation when its datasets' versions change, and drops entries that were
+not used during the previous generation, such as deleted records.
+"""
+
+import collections
+import hashlib
+import threading
+
+from mock_backend.streaming import encode_item
+
+DEFAULT_MAX_ENTRIES = 4096
+
+
+class CachedResponse:
+    __slots__ = ('status', 'headers', 'body', 'content_type', 'variants', 'etag', 'last_modified', 'not_modified')
+
+    def __init__(self, status, headers, body, content_type='application/json',
+                 etag=None, last_modified=None, not_modified=b''):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.content_type = content_type
+        # Content-Encoding -> compressed CachedResponse, filled on first use
+        self.variants = {}
+        # Validators of this exact body and the header lines of its 304 response
+        self.etag = etag
+        self.last_modified = last_modified
+        self.not_modified = not_modified
+
+
+def etag_for(body):
+    """Strong ETag of a response body, bytes or Chunks"""
+    if isinstance(body, bytes):
+        return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+    digest = hashlib.blake2b(digest_size=12)
+    for part in body:
+        digest.update(part)
+    return '"' + digest.hexdigest() + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header matches etag (weak comparison, as RFC 9110 asks)"""
+    if if_none_match == etag:
+        return True
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*' or tag.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+def encode_headers(headers):
+    """Header pairs as the bytes BaseHTTPRequestHandler.send_header would buffer"""
+    return b''.join(f"{name}: {value}\r\n".encode('latin-1', 'strict') for name, value in headers)
+
+
+class ItemCache:
+    """Encoded JSON bytes of stored records, keyed by identity"""
+
+    def __init__(self):
+        self._generation = None
+        self._current = {}
+        self._previous = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._current)
+
+    def encoder(self, generation=None):
+        """record -> bytes through the cache; a new generation retires entries unused since the last one"""
+        with self._lock:
+            if generation != self._generation:
+                self._generation = generation
+                self._previous, self._current = self._current, {}
+            current, previous = self._current, self._previous
+
+        def encode(record):
+            key = id(record)
+            # The record is kept in the entry, so its id cannot be reused while cached
+            entry = current.get(key)
+            if entry is None or entry[0] is not record:
+                entry = previous.get(key)
+                if entry is None or entry[0] is not record:
+                    entry = (record, encode_item(record))
+                current[key] = entry
+            return entry[1]
+        return encode
+
+
+class ResponseCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # key -> (entry, versions), least recently used first
+        self._entries = collections.OrderedDict()
+        self._versions = {}
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def versions(self, datasets):
+        """Current versions of datasets, to be passed to put() after building"""
+        versions = self._versions
+        return tuple((name, versions.get(name, 0)) for name in datasets)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entries = self._entries
+        cached = entries.get(key)
+        if cached is None:
+            return None
+        entry, versions = cached
+        current = self._versions
+        for name, version in versions:
+            if current.get(name, 0) != version:
+                with self._lock:
+                    if entries.get(key) is cached:
+                        del entries[key]
+                return None
+        try:
+            entries.move_to_end(key)
+        except KeyError:
+            # Evicted by another thread meanwhile
+            pass
+        return entry
+
+    def put(self, key, entry, versions):
+        # A response built from data that changed meanwhile must not be stored
+        with self._lock:
+            current = self._versions
+            if all(current.get(name, 0) == version for name, version in versions):
+                entries = self._entries
+                entries[key] = (entry, versions)
+                entries.move_to_end(key)
+                while len(entries) > self.max_entries:
+                    entries.popitem(last=False)
+
+    def bump(self, *datasets):
+        """Mark datasets as changed, every entry built from them goes stale"""
+        with self._lock:
+            for name in datasets:
+                self._versions[name] = self._versions.get(name, 0) + 1
+
+    def fragment(self, key, datasets, build):
+        """Encoded JSON fragment stored under key, build(encoder) makes it when missing or stale
+
+        The encoder is the datasets' ItemCache.encoder(), for the records the fragment lists.
+        """
+        fragment = self.get(key)
+        if fragment is None:
+            versions = self.versions(datasets)
+            fragment = build(self.items(datasets).encoder(versions))
+            self.put(key, fragment, versions)
+        return fragment
+
+    def items(self, datasets):
+        """ItemCache shared by the lists built from datasets"""
+        items = self._items.get(datasets)
+        if items is None:
+            with self._lock:
+                items = self._items.setdefault(datasets, ItemCache())
+        return items
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._items.clear()
+
+
+def add_arguments(parser):
+    """Response cache options for a script's argument parser"""
+    group = parser.add_argument_group('response cache')
+    group.add_argument('--response-cache-size', type=int, default=DEFAULT_MAX_ENTRIES, metavar='ENTRIES',
+                       help=f'cached responses and fragments kept, least recently used evicted first '
+                            f'(default: {DEFAULT_MAX_ENTRIES})')
+    return parser
@@ -0,0 +1,319 @@
+"""
+Record and replay of upstream traffic.
+
+``--record FILE --upstream URL`` turns the mock into a proxy: every request
+the mock does not answer itself is forwarded to the upstream (a local
+movieService or the API gateway). Each answer is passed back to the client
+and stored in FILE. ``--replay FILE`` serves the stored answers, and
+requests that were never recorded fall through to the mock's own routes.
+
+Answers are looked up by method, path and query string, with the query
+parameters sorted; request bodies are not part of the key. When the same
+request was recorded several times, the last answer wins. Forwarding blocks
+the thread that makes it, so record with the threaded mode and one worker.
+
+The capture file is one append-only file:
+
+    b'MOCKCAP\\x01'
+    records   <HHHI key length, status, content type length, body length>
+              key, content type, body
+    index     <QQ key hash, record offset> per distinct key, sorted
+    footer    <QQ8s index offset, index entries, b'MOCKIDX\\x01'>
+
+A key or content type longer than 65535 bytes does not fit a record; such
+an answer is still passed to the client, but not recorded.
+
+The index and footer are written when recording stops; recording again
+into the same file strips them and appends. Replay maps the file with mmap
+and finds a key by binary search of the index, reading only the pages that
+hold the entries it probes and the record it returns. A large capture is
+never loaded into memory; worker processes share one copy in the page
+cache. A file whose recording was cut short has no index: replay builds one
+in memory by scanning the records once.
+"""
+
+import bisect
+import hashlib
+import http.client
+import mmap
+import os
+import struct
+import threading
+import urllib.parse
+
+from mock_backend import log
+
+MAGIC = b'MOCKCAP\x01'
+INDEX_MAGIC = b'MOCKIDX\x01'
+CAPTURED = '<captured>'
+_RECORD = struct.Struct('<HHHI')
+_ENTRY = struct.Struct('<QQ')
+_FOOTER = struct.Struct('<QQ8s')
+# Largest key and content type, and largest body, the length fields of a record hold
+_MAX_FIELD = 0xFFFF
+_MAX_BODY = 0xFFFFFFFF
+# Never forwarded upstream: they describe the client's connection to the mock
+_HOP_BY_HOP = frozenset({'connection', 'keep-alive', 'transfer-encoding', 'te', 'upgrade', 'host',
+                         'proxy-connection', 'accept-encoding', 'content-length', 'if-none-match'})
+
+
+def request_key(method, target):
+    """Lookup key of a request: method, path and the query with its parameters sorted"""
+    path, _, query = target.partition('?')
+    if query:
+        query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(query, keep_blank_values=True)))
+        return f'{method} {path}?{query}'.encode()
+    return f'{method} {path}'.encode()
+
+
+def _key_hash(key):
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+
+def _scan(view, start, end):
+    """(key, offset) of every complete record in view[start:end]"""
+    offset = start
+    while offset + _RECORD.size <= end:
+        key_length, _, type_length, body_length = _RECORD.unpack_from(view, offset)
+        size = _RECORD.size + key_length + type_length + body_length
+        if offset + size > end:
+            break
+        yield bytes(view[offset + _RECORD.size:offset + _RECORD.size + key_length]), offset
+        offset += size
+
+
+def _footer(view):
+    """(index offset, entries) of a finished capture, None when it has no index"""
+    if len(view) < len(MAGIC) + _FOOTER.size:
+        return None
+    index_offset, entries, magic = _FOOTER.unpack_from(view, len(view) - _FOOTER.size)
+    if magic != INDEX_MAGIC or index_offset + entries * _ENTRY.size + _FOOTER.size != len(view):
+        return None
+    return index_offset, entries
+
+
+def _records_end(path):
+    """Offset where records end and {key: offset} of the last record of each key"""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a capture file")
+        footer = _footer(data)
+        end = len(MAGIC)
+        offsets = {}
+        for key, offset in _scan(data, len(MAGIC), footer[0] if footer else len(data)):
+            offsets[key] = offset
+            key_length, _, type_length, body_length = _RECORD.unpack_from(data, offset)
+            # Past the last complete record, dropping one cut short by a crash
+            end = offset + _RECORD.size + key_length + type_length + body_length
+    return end, offsets
+
+
+class CaptureWriter:
+    """Append answers to a capture file; close() writes the index"""
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path) and os.path.getsize(path):
+            end, self._offsets = _records_end(path)
+            # Unbuffered: each record is one write, so a killed recorder loses none
+            self._file = open(path, 'r+b', buffering=0)
+            self._file.truncate(end)
+            self._file.seek(end)
+        else:
+            self._offsets = {}
+            self._file = open(path, 'wb', buffering=0)
+            self._file.write(MAGIC)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def add(self, method, target, status, content_type, body):
+        """Append an answer; returns False, storing nothing, when it does not fit a record"""
+        key = request_key(method, target)
+        content_type = content_type.encode('latin-1')
+        if len(key) > _MAX_FIELD or len(content_type) > _MAX_FIELD or len(body) > _MAX_BODY:
+            return False
+        record = b''.join((_RECORD.pack(len(key), status, len(content_type), len(body)), key, content_type, body))
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(record)
+            self._offsets[key] = offset
+        return True
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            index_offset = self._file.tell()
+            entries = sorted((_key_hash(key), offset) for key, offset in self._offsets.items())
+            self._file.write(b''.join(_ENTRY.pack(*entry) for entry in entries))
+            self._file.write(_FOOTER.pack(index_offset, len(entries), INDEX_MAGIC))
+            self._file.close()
+
+
+class CaptureReader:
+    """Answers of a capture file, looked up through the mmap'd index"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        if view[:len(MAGIC)] != MAGIC:
+            view.release()
+            self._map.close()
+            raise ValueError(f"{path} is not a capture file")
+        footer = _footer(view)
+        if footer is not None:
+            index_offset, entries = footer
+            index = view[index_offset:index_offset + entries * _ENTRY.size].cast('Q')
+        else:
+            offsets = {key: offset for key, offset in _scan(view, len(MAGIC), len(view))}
+            index = memoryview(b''.join(_ENTRY.pack(*entry) for entry in sorted(
+                (_key_hash(key), offset) for key, offset in offsets.items()))).cast('Q')
+        self.indexed = footer is not None
+        self._view = view
+        # Strided views of the interleaved index, searched in place
+        self._hashes = index[0::2]
+        self._offsets = index[1::2]
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def get(self, method, target):
+        """(status, content type, body) recorded for a request, None when there is none"""
+        key = request_key(method, target)
+        key_hash = _key_hash(key)
+        hashes = self._hashes
+        position = bisect.bisect_left(hashes, key_hash)
+        view = self._view
+        while position < len(hashes) and hashes[position] == key_hash:
+            offset = self._offsets[position]
+            key_length, status, type_length, body_length = _RECORD.unpack_from(view, offset)
+            start = offset + _RECORD.size
+            if view[start:start + key_length] == key:
+                start += key_length
+                content_type = bytes(view[start:start + type_length]).decode('latin-1')
+                start += type_length
+                return status, content_type, bytes(view[start:start + body_length])
+            position += 1
+        return None
+
+    def close(self):
+        self._hashes.release()
+        self._offsets.release()
+        self._view.release()
+        self._map.close()
+
+
+class Recorder:
+    """Forward requests to an upstream and record the answers"""
+
+    def __init__(self, path, upstream, timeout=30.0):
+        parts = urllib.parse.urlsplit(upstream)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"Upstream must be an http(s) URL, got {upstream!r}")
+        self.upstream = parts
+        self.timeout = timeout
+        self.writer = CaptureWriter(path)
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            factory = http.client.HTTPSConnection if self.upstream.scheme == 'https' else http.client.HTTPConnection
+            connection = self._local.connection = factory(self.upstream.hostname, self.upstream.port,
+                                                          timeout=self.timeout)
+        return connection
+
+    def forward(self, method, target, headers, body):
+        """(status, content type, body) of the upstream's answer"""
+        headers = {name: value for name, value in headers.items() if name.lower() not in _HOP_BY_HOP}
+        # Store plain bodies; the mock compresses them itself when serving
+        headers['Accept-Encoding'] = 'identity'
+        target = self.upstream.path.rstrip('/') + target
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request(method, target, body, headers)
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (ConnectionError, http.client.RemoteDisconnected, http.client.BadStatusLine):
+                # A kept-alive connection the upstream closed: retry once on a new one
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+            except (OSError, http.client.HTTPException):
+                # A timeout or a malformed answer leaves the connection mid-response
+                connection.close()
+                self._local.connection = None
+                raise
+        return response.status, response.getheader('Content-Type', 'application/json'), data
+
+    def handle(self, handler, route):
+        """Proxy and record a request; always answers it"""
+        handler.begin_route(route.template if route is not None else CAPTURED)
+        body = handler.read_body() if handler.command != 'GET' else None
+        try:
+            status, content_type, data = self.forward(handler.command, handler.path, handler.headers, body)
+        except (OSError, http.client.HTTPException) as e:
+            handler.send_json(502, {"error": f"Upstream unavailable: {e}"})
+            return True
+        if not self.writer.add(handler.command, handler.path, status, content_type, data):
+            handler.log_event(log.WARNING, 'Answer too large to record', method=handler.command,
+                              target=handler.path[:200], bytes=len(data))
+        handler.send_body(status, data, content_type)
+        return True
+
+    def close(self):
+        self.writer.close()
+
+
+class Replayer:
+    """Answer requests from a capture file"""
+
+    def __init__(self, path):
+        self.reader = CaptureReader(path)
+
+    def handle(self, handler, route):
+        """Answer a recorded request and return True, False when it was not recorded"""
+        answer = self.reader.get(handler.command, handler.path)
+        if answer is None:
+            return False
+        template = route.template if route is not None else CAPTURED
+        handler.begin_route(template)
+        if handler.command != 'GET':
+            handler.read_body()
+        if handler.inject_faults(template):
+            return True
+        status, content_type, data = answer
+        handler.send_body(status, data, content_type)
+        return True
+
+    def close(self):
+        self.reader.close()
+
+
+def add_arguments(parser):
+    """Record and replay options for a script's argument parser"""
+    group = parser.add_argument_group('record and replay')
+    modes = group.add_mutually_exclusive_group()
+    modes.add_argument('--record', metavar='FILE', help='proxy to --upstream and record the answers into FILE')
+    modes.add_argument('--replay', metavar='FILE', help='answer the requests recorded in FILE')
+    group.add_argument('--upstream', metavar='URL', help='service to proxy to in --record mode, '
+                                                         'e.g. http://localhost:8081')
+    return parser
+
+
+def from_options(options):
+    """Recorder, Replayer or None for the options added by add_arguments(); raises OSError or ValueError"""
+    if options.record:
+        if not options.upstream:
+            raise ValueError("--record needs --upstream")
+        return Recorder(options.record, options.upstream)
+    if options.replay:
+        return Replayer(options.replay)
+    return None
@@ -0,0 +1,106 @@
+"""
+In-memory comments store.
+
+Comments are kept per movie in a list ordered by commentId, which is also
+insertion order since new comments get the next id. That gives the paging of
+the movie service (``PageRequest.of(pageNo - 1, pageSize)`` over the
+repository's natural order) as a plain slice, O(pageSize) whatever the page
+number, and the count as ``len()``. Deleting bisects the movie's list for the
+id, so only the pointer shift of ``del`` grows with the number of comments.
+
+Records follow the movie service's Comment entity: commentId, commentText,
+commentBy and commentByUserId, plus movieId and createdAt. Records in the
+older mock shape (id, content, user.name) are converted when loaded.
+"""
+
+import bisect
+import operator
+import threading
+import time
+
+_COMMENT_ID = operator.itemgetter('commentId')
+
+
+def comment_record(record):
+    """A loaded record in the Comment entity shape"""
+    user = record.get('user') or {}
+    return {
+        "commentId": record['commentId'] if 'commentId' in record else record.get('id'),
+        "commentText": record.get('commentText', record.get('content', '')),
+        "commentBy": record.get('commentBy', user.get('name', '')),
+        "commentByUserId": record.get('commentByUserId', ''),
+        "movieId": record.get('movieId'),
+        "createdAt": record.get('createdAt', ''),
+    }
+
+
+class CommentStore:
+    def __init__(self, comments=()):
+        self._by_movie = {}
+        self._movie_of = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        for record in comments:
+            comment = comment_record(record)
+            comment_id = comment['commentId']
+            if not isinstance(comment_id, int):
+                raise ValueError(f"commentId must be an integer, got {comment_id!r}")
+            if comment_id in self._movie_of:
+                raise ValueError(f"Duplicate commentId {comment_id}")
+            self._movie_of[comment_id] = comment['movieId']
+            self._by_movie.setdefault(comment['movieId'], []).append(comment)
+            self._next_id = max(self._next_id, comment_id + 1)
+        for group in self._by_movie.values():
+            group.sort(key=_COMMENT_ID)
+
+    def __len__(self):
+        return len(self._movie_of)
+
+    def count(self, movie_id):
+        return len(self._by_movie.get(movie_id, ()))
+
+    def for_movie(self, movie_id):
+        return self._by_movie.get(movie_id, [])[:]
+
+    def page(self, movie_id, page_no, page_size):
+        """Comments on page page_no (1-based) of page_size comments"""
+        if page_no < 1 or page_size < 1:
+            raise ValueError("pageNo and pageSize must be at least 1")
+        start = (page_no - 1) * page_size
+        return self._by_movie.get(movie_id, [])[start:start + page_size]
+
+    def add(self, movie_id, comment_text, comment_by, comment_by_user_id):
+        with self._lock:
+            comment = {
+                "commentId": self._next_id,
+                "commentText": comment_text,
+                "commentBy": comment_by,
+                "commentByUserId": comment_by_user_id,
+                "movieId": movie_id,
+                "createdAt": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            self._next_id += 1
+            self._movie_of[comment['commentId']] = movie_id
+            self._by_movie.setdefault(movie_id, []).append(comment)
+        return comment
+
+    def restore(self, comment):
+        """Add a comment returned by add() on another store, keeping its commentId"""
+        with self._lock:
+            comment_id = comment['commentId']
+            self._next_id = max(self._next_id, comment_id + 1)
+            self._movie_of[comment_id] = comment['movieId']
+            group = self._by_movie.setdefault(comment['movieId'], [])
+            group.insert(bisect.bisect_left(group, comment_id, key=_COMMENT_ID), comment)
+        return comment
+
+    def delete(self, comment_id):
+        """Remove a comment, returns it or None when there is no such comment"""
+        with self._lock:
+            if comment_id not in self._movie_of:
+                return None
+            group = self._by_movie[self._movie_of.pop(comment_id)]
+            position = bisect.bisect_left(group, comment_id, key=_COMMENT_ID)
+            comment = group[position]
+            del group[position]
+        return comment
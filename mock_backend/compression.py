@@ -0,0 +1,145 @@
+"""
+Response compression negotiated from Accept-Encoding.
+
+gzip is always available; brotli (``br``) and zstd are offered when the
+``brotli`` and ``zstandard`` packages are installed. Among the codings a
+client accepts with the highest q-value, the server prefers br, then zstd,
+then gzip. Bodies below ``min_size`` bytes are sent as they are, since
+headers and framing would eat the gain.
+
+Compressed bodies are variants of a CachedResponse, kept on the entry under
+their coding. An entry that lives in the ResponseCache is compressed once
+per coding, the first time a client asks for it; later hits write the
+stored bytes. Responses that are not cached are compressed per request.
+Either way the compression runs on the request's thread (on the event loop
+in asyncio mode), so every coding uses a fast level by default: br 5,
+zstd 3, gzip 6. ``--compress-level br=9`` trades latency for bytes.
+
+Every codec compresses as a stream, so a list body made of Chunks (see
+mock_backend.streaming) is compressed part by part without being joined.
+"""
+
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_MIN_SIZE = 1024
+_NEGOTIATED_LIMIT = 256
+
+
+class _BrotliStream:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.finish()
+
+
+# coding -> (compressor(level) with compress(data) and flush(), default level, (lowest, highest) level)
+CODECS = {}
+if brotli is not None:
+    CODECS['br'] = (_BrotliStream, 5, (0, 11))
+if zstandard is not None:
+    CODECS['zstd'] = (lambda level: zstandard.ZstdCompressor(level=level).compressobj(), 3, (1, 22))
+# wbits 31: a gzip member, with no file name and a zero mtime
+CODECS['gzip'] = (lambda level: zlib.compressobj(level, zlib.DEFLATED, 31), 6, (1, 9))
+
+
+def parse_accept_encoding(header):
+    """{coding: q} of an Accept-Encoding header, codings lowercased"""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+class Compressor:
+    def __init__(self, encodings=None, min_size=DEFAULT_MIN_SIZE, levels=None):
+        self.encodings = tuple(CODECS) if encodings is None else tuple(e for e in CODECS if e in encodings)
+        self.min_size = min_size
+        self.levels = {coding: codec[1] for coding, codec in CODECS.items()}
+        self.levels.update(levels or {})
+        self._negotiated = {}
+
+    def negotiate(self, accept_encoding):
+        """Coding to use for a request's Accept-Encoding header, None for identity"""
+        try:
+            return self._negotiated[accept_encoding]
+        except KeyError:
+            pass
+        accepted = parse_accept_encoding(accept_encoding or '')
+        wildcard = accepted.get('*', 0.0)
+        best, best_q = None, 0.0
+        for coding in self.encodings:
+            q = accepted.get(coding, wildcard)
+            if q > best_q:
+                best, best_q = coding, q
+        # Clients send a handful of distinct headers; bound the memo anyway
+        if len(self._negotiated) < _NEGOTIATED_LIMIT:
+            self._negotiated[accept_encoding] = best
+        return best
+
+    def compress(self, data, coding):
+        """Compressed bytes of a body, bytes or Chunks"""
+        stream = CODECS[coding][0](self.levels[coding])
+        if isinstance(data, bytes):
+            return stream.compress(data) + stream.flush()
+        out = [stream.compress(part) for part in data]
+        out.append(stream.flush())
+        return b''.join(out)
+
+
+def _level(text):
+    """'br=5' -> ('br', 5), for a coding available here and a level it supports"""
+    coding, _, value = text.partition('=')
+    if coding not in CODECS:
+        raise ValueError(text)
+    lowest, highest = CODECS[coding][2]
+    level = int(value)
+    if not lowest <= level <= highest:
+        raise ValueError(text)
+    return coding, level
+
+
+def add_arguments(parser):
+    """Compression options for a script's argument parser"""
+    group = parser.add_argument_group('compression')
+    group.add_argument('--compression', nargs='*', metavar='CODING', choices=list(CODECS),
+                       help=f"codings to offer (available here: {' '.join(CODECS)}); "
+                            f"no value turns compression off (default: all available)")
+    group.add_argument('--compress-min-size', type=int, default=DEFAULT_MIN_SIZE, metavar='BYTES',
+                       help=f'smallest body that gets compressed (default: {DEFAULT_MIN_SIZE})')
+    defaults = ', '.join(f'{coding}={codec[1]} ({codec[2][0]}-{codec[2][1]})' for coding, codec in CODECS.items())
+    group.add_argument('--compress-level', type=_level, action='append', default=[], metavar='CODING=LEVEL',
+                       help=f'compression level of a coding, repeatable (default: {defaults})')
+    return parser
+
+
+def from_options(options):
+    """Compressor for the options added by add_arguments(), None when compression is off"""
+    if options.compression is not None and not options.compression:
+        return None
+    return Compressor(options.compression, options.compress_min_size, dict(options.compress_level))
@@ -0,0 +1,374 @@
+"""
+Data layer for the mock backend.
+
+Every route reads from a DataLayer, which is built once at startup from a
+source:
+
+- ``MemorySource``    lists held by the script (the built-in sample data)
+- ``FixtureSource``   ``<collection>.json`` (a list) or ``<collection>.ndjson``
+                      (one record per line) files in a directory; a collection
+                      without a file falls back to the built-in data
+- ``SyntheticSource`` a deterministic catalog of any size generated from a
+                      seed, e.g. ``--synthetic movies=50000,saloons=2000,saloon_times=2000000``
+
+Sources yield records one at a time and the layer indexes them as they come,
+so neither NDJSON fixtures nor the generator ever hold a whole collection as
+an intermediate list. Showtimes, which run into the millions, go into a
+columnar ShowtimeStore and only become dicts for a response.
+
+Collections and the fields the layer relies on:
+
+    movies, coming_soon   MOCK_MOVIES records (id / movieId, ...)
+    cities                cityId, cityName
+    saloons               saloonId, saloonName, cityId
+    actors, directors,
+    categories            id, name, ...
+    movie_actors          movieId, id, name, character
+    comments              movieId, commentId, commentText, commentBy, commentByUserId, createdAt
+    saloon_times          id, movieId, saloonId, movieDate, movieBeginTime
+"""
+
+import datetime
+import json
+import random
+from pathlib import Path
+
+from mock_backend.comments import CommentStore
+from mock_backend.movies import MovieStore
+from mock_backend.showtimes import ShowtimeStore
+
+
+class MemorySource:
+    def __init__(self, collections):
+        self.collections = collections
+
+    def records(self, name):
+        return iter(self.collections.get(name, ()))
+
+
+class FixtureSource:
+    def __init__(self, directory, fallback=None):
+        self.directory = Path(directory)
+        self.fallback = fallback
+        if not self.directory.is_dir():
+            raise ValueError(f"Fixture directory not found: {directory}")
+
+    def records(self, name):
+        ndjson = self.directory / f'{name}.ndjson'
+        if ndjson.exists():
+            return _read_ndjson(ndjson)
+        plain = self.directory / f'{name}.json'
+        if plain.exists():
+            return _read_json(plain)
+        if self.fallback is not None:
+            return self.fallback.records(name)
+        return iter(())
+
+
+def _read_ndjson(path):
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: {e}") from None
+
+
+def _read_json(path):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"{path}: expected a JSON list")
+    yield from data
+
+
+SYNTHETIC_SIZES = {
+    'movies': 1000,
+    'cities': 20,
+    'saloons': 100,
+    'actors': 500,
+    'directors': 200,
+    'actors_per_movie': 5,
+    'comments': 10000,
+    'saloon_times': 50000,
+}
+
+_CITY_NAMES = ['Hà Nội', 'Hồ Chí Minh', 'Đà Nẵng', 'Hải Phòng', 'Cần Thơ', 'Huế', 'Nha Trang', 'Vũng Tàu']
+_CHAINS = ['CGV', 'Galaxy Cinema', 'Lotte Cinema', 'BHD Star', 'Cinestar', 'Mega GS', 'Beta Cinemas']
+_CATEGORIES = ['Action', 'Adventure', 'Animation', 'Comedy', 'Crime', 'Drama', 'Fantasy', 'Horror',
+               'Mystery', 'Romance', 'Sci-Fi', 'Thriller']
+_FIRST_NAMES = ['An', 'Bình', 'Châu', 'Dung', 'Giang', 'Hà', 'Khoa', 'Linh', 'Minh', 'Nam', 'Phương',
+                'Quân', 'Thảo', 'Trang', 'Tuấn', 'Vy']
+_LAST_NAMES = ['Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Huỳnh', 'Phan', 'Vũ', 'Võ', 'Đặng']
+_TITLE_WORDS = ['Last', 'Dark', 'Silent', 'Lost', 'Red', 'Iron', 'Broken', 'Hidden', 'Golden', 'Final',
+                'City', 'Empire', 'River', 'Storm', 'Echo', 'Horizon', 'Shadow', 'Kingdom', 'Signal', 'Orbit']
+_COMMENTS = ['Phim tuyệt vời! Rất khuyến khích xem.', 'Hiệu ứng hình ảnh và cốt truyện tuyệt vời.',
+             'Phim hay, diễn viên diễn xuất rất tốt!', 'Cảnh hành động kịch tính, đáng xem.',
+             'Hơi dài nhưng vẫn đáng tiền.', 'Nhạc phim rất hay.']
+_BEGIN_TIMES = ['10:00', '13:00', '14:00', '16:00', '16:30', '19:00', '22:00']
+# Generated dates are relative to a fixed day so that a seed always gives the same catalog
+_BASE_DATE = datetime.date(2026, 1, 1)
+
+
+def _actor_name(actor_id):
+    return (f'{_LAST_NAMES[actor_id % len(_LAST_NAMES)]} '
+            f'{_FIRST_NAMES[actor_id * 7 % len(_FIRST_NAMES)]} {actor_id}')
+
+
+def parse_sizes(text):
+    """'movies=50000,saloons=2000' -> SYNTHETIC_SIZES with those entries replaced"""
+    sizes = dict(SYNTHETIC_SIZES)
+    for item in filter(None, (part.strip() for part in (text or '').split(','))):
+        name, _, value = item.partition('=')
+        if name not in sizes:
+            raise ValueError(f"Unknown synthetic collection '{name}' (known: {', '.join(sizes)})")
+        try:
+            sizes[name] = int(value)
+        except ValueError:
+            raise ValueError(f"Size of '{name}' must be an integer, got '{value}'") from None
+    return sizes
+
+
+class SyntheticSource:
+    """Deterministic generated catalog; every collection has its own seeded generator"""
+
+    def __init__(self, seed=0, sizes=None):
+        self.seed = seed
+        self.sizes = dict(SYNTHETIC_SIZES, **(sizes or {}))
+
+    def _random(self, name):
+        return random.Random(f'{self.seed}:{name}')
+
+    def _person(self, rng):
+        return f'{rng.choice(_LAST_NAMES)} {rng.choice(_FIRST_NAMES)}'
+
+    def records(self, name):
+        generate = getattr(self, f'_{name}', None)
+        if generate is None:
+            return iter(())
+        return generate(self._random(name))
+
+    def _movies(self, rng):
+        directors = self.sizes['directors']
+        for movie_id in range(1, self.sizes['movies'] + 1):
+            title = ' '.join(rng.sample(_TITLE_WORDS, rng.randint(1, 3)))
+            category = ', '.join(rng.sample(_CATEGORIES, rng.randint(1, 3)))
+            director = f'Director {rng.randint(1, max(directors, 1))}'
+            release_date = (_BASE_DATE + datetime.timedelta(days=rng.randint(-3650, 365))).isoformat()
+            duration = rng.randint(80, 190)
+            image = f'https://picsum.photos/seed/movie{movie_id}/500/750'
+            trailer = f'https://www.youtube.com/embed/mock{movie_id}?autoplay=0'
+            description = f'{title}: synthetic movie #{movie_id}.'
+            yield {
+                "id": movie_id,
+                "movieId": movie_id,
+                "movieName": f'{title} {movie_id}',
+                "moviePoster": image,
+                "movieImageUrl": image,
+                "description": description,
+                "movieDescription": description,
+                "movieTrailerUrl": trailer,
+                "movieTrailer": trailer,
+                "directorName": director,
+                "movieDirector": director,
+                "releaseDate": release_date,
+                "movieReleaseDate": release_date,
+                "duration": duration,
+                "movieDuration": duration,
+                "categoryName": category,
+                "movieCategory": category,
+                "rating": round(rng.uniform(5.0, 9.5), 1)
+            }
+
+    def _coming_soon(self, rng):
+        # Same generator as movies (its own seed), keeping the unreleased ones
+        today = _BASE_DATE.isoformat()
+        for movie in self._movies(self._random('movies')):
+            if movie['releaseDate'] > today:
+                yield movie
+
+    def _cities(self, rng):
+        for city_id in range(1, self.sizes['cities'] + 1):
+            name = _CITY_NAMES[city_id - 1] if city_id <= len(_CITY_NAMES) else f'City {city_id}'
+            yield {"cityId": city_id, "cityName": name}
+
+    def _saloons(self, rng):
+        cities = max(self.sizes['cities'], 1)
+        for saloon_id in range(1, self.sizes['saloons'] + 1):
+            yield {"saloonId": saloon_id, "saloonName": f'{rng.choice(_CHAINS)} {saloon_id}',
+                   "cityId": rng.randint(1, cities)}
+
+    def _actors(self, rng):
+        for actor_id in range(1, self.sizes['actors'] + 1):
+            name = _actor_name(actor_id)
+            yield {"id": actor_id, "name": name, "actorName": name}
+
+    def _directors(self, rng):
+        for director_id in range(1, self.sizes['directors'] + 1):
+            name = f'Director {director_id}'
+            yield {"id": director_id, "name": name, "directorName": name}
+
+    def _categories(self, rng):
+        for category_id, name in enumerate(_CATEGORIES, 1):
+            yield {"id": category_id, "name": name, "categoryName": name}
+
+    def _movie_actors(self, rng):
+        actors = self.sizes['actors']
+        per_movie = min(self.sizes['actors_per_movie'], actors)
+        for movie_id in range(1, self.sizes['movies'] + 1):
+            for actor_id in rng.sample(range(1, actors + 1), per_movie):
+                yield {"movieId": movie_id, "id": actor_id, "name": _actor_name(actor_id),
+                       "character": f'Character {rng.randint(1, 99)}'}
+
+    def _comments(self, rng):
+        movies = self.sizes['movies']
+        for comment_id in range(1, self.sizes['comments'] + 1):
+            created = _BASE_DATE - datetime.timedelta(days=rng.randint(0, 365))
+            yield {"movieId": rng.randint(1, movies), "commentId": comment_id, "commentText": rng.choice(_COMMENTS),
+                   "commentBy": self._person(rng), "commentByUserId": f'user{rng.randint(1, 10000)}',
+                   "createdAt": created.isoformat()}
+
+    def _saloon_times(self, rng):
+        movies = self.sizes['movies']
+        saloons = self.sizes['saloons']
+        dates = [(_BASE_DATE + datetime.timedelta(days=day)).isoformat() for day in range(14)]
+        for showtime_id in range(1, self.sizes['saloon_times'] + 1):
+            yield {"id": showtime_id, "movieId": rng.randint(1, movies), "saloonId": rng.randint(1, saloons),
+                   "movieDate": rng.choice(dates), "movieBeginTime": rng.choice(_BEGIN_TIMES)}
+
+
+def _index_by(records, field, collection):
+    """records keyed by field, ValueError for a record without it"""
+    index = {}
+    for position, record in enumerate(records):
+        if not isinstance(record, dict) or field not in record:
+            raise ValueError(f"{collection}: record {position} has no '{field}'")
+        index[record[field]] = record
+    return index
+
+
+def _group_by_movie(records):
+    groups = {}
+    for record in records:
+        groups.setdefault(record.get('movieId'), []).append(record)
+    return {movie_id: tuple(group) for movie_id, group in groups.items()}
+
+
+class DataLayer:
+    """Read-only views of one dataset, grouped the way the routes ask for them
+
+    Collections are tuples and every per-key lookup returns a precomputed
+    tuple, so serving a route allocates nothing but the response. Admin
+    mutations replace a collection (copy-on-write) instead of changing it.
+    Comments, which users add and delete, live in a CommentStore.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.movies = MovieStore(source.records('movies'))
+        self.coming_soon = tuple(source.records('coming_soon'))
+        self.cities = tuple(source.records('cities'))
+        self.saloons = tuple(source.records('saloons'))
+        self.actors = tuple(source.records('actors'))
+        self.directors = tuple(source.records('directors'))
+        self.categories = tuple(source.records('categories'))
+        self.movie_actors = _group_by_movie(source.records('movie_actors'))
+        self.comments = CommentStore(source.records('comments'))
+
+        self.saloons_by_id = _index_by(self.saloons, 'saloonId', 'saloons')
+        saloons_by_city = {}
+        for saloon in self.saloons:
+            saloons_by_city.setdefault(saloon.get('cityId'), []).append(saloon)
+        self.saloons_by_city = {city_id: tuple(group) for city_id, group in saloons_by_city.items()}
+        self.cities_by_id = _index_by(self.cities, 'cityId', 'cities')
+
+        self.showtimes = ShowtimeStore(source.records('saloon_times'))
+        city_ids = {}
+        showtimes = self.showtimes
+        previous = None
+        for row in showtimes.by_saloon:
+            pair = (showtimes.movie_ids[row], showtimes.saloon_ids[row])
+            if pair != previous:
+                previous = pair
+                saloon = self.saloons_by_id.get(pair[1])
+                if saloon is not None:
+                    city_ids.setdefault(pair[0], set()).add(saloon.get('cityId'))
+        self.movie_cities = {
+            movie_id: tuple(self.cities_by_id[city_id] for city_id in sorted(ids) if city_id in self.cities_by_id)
+            for movie_id, ids in city_ids.items()
+        }
+
+    def summary(self):
+        return (f"{len(self.movies)} movies, {len(self.cities)} cities, {len(self.saloons)} saloons, "
+                f"{len(self.showtimes)} saloon times, "
+                f"{len(self.comments)} comments")
+
+    def add_director(self, director):
+        self.directors = self.directors + (director,)
+        return director
+
+    def saloons_in_city(self, city_id):
+        return self.saloons_by_city.get(city_id, ())
+
+    def cities_for_movie(self, movie_id):
+        """Cities that have a saloon showing the movie"""
+        return self.movie_cities.get(movie_id, ())
+
+    def actors_for_movie(self, movie_id):
+        return self.movie_actors.get(movie_id, ())
+
+    def saloon_times_for_movie(self, movie_id, start=None, end=None):
+        """Showtimes of a movie, optionally between two ISO dates, by date and time"""
+        if movie_id is None:
+            return []
+        showtimes = self.showtimes
+        ids, saloon_ids = showtimes.ids, showtimes.saloon_ids
+        date_values, dates = showtimes.date_values, showtimes.dates
+        time_values, times = showtimes.time_values, showtimes.times
+        saloons = self.saloons_by_id
+        result = []
+        for row in showtimes.rows_for_movie(movie_id, start, end):
+            saloon_id = saloon_ids[row]
+            saloon = saloons.get(saloon_id)
+            result.append({
+                "id": ids[row],
+                "movieBeginTime": time_values[times[row]],
+                "movieDate": date_values[dates[row]],
+                "movieId": movie_id,
+                "saloonId": saloon_id,
+                "saloon": {"saloonName": saloon['saloonName'] if saloon is not None else ""}
+            })
+        return result
+
+    def saloon_times_at(self, saloon_id, movie_id, start=None, end=None):
+        showtimes = self.showtimes
+        time_values, times = showtimes.time_values, showtimes.times
+        return [{"movieBeginTime": time_values[times[row]], "saloonId": saloon_id, "movieId": movie_id}
+                for row in showtimes.rows_at(saloon_id, movie_id, start, end)]
+
+
+def add_arguments(parser):
+    """Data source options for a script's argument parser"""
+    group = parser.add_argument_group('data')
+    group.add_argument('--data', metavar='DIR',
+                       help='load <collection>.json / .ndjson fixtures from DIR, '
+                            'built-in data for collections without a file')
+    group.add_argument('--synthetic', metavar='SIZES', nargs='?', const='',
+                       help='generate a catalog, optionally sized like '
+                            f"movies=50000,saloons=2000,saloon_times=2000000 (collections: {', '.join(SYNTHETIC_SIZES)})")
+    group.add_argument('--seed', type=int, default=0, help='seed of the synthetic catalog (default: 0)')
+    return parser
+
+
+def load(options, builtin):
+    """DataLayer for the parsed command line; builtin is the script's own MemorySource"""
+    if getattr(options, 'synthetic', None) is not None:
+        source = SyntheticSource(options.seed, parse_sizes(options.synthetic))
+    elif getattr(options, 'data', None):
+        source = FixtureSource(options.data, fallback=builtin)
+    else:
+        source = builtin
+    return DataLayer(source)
@@ -0,0 +1,435 @@
+"""
+In-process stand-in for the ticket email pipeline.
+
+In the real system sendTicketDetail publishes an EmailMessageKafkaDto to the
+``email_topics`` Kafka topic, and the email service consumes it and sends
+the ticket email rendered from emailTemplate.ftlh. Here the same events go
+through a Topic and an EmailConsumer in the serving process:
+
+- ``Topic``          append-only log with a producer buffer. send() only
+                     queues the event; a flusher thread commits the buffer
+                     in batches of up to ``batch_size`` events, waiting up to
+                     ``linger`` seconds after the first one for a batch to
+                     fill, as Kafka's batch.size and linger.ms do. With a
+                     ``path`` every batch is also appended to that file as
+                     NDJSON lines, in one write.
+- ``EmailConsumer``  a thread that polls committed events, renders each into
+                     a MIME message with the email service's template and,
+                     with an ``outbox`` directory, writes it there as
+                     ``<partition>-<offset>.eml``.
+
+The topic file is opened and the outbox created when the pipeline is built,
+so a bad path fails at startup with OSError. After that publishing never
+raises: a batch that cannot be written to the file is still delivered to the
+consumer, and an email that cannot be written counts as failed.
+
+Offsets count from 0 per process; the partition is the process id, so
+workers started with --workers can share the topic file and the outbox.
+Consumed events are dropped from memory. A topic file is a record of what
+was published, not replayed on start: the consumer begins with the events
+sent after it.
+
+Queue depth (sent, not consumed yet), batch sizes and the end-to-end latency
+from send() to the .eml being written are exported on /metrics and, with
+percentiles, by describe().
+"""
+
+import bisect
+import html
+import json
+import os
+import string
+import threading
+import time
+from email.mime.text import MIMEText
+from email.utils import formatdate
+from pathlib import Path
+
+from mock_backend.metrics import LATENCY_BOUNDS
+
+TOPIC_NAME = 'email_topics'
+SENDER = 'python3.testmail@gmail.com'
+SUBTITLE = 'CineVision Bilet Detay'
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_LINGER_MS = 5.0
+MAX_POLL_RECORDS = 500
+BATCH_BOUNDS = tuple(2 ** exponent for exponent in range(0, 13))
+_POLL_TIMEOUT = 0.5
+
+# emailTemplate.ftlh of the email service, with the same ${...} fields
+TEMPLATE = string.Template("""\
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head>
+    <meta http-equiv="Content-Type" content="text/html; charset=utf-8" />
+    <title>Bilet Detay</title>
+</head>
+
+<body>
+<div align="center" width="100%" border="2px">
+    <div align="center" valign="top">
+        <br> <br>
+        <div width="600" border="3px">
+
+            <div style="font-size: 48px; color:black; font-family: Arial;">
+                <b>Bilet Detayları</b>
+            </div>
+
+            <div style="font-size: 24px; color: black;">
+                <br>  <b>Ödeme İşleminiz Başarıyla Gerçekleşti </b> <br>
+            </div>
+
+            <div>
+                <br> Sayın ${fullName}, bilet almak için CineVision'ı tercih ettiğiniz için teşekkür ederiz.<br>
+                <br>
+                <h3>Bilet Detayları</h3>
+                <h4>${movieName}</h4>
+                <br>
+                <h5><b>Tarih: </b> ${movieDay} </h5>
+                <h5><b>Sinema: </b> ${saloonName} </h5>
+                <h5><b>Seans: </b> ${movieStartTime} </h5>
+                <h5><b>Koltuk: </b> ${chairNumbers} </h5>
+
+            </div>
+            <br>
+            <div>
+                <h4>CineVision ailesi olarak iyi seyirler dileriz.</h4>
+            </div>
+        </div>
+
+        <br> <br>
+
+    </div>
+</div>
+</body>
+</html>""")
+_MODEL = ('fullName', 'movieName', 'movieDay', 'saloonName', 'movieStartTime', 'chairNumbers')
+
+
+def email_event(ticket, showtime, seats):
+    """EmailMessageKafkaDto of a booking, as PaymentServiceImpl builds it"""
+    movie_name, saloon_name, movie_day, movie_start_time = showtime
+    return {
+        "sender": SENDER,
+        "recipient": ticket.get("email"),
+        "subtitle": SUBTITLE,
+        "movieName": movie_name,
+        "saloonName": saloon_name,
+        "movieDay": movie_day,
+        "movieStartTime": movie_start_time,
+        "fullName": ticket.get("fullName"),
+        "chairNumbers": ticket.get("chairNumbers") or ' '.join(seats),
+    }
+
+
+def render_email(event):
+    """MIME message of an email event, as the email service would send it"""
+    # .ftlh templates escape HTML in ${...}
+    model = {key: html.escape(str(event.get(key) or '')) for key in _MODEL}
+    # The compat32 MIMEText rather than EmailMessage, whose header parsing costs several times the rendering
+    message = MIMEText(TEMPLATE.substitute(model), 'html', 'utf-8')
+    message['From'] = event.get('sender') or SENDER
+    message['To'] = event.get('recipient') or ''
+    message['Subject'] = event.get('subtitle') or SUBTITLE
+    message['Date'] = formatdate(localtime=True)
+    return message
+
+
+class _Histogram:
+    """Counts per upper bound, plus sum; not locked, one thread records"""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+
+    def record(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+
+    def count(self):
+        return sum(self.counts)
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding that fraction of the values, None when empty"""
+        counts = list(self.counts)
+        wanted = fraction * sum(counts)
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if count and seen >= wanted:
+                return self.bounds[index] if index < len(self.bounds) else float('inf')
+        return None
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        counts = list(self.counts)
+        for bound, count in zip(self.bounds, counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound:.9g}"}} {cumulative}')
+        cumulative += counts[-1]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {self.total:.9g}')
+        lines.append(f'{name}_count{{{labels}}} {cumulative}')
+        return lines
+
+
+class Topic:
+    def __init__(self, name=TOPIC_NAME, path=None, batch_size=DEFAULT_BATCH_SIZE, linger=DEFAULT_LINGER_MS / 1000):
+        self.name = name
+        self.path = path
+        self.batch_size = max(batch_size, 1)
+        self.linger = linger
+        self.partition = None
+        self._log_file = open(path, 'ab') if path else None
+        # (sent at, event) not committed yet, and committed (offset, sent at, event) not consumed yet
+        self._buffer = []
+        self._committed = []
+        # Events of the batch being committed, out of the buffer and not in _committed yet
+        self._in_flight = 0
+        self._next_offset = 0
+        self._changed = threading.Condition()
+        self._flusher = None
+        self._closing = False
+        self.sent = 0
+        self.committed = 0
+        self.write_errors = 0
+        self.batches = _Histogram(BATCH_BOUNDS)
+
+    def _start(self):
+        # Threads don't survive fork(): each worker process starts its own on its first event
+        if self._flusher is None or self.partition != os.getpid():
+            flusher = threading.Thread(target=self._flush_loop, name=f'mock-{self.name}-flusher', daemon=True)
+            # Started first, so a thread that could not start is tried again on the next event
+            flusher.start()
+            self._flusher = flusher
+            self.partition = os.getpid()
+            self._buffer.clear()
+
+    def send(self, event):
+        """Queue an event for the next batch"""
+        with self._changed:
+            self._start()
+            self._buffer.append((time.perf_counter(), event))
+            self.sent += 1
+            if len(self._buffer) == 1 or len(self._buffer) >= self.batch_size:
+                self._changed.notify_all()
+
+    def depth(self):
+        """Events sent and not consumed yet"""
+        return len(self._buffer) + self._in_flight + len(self._committed)
+
+    def _next_batch(self):
+        with self._changed:
+            while not self._buffer:
+                if self._closing:
+                    return None
+                self._changed.wait()
+            deadline = self._buffer[0][0] + self.linger
+            while len(self._buffer) < self.batch_size and not self._closing:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+            batch = self._buffer[:self.batch_size]
+            del self._buffer[:self.batch_size]
+            self._in_flight = len(batch)
+            return batch
+
+    def _flush_loop(self):
+        log_file = self._log_file
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            offset = self._next_offset
+            self._next_offset += len(batch)
+            if log_file is not None:
+                lines = [json.dumps({"partition": self.partition, "offset": offset + index,
+                                     "timestamp": time.time(), "value": event}, ensure_ascii=False).encode()
+                         for index, (_, event) in enumerate(batch)]
+                try:
+                    # One write per batch; O_APPEND keeps batches of several workers whole
+                    log_file.write(b'\n'.join(lines) + b'\n')
+                    log_file.flush()
+                except OSError:
+                    # The file is only a record: the batch still goes to the consumer
+                    self.write_errors += 1
+            with self._changed:
+                self._committed.extend((offset + index, sent_at, event)
+                                       for index, (sent_at, event) in enumerate(batch))
+                self._in_flight = 0
+                self.committed += len(batch)
+                self.batches.record(len(batch))
+                self._changed.notify_all()
+
+    def poll(self, max_records=MAX_POLL_RECORDS, timeout=_POLL_TIMEOUT):
+        """Committed (offset, sent at, event) records, oldest first; [] after timeout seconds without any
+
+        Returns None once the topic is closed and every event has been polled.
+        """
+        with self._changed:
+            if not self._committed:
+                if self._closing and not self.depth():
+                    return None
+                self._changed.wait(timeout)
+            records = self._committed[:max_records]
+            del self._committed[:max_records]
+            return records
+
+    def close(self, timeout=5.0):
+        """Commit what is buffered, stop the flusher and close the file"""
+        with self._changed:
+            self._closing = True
+            self._changed.notify_all()
+        if self._flusher is not None and self.partition == os.getpid():
+            self._flusher.join(timeout)
+            if self._flusher.is_alive():
+                return
+        if self._log_file is not None:
+            try:
+                self._log_file.close()
+            except OSError:
+                self.write_errors += 1
+
+
+class EmailConsumer:
+    def __init__(self, topic, outbox=None, max_poll_records=MAX_POLL_RECORDS):
+        self.topic = topic
+        self.outbox = Path(outbox) if outbox else None
+        if self.outbox is not None:
+            self.outbox.mkdir(parents=True, exist_ok=True)
+            if not os.access(self.outbox, os.W_OK | os.X_OK):
+                raise PermissionError(f"Outbox {self.outbox} is not writable")
+        self.max_poll_records = max_poll_records
+        self.consumed = 0
+        self.failed = 0
+        self.latency = _Histogram(LATENCY_BOUNDS)
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        # Checked again under the lock: two first events at once must not start two consumers
+        if self._thread is None or self._pid != os.getpid():
+            with self._lock:
+                if self._thread is None or self._pid != os.getpid():
+                    self._thread = threading.Thread(target=self._run, name=f'mock-{self.topic.name}-consumer',
+                                                    daemon=True)
+                    self._thread.start()
+                    self._pid = os.getpid()
+
+    def _run(self):
+        topic = self.topic
+        while True:
+            records = topic.poll(self.max_poll_records)
+            if records is None:
+                return
+            for offset, sent_at, event in records:
+                try:
+                    message = render_email(event).as_bytes()
+                    if self.outbox is not None:
+                        (self.outbox / f'{topic.partition}-{offset:010d}.eml').write_bytes(message)
+                except (OSError, ValueError, TypeError):
+                    self.failed += 1
+                self.consumed += 1
+                self.latency.record(time.perf_counter() - sent_at)
+
+    def join(self, timeout=5.0):
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+
+
+class EmailPipeline:
+    """The topic sendTicketDetail publishes to and the consumer rendering its emails"""
+
+    def __init__(self, topic=None, outbox=None):
+        self.topic = topic or Topic()
+        self.consumer = EmailConsumer(self.topic, outbox)
+        self.dropped = 0
+
+    def publish(self, event):
+        """Queue an event; False when it was dropped because a pipeline thread could not start"""
+        try:
+            self.consumer.start()
+            self.topic.send(event)
+        except RuntimeError:
+            self.dropped += 1
+            return False
+        return True
+
+    def close(self, timeout=5.0):
+        """Deliver every queued event, then stop both threads"""
+        self.topic.close(timeout)
+        self.consumer.join(timeout)
+
+    def describe(self):
+        topic, consumer = self.topic, self.consumer
+        batches = topic.batches
+        latency = consumer.latency
+        return {
+            "topic": topic.name,
+            "file": str(topic.path) if topic.path else None,
+            "outbox": str(consumer.outbox) if consumer.outbox else None,
+            "batchSize": topic.batch_size,
+            "lingerMs": topic.linger * 1000,
+            "sent": topic.sent,
+            "committed": topic.committed,
+            "consumed": consumer.consumed,
+            "failed": consumer.failed,
+            "dropped": self.dropped,
+            "fileErrors": topic.write_errors,
+            "depth": topic.depth(),
+            "batches": batches.count(),
+            "meanBatchSize": round(batches.total / batches.count(), 2) if batches.count() else None,
+            "latencyMs": {name: None if value is None else round(value * 1000, 3)
+                          for name, value in (('p50', latency.percentile(0.5)), ('p95', latency.percentile(0.95)),
+                                              ('p99', latency.percentile(0.99)))},
+        }
+
+    def render(self):
+        """Pipeline metrics in the Prometheus text format, to go after RequestMetrics.render()"""
+        topic, consumer = self.topic, self.consumer
+        labels = f'topic="{topic.name}"'
+        lines = [
+            '# HELP mock_events_sent_total Events sent to the topic.',
+            '# TYPE mock_events_sent_total counter',
+            f'mock_events_sent_total{{{labels}}} {topic.sent}',
+            '# HELP mock_events_consumed_total Events rendered by the consumer.',
+            '# TYPE mock_events_consumed_total counter',
+            f'mock_events_consumed_total{{{labels}}} {consumer.consumed}',
+            '# HELP mock_events_failed_total Events the consumer could not render or write.',
+            '# TYPE mock_events_failed_total counter',
+            f'mock_events_failed_total{{{labels}}} {consumer.failed}',
+            '# HELP mock_events_depth Events sent and not consumed yet.',
+            '# TYPE mock_events_depth gauge',
+            f'mock_events_depth{{{labels}}} {topic.depth()}',
+            '# HELP mock_events_batch_size Events per committed batch.',
+            '# TYPE mock_events_batch_size histogram',
+            *topic.batches.render('mock_events_batch_size', labels),
+            '# HELP mock_events_latency_seconds Time from send to the email being rendered and written.',
+            '# TYPE mock_events_latency_seconds histogram',
+            *consumer.latency.render('mock_events_latency_seconds', labels),
+        ]
+        return ('\n'.join(lines) + '\n').encode()
+
+
+def add_arguments(parser):
+    """Email event options for a script's argument parser"""
+    group = parser.add_argument_group('email events')
+    group.add_argument('--outbox', metavar='DIR',
+                       help='write the rendered ticket emails here as .eml files (default: render only)')
+    group.add_argument('--events-file', metavar='FILE',
+                       help=f'also append every batch of the {TOPIC_NAME} topic to this NDJSON file')
+    group.add_argument('--events-batch-size', type=int, default=DEFAULT_BATCH_SIZE, metavar='N',
+                       help=f'most events committed in one batch (default: {DEFAULT_BATCH_SIZE})')
+    group.add_argument('--events-linger-ms', type=float, default=DEFAULT_LINGER_MS, metavar='MS',
+                       help=f'how long a batch waits to fill after its first event (default: {DEFAULT_LINGER_MS})')
+    return parser
+
+
+def from_options(options):
+    """EmailPipeline for the options added by add_arguments()"""
+    topic = Topic(path=options.events_file, batch_size=options.events_batch_size,
+                  linger=options.events_linger_ms / 1000)
+    return EmailPipeline(topic, options.outbox)
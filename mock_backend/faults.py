@@ -0,0 +1,322 @@
+"""
+Latency and fault injection per route.
+
+A profile maps route templates (as registered with the Router, or ``*`` for
+every route not named) to what should go wrong on them:
+
+    {
+      "routes": {
+        "/api/movie/movies/displayingMovies": {
+          "latency": {"lognormal": {"median": 40, "sigma": 0.6}},
+          "errors": {"503": 0.02, "500": 0.01},
+          "reset": 0.005,
+          "drip": {"bytes": 256, "interval": 50}
+        },
+        "*": {"latency": {"percentiles": {"50": 12, "90": 45, "99": 180, "100": 900}}}
+      }
+    }
+
+Times are in milliseconds.
+
+- ``latency``  a number, ``{"fixed": ms}``, ``{"normal": {"mean", "stddev"}}``,
+               ``{"lognormal": {"median", "sigma"}}`` or
+               ``{"percentiles": {percentile: ms}}``. A percentile table is
+               interpolated linearly, and below its lowest percentile it
+               keeps the lowest value. The response is held until that long
+               after the request arrived.
+- ``errors``   probability of answering with each status instead of running
+               the route.
+- ``reset``    probability of resetting the connection (TCP RST) instead of
+               answering.
+- ``drip``     send the headers, then the body ``bytes`` at a time, every
+               ``interval``.
+
+A file given with ``--faults`` holds either one profile or several,
+``{"profiles": {name: profile}, "active": name}``. The admin endpoint
+switches between them, or installs a new one, while the server runs.
+
+Delays do not block other connections in the threaded and asyncio modes.
+- threaded: the connection's worker thread sleeps.
+- asyncio: the event loop awaits the delay before writing.
+- single: the one connection being served sleeps, so every other client
+  waits too.
+"""
+
+import asyncio
+import bisect
+import json
+import math
+import random
+import socket
+import struct
+import threading
+import time
+
+WILDCARD = '*'
+CUSTOM = 'custom'
+_LINGER_RESET = struct.pack('ii', 1, 0)
+
+
+class Fault:
+    """What to do to one response"""
+    __slots__ = ('started', 'latency', 'status', 'reset', 'drip_bytes', 'drip_interval')
+
+    def __init__(self, started, latency=0.0, status=None, reset=False, drip_bytes=0, drip_interval=0.0):
+        # perf_counter() when the request arrived
+        self.started = started
+        self.latency = latency
+        self.status = status
+        self.reset = reset
+        self.drip_bytes = drip_bytes
+        self.drip_interval = drip_interval
+
+    def delay(self):
+        """Seconds left to wait before answering"""
+        return self.latency - (time.perf_counter() - self.started)
+
+    def _chunks(self, data):
+        if not self.drip_bytes:
+            yield data
+            return
+        head, separator, body = data.partition(b'\r\n\r\n')
+        yield head + separator
+        for offset in range(0, len(body), self.drip_bytes):
+            yield body[offset:offset + self.drip_bytes]
+
+    def deliver(self, write, data):
+        """Write a response after the delay, dripping the body if asked, from a thread"""
+        delay = self.delay()
+        if delay > 0:
+            time.sleep(delay)
+        for index, chunk in enumerate(self._chunks(data)):
+            if index > 1:
+                time.sleep(self.drip_interval)
+            write(chunk)
+
+    async def deliver_async(self, writer, data):
+        """deliver() for an asyncio stream, without blocking the event loop"""
+        delay = self.delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.reset:
+            reset_connection(writer.get_extra_info('socket'))
+            writer.transport.abort()
+            return
+        for index, chunk in enumerate(self._chunks(data)):
+            if index > 1:
+                await asyncio.sleep(self.drip_interval)
+            writer.write(chunk)
+            await writer.drain()
+
+
+def reset_connection(sock):
+    """Make closing sock send a TCP RST instead of a FIN"""
+    if sock is not None:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RESET)
+
+
+def _number(value, what):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise ValueError(f"{what} must be a non-negative number, got {value!r}")
+    return float(value)
+
+
+def _probability(value, what):
+    value = _number(value, what)
+    if value > 1:
+        raise ValueError(f"{what} must be at most 1, got {value!r}")
+    return value
+
+
+def latency_sampler(spec):
+    """rng -> seconds for a latency spec in milliseconds"""
+    if not isinstance(spec, dict):
+        seconds = _number(spec, 'latency') / 1000
+        return lambda rng: seconds
+    if len(spec) != 1:
+        raise ValueError(f"latency needs exactly one of fixed, normal, lognormal, percentiles, got {sorted(spec)}")
+    (kind, params), = spec.items()
+    if kind in ('normal', 'lognormal', 'percentiles') and not isinstance(params, dict):
+        raise ValueError(f"{kind} latency needs an object of parameters, got {params!r}")
+    if kind == 'fixed':
+        seconds = _number(params, 'fixed latency') / 1000
+        return lambda rng: seconds
+    if kind == 'normal':
+        mean = _number(params.get('mean'), 'normal mean') / 1000
+        stddev = _number(params.get('stddev', 0), 'normal stddev') / 1000
+        return lambda rng: max(rng.gauss(mean, stddev), 0.0)
+    if kind == 'lognormal':
+        median = _number(params.get('median'), 'lognormal median') / 1000
+        sigma = _number(params.get('sigma', 0), 'lognormal sigma')
+        if not median:
+            raise ValueError("lognormal median must be above 0")
+        mu = math.log(median)
+        return lambda rng: rng.lognormvariate(mu, sigma)
+    if kind == 'percentiles':
+        try:
+            points = sorted((float(p), _number(ms, f'percentile {p}') / 1000) for p, ms in params.items())
+        except (AttributeError, TypeError, ValueError) as e:
+            raise ValueError(f"percentiles must map percentiles to milliseconds: {e}") from None
+        if not points or points[0][0] < 0 or points[-1][0] > 100:
+            raise ValueError("percentiles must be between 0 and 100")
+        if any(b[1] < a[1] for a, b in zip(points, points[1:])):
+            raise ValueError("percentile latencies must not decrease")
+        ranks = [p for p, _ in points]
+        values = [v for _, v in points]
+
+        def sample(rng):
+            rank = rng.random() * 100
+            i = bisect.bisect_left(ranks, rank)
+            if i == 0:
+                return values[0]
+            if i == len(ranks):
+                return values[-1]
+            low, high = ranks[i - 1], ranks[i]
+            return values[i - 1] + (values[i] - values[i - 1]) * (rank - low) / (high - low)
+        return sample
+    raise ValueError(f"Unknown latency distribution {kind!r}")
+
+
+class RouteFaults:
+    """Compiled faults of one route of a profile"""
+
+    def __init__(self, spec):
+        if not isinstance(spec, dict):
+            raise ValueError(f"route faults must be an object, got {spec!r}")
+        unknown = set(spec) - {'latency', 'errors', 'reset', 'drip'}
+        if unknown:
+            raise ValueError(f"Unknown fault settings {sorted(unknown)}")
+        self.latency = latency_sampler(spec['latency']) if 'latency' in spec else None
+        errors = []
+        total = 0.0
+        for status, rate in (spec.get('errors') or {}).items():
+            if not str(status).isdigit() or not 100 <= int(status) <= 599:
+                raise ValueError(f"errors keys must be HTTP statuses, got {status!r}")
+            total += _probability(rate, f'error rate of {status}')
+            errors.append((total, int(status)))
+        if total > 1:
+            raise ValueError(f"error rates add up to {total}, more than 1")
+        self.errors = errors
+        self.reset = _probability(spec.get('reset', 0), 'reset')
+        drip = spec.get('drip') or {}
+        self.drip_bytes = int(_number(drip.get('bytes', 0), 'drip bytes'))
+        self.drip_interval = _number(drip.get('interval', 0), 'drip interval') / 1000
+        if drip and not self.drip_bytes:
+            raise ValueError("drip needs bytes above 0")
+
+    def plan(self, rng, started):
+        """Fault for one request, None when nothing happens to it"""
+        latency = self.latency(rng) if self.latency is not None else 0.0
+        status = None
+        if self.errors:
+            draw = rng.random()
+            for threshold, error in self.errors:
+                if draw < threshold:
+                    status = error
+                    break
+        reset = bool(self.reset) and rng.random() < self.reset
+        if not (latency or status or reset or self.drip_bytes):
+            return None
+        return Fault(started, latency, status, reset, self.drip_bytes, self.drip_interval)
+
+
+def compile_profile(profile):
+    """{template: RouteFaults} of a profile, raises ValueError when it is malformed"""
+    if not isinstance(profile, dict) or not isinstance(profile.get('routes'), dict):
+        raise ValueError('A fault profile needs a "routes" object')
+    compiled = {}
+    for template, spec in profile['routes'].items():
+        try:
+            compiled[template] = RouteFaults(spec)
+        except ValueError as e:
+            raise ValueError(f"{template}: {e}") from None
+    return compiled
+
+
+class FaultInjector:
+    """Named fault profiles, one of them active at a time"""
+
+    def __init__(self, profiles=None, active=None, seed=None):
+        self._profiles = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        # (name, profile, {template: RouteFaults}), replaced as a whole when switching
+        self._active = (None, None, {})
+        for name, profile in (profiles or {}).items():
+            self.add(name, profile)
+        if active is not None:
+            self.activate(active)
+
+    def add(self, name, profile):
+        compiled = compile_profile(profile)
+        with self._lock:
+            self._profiles[name] = (profile, compiled)
+            if self._active[0] == name:
+                self._active = (name, profile, compiled)
+
+    def activate(self, name):
+        """Make a named profile active, None turns faults off; raises KeyError for unknown names"""
+        with self._lock:
+            if name is None:
+                self._active = (None, None, {})
+                return
+            profile, compiled = self._profiles[name]
+            self._active = (name, profile, compiled)
+
+    def plan(self, template, started):
+        """Fault for a request to a route template that arrived at perf_counter() started,
+        None when it is served normally"""
+        routes = self._active[2]
+        if not routes:
+            return None
+        faults = routes.get(template) or routes.get(WILDCARD)
+        return faults.plan(self._rng, started) if faults is not None else None
+
+    def describe(self):
+        name, profile, _ = self._active
+        return {"active": name, "profiles": sorted(self._profiles), "profile": profile}
+
+    def configure(self, request):
+        """Apply an admin request: {"profile": name or null} or a profile to install and activate"""
+        if not isinstance(request, dict):
+            raise ValueError("Expected a JSON object")
+        if 'routes' in request:
+            name = request.get('name') or CUSTOM
+            self.add(name, request)
+            self.activate(name)
+        elif 'profile' in request:
+            try:
+                self.activate(request['profile'])
+            except KeyError:
+                raise ValueError(f"Unknown fault profile {request['profile']!r}") from None
+        else:
+            raise ValueError('Expected "profile" or "routes"')
+        return self.describe()
+
+
+def load(path):
+    """(profiles, active) of a --faults file"""
+    with open(path, encoding='utf-8') as f:
+        document = json.load(f)
+    if isinstance(document, dict) and 'profiles' in document:
+        return document['profiles'], document.get('active')
+    return {CUSTOM: document}, CUSTOM
+
+
+def add_arguments(parser):
+    """Fault injection options for a script's argument parser"""
+    group = parser.add_argument_group('fault injection')
+    group.add_argument('--faults', metavar='FILE', help='JSON file of fault profiles (see mock_backend.faults)')
+    group.add_argument('--fault-profile', metavar='NAME', help='profile of --faults to start with')
+    group.add_argument('--fault-seed', type=int, help='seed the fault dice, for repeatable runs')
+    return parser
+
+
+def from_options(options):
+    """FaultInjector for the options added by add_arguments(); raises OSError or ValueError"""
+    profiles, active = load(options.faults) if options.faults else ({}, None)
+    if options.fault_profile is not None:
+        active = options.fault_profile
+    if active is not None and active not in profiles:
+        raise ValueError(f"Unknown fault profile {active!r}")
+    return FaultInjector(profiles, active, options.fault_seed)
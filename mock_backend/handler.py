@@ -0,0 +1,327 @@
+"""
+Base request handler with HTTP/1.1 persistent connections.
+
+Every response carries a Content-Length, idle connections are dropped after
+``idle_timeout`` seconds and a connection is closed once it has served
+``max_keepalive_requests`` requests. Both limits are read from the server so
+they can be set from the command line.
+
+Responses are buffered into a single write: headers and body leave together,
+and pre-serialized responses from a ResponseCache are written as they are.
+List bodies sent with send_json_list() are encoded item by item and written
+with the headers in one scatter-gather call (see mock_backend.streaming).
+
+Every request gets an id for its structured log lines (see mock_backend.log)
+and, when info logging is on, one access line once it has been answered.
+Subclasses that set ``metrics`` to a RequestMetrics and name their routes
+with begin_route() also get per-route counters and latency histograms, and
+setting ``compressor`` to a Compressor compresses bodies for clients that
+accept it (see mock_backend.compression). Setting ``faults`` to a
+FaultInjector lets routes call inject_faults() to delay, fail, reset or
+drip their responses (see mock_backend.faults).
+
+Request bodies are read with read_body() or read_json(), which enforce the
+size limit and framing rules of mock_backend.body and raise BodyError for
+the route to answer with its status.
+
+A route whose answer waits on work done elsewhere (password hashing, see
+mock_backend.users) passes that work's Future to defer() with the code that
+answers. Thread-based servers wait for it in the connection's thread;
+servers that set ``defers_work`` (the asyncio one) await it and call
+resume() instead of blocking, as they do for injected delays.
+
+Responses stored in a ResponseCache carry ETag, Last-Modified and
+Cache-Control headers; a request whose If-None-Match matches gets a bodiless
+304 instead, with header lines prepared along with the entry.
+"""
+
+import email.utils
+import itertools
+import json
+import time
+from http.server import BaseHTTPRequestHandler
+
+from mock_backend import body as request_body
+from mock_backend import log
+from mock_backend.faults import reset_connection
+from mock_backend.metrics import UNMATCHED
+from mock_backend.cache import CachedResponse, encode_headers, etag_for, etag_matches
+from mock_backend.streaming import Chunks, encode_list, send_parts
+
+DEFAULT_IDLE_TIMEOUT = 5.0
+DEFAULT_MAX_KEEPALIVE_REQUESTS = 100
+# Cached responses may be stored by browsers but must be revalidated on every use
+CACHE_CONTROL = 'no-cache'
+
+_REQUEST_IDS = itertools.count(1)
+
+
+class KeepAliveRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Responses are small and written at once, don't let Nagle hold them back
+    disable_nagle_algorithm = True
+    timeout = DEFAULT_IDLE_TIMEOUT
+    requests_on_connection = 0
+    _body_pending = False
+    _body = b''
+    _cache_slot = None
+    request_id = 0
+    _log_sampled = False
+    _status = None
+    _sent_bytes = 0
+    _cache_hit = False
+    _started = 0.0
+    metrics = None
+    compressor = None
+    route_template = None
+    faults = None
+    # Fault planned for the current request; servers that set defers_faults deliver it themselves
+    fault = None
+    # Largest request body of the current route, None for the server's --max-body-size
+    body_limit = None
+    _json = None
+    # (future, then) of a response deferred to a server that sets defers_work
+    deferred = None
+
+    def setup(self):
+        self.timeout = getattr(self.server, 'idle_timeout', self.timeout)
+        super().setup()
+
+    def handle_one_request(self):
+        self.requests_on_connection += 1
+        self._body_pending = False
+        self._cache_slot = None
+        self._status = None
+        self._sent_bytes = 0
+        self._cache_hit = False
+        self.route_template = None
+        self.fault = None
+        self.body_limit = None
+        self._json = None
+        self.deferred = None
+        super().handle_one_request()
+        if self.deferred is None:
+            self._finished()
+
+    def _finished(self):
+        if self.metrics is not None and (self._status is not None or self.route_template is not None):
+            self.metrics.finished(self.route_template or UNMATCHED, self.command, self._status or 0,
+                                  self._sent_bytes, time.perf_counter() - self._started, self._cache_hit)
+        if self._status is not None and self._log_sampled and log.enabled(log.INFO):
+            log.emit(log.INFO, 'request', {
+                'request': self.request_id,
+                'method': self.command,
+                'path': self.path,
+                'route': self.route_template,
+                'status': self._status,
+                'ms': round((time.perf_counter() - self._started) * 1000, 3),
+                'bytes': self._sent_bytes,
+                'cache': self._cache_hit,
+            })
+
+    def defer(self, future, then):
+        """Answer with then(result of future) once the future is done"""
+        if getattr(self.server, 'defers_work', False):
+            self.deferred = (future, then)
+        else:
+            then(future.result())
+
+    def resume(self):
+        """Answer a deferred request, its future being done"""
+        future, then = self.deferred
+        try:
+            then(future.result())
+        except (ConnectionAbortedError, BrokenPipeError):
+            self.log_event(log.DEBUG, 'Client disconnected during deferred response')
+        except Exception as e:
+            self.send_json(500, {"error": str(e)})
+            self.log_event(log.ERROR, 'Deferred response failed', exc_info=True)
+        self.wfile.flush()
+        self._finished()
+
+    def begin_route(self, template):
+        """Name the route template serving this request, for metrics and the access line"""
+        self.route_template = template
+        if self.metrics is not None:
+            self.metrics.started(template, self.command)
+
+    def inject_faults(self, template):
+        """Plan the injected faults of this request; True when they replace the response"""
+        fault = self.faults.plan(template, self._started) if self.faults is not None else None
+        if fault is None:
+            return False
+        self.fault = fault
+        if fault.reset:
+            self.close_connection = True
+            self.log_event(log.INFO, 'Injected connection reset')
+            if not getattr(self.server, 'defers_faults', False):
+                delay = fault.delay()
+                if delay > 0:
+                    time.sleep(delay)
+                reset_connection(self.connection)
+                # Closed here, before the server's shutdown(SHUT_WR) could send a FIN
+                self.connection.close()
+            return True
+        if fault.status is not None:
+            self.send_json(fault.status, {"error": "Injected fault", "status": fault.status})
+            self.log_event(log.INFO, 'Injected error', status=fault.status)
+            return True
+        return False
+
+    def log_request(self, code='-', size='-'):
+        if isinstance(code, int):
+            self._status = int(code)
+        super().log_request(code, size)
+
+    def log_event(self, level, message, exc_info=None, **fields):
+        """Structured log line of this request; debug and info lines follow the sampling"""
+        if (level >= log.WARNING or self._log_sampled) and log.enabled(level):
+            fields['request'] = self.request_id
+            log.emit(level, message, fields, exc_info)
+
+    def log_payload(self, message, payload):
+        """Decoded request body at debug level, only with --log-payloads; secrets are redacted"""
+        if self._log_sampled and log.payloads_enabled():
+            log.emit(log.DEBUG, message, {'request': self.request_id, 'payload': log.redact(payload)})
+
+    def parse_request(self):
+        # Called once a request line has arrived, so ids are not spent on closed
+        # connections and idle keep-alive time is not counted
+        self._started = time.perf_counter()
+        self.request_id = next(_REQUEST_IDS)
+        self._log_sampled = log.sampled(self.request_id)
+        if not super().parse_request():
+            return False
+        self._body_pending = (self.headers.get('Content-Length', '0') not in ('', '0')
+                              or 'Transfer-Encoding' in self.headers)
+        return True
+
+    def end_headers(self):
+        max_requests = getattr(self.server, 'max_keepalive_requests', DEFAULT_MAX_KEEPALIVE_REQUESTS)
+        # An unread request body would be parsed as the next request, so close instead
+        if not self.close_connection and (self._body_pending or self.requests_on_connection >= max_requests):
+            self.send_header('Connection', 'close')
+        super().end_headers()
+
+    def flush_headers(self):
+        body, self._body = self._body, b''
+        if isinstance(body, Chunks):
+            if self.fault is None or getattr(self.server, 'defers_faults', False):
+                parts = [b''.join(self._headers_buffer), *body.parts]
+                self._headers_buffer = []
+                if self.request is not None:
+                    send_parts(self.connection, parts)
+                else:
+                    self.wfile.writelines(parts)
+                return
+            body = bytes(body)
+        if body:
+            self._headers_buffer.append(body)
+        if self.fault is not None and not getattr(self.server, 'defers_faults', False):
+            data = b''.join(self._headers_buffer)
+            self._headers_buffer = []
+            self.fault.deliver(self.wfile.write, data)
+            return
+        super().flush_headers()
+
+    def _read_body(self):
+        limit = self.body_limit or getattr(self.server, 'max_body_size', request_body.DEFAULT_MAX_BODY_SIZE)
+        data = request_body.read(self.rfile, self.headers, limit, required=self.command == 'POST')
+        # Left pending when reading failed, so the connection closes after the error
+        self._body_pending = False
+        return data
+
+    def read_body(self):
+        """Request body as bytes; raises BodyError"""
+        return bytes(self._read_body())
+
+    def read_json(self):
+        """Request body decoded as a JSON object, once per request; raises BodyError"""
+        if self._json is None:
+            self._json = request_body.parse_json(self._read_body())
+        return self._json
+
+    def send_body(self, status, body, content_type='application/json'):
+        """Send a complete response with CORS and Content-Length headers"""
+        cached = self._cache_slot is not None and status == 200
+        vary = self.compressor is not None and len(body) >= self.compressor.min_size
+        if cached:
+            entry = _response(status, body, content_type, vary, etag=etag_for(body),
+                              last_modified=email.utils.formatdate(usegmt=True))
+            cache, key, versions = self._cache_slot
+            cache.put(key, entry, versions)
+        else:
+            entry = _response(status, body, content_type, vary)
+        self._cache_slot = None
+        self.send_cached(entry)
+
+    def send_cached(self, entry):
+        """Send a pre-serialized response with one write, compressed if the client accepts it"""
+        if self.compressor is not None and len(entry.body) >= self.compressor.min_size:
+            entry = self._compressed(entry)
+        if entry.etag is not None:
+            if_none_match = self.headers.get('If-None-Match')
+            if if_none_match and etag_matches(if_none_match, entry.etag):
+                self.send_response(304)
+                self._headers_buffer.append(entry.not_modified)
+                self.end_headers()
+                return
+        self.send_response(entry.status)
+        self._headers_buffer.append(entry.headers)
+        self._body = entry.body
+        self._sent_bytes = len(entry.body)
+        self.end_headers()
+
+    def _compressed(self, entry):
+        coding = self.compressor.negotiate(self.headers.get('Accept-Encoding'))
+        if coding is None:
+            return entry
+        variant = entry.variants.get(coding)
+        if variant is None:
+            body = self.compressor.compress(entry.body, coding)
+            # A strong validator must differ between codings of the same body
+            etag = entry.etag and f'{entry.etag[:-1]}-{coding}"'
+            variant = _response(entry.status, body, entry.content_type, True, coding, etag, entry.last_modified)
+            # Two threads may both compress a new entry; either result is fine to keep
+            entry.variants[coding] = variant
+        return variant
+
+    def serve_cached(self, cache, key, datasets):
+        """Answer from cache and return True, or arrange for the next 200 sent to be cached"""
+        entry = cache.get(key)
+        if entry is not None:
+            self._cache_hit = True
+            self.send_cached(entry)
+            return True
+        self._cache_slot = (cache, key, cache.versions(datasets))
+        return False
+
+    def send_json(self, status, payload):
+        self.send_body(status, json.dumps(payload).encode())
+
+    def send_json_list(self, status, records, stored=True, envelope=None):
+        """Send records as a JSON array, or under "data" of an envelope dict, encoded item by item
+
+        Items of stored records are reused from the ItemCache of the route's
+        datasets; pass stored=False for records built for this response.
+        """
+        items = None
+        if stored and self._cache_slot is not None:
+            cache, _, versions = self._cache_slot
+            items = cache.items(tuple(name for name, _ in versions)).encoder(versions)
+        self.send_body(status, encode_list(records, items, envelope))
+
+
+def _response(status, body, content_type, vary, coding=None, etag=None, last_modified=None):
+    """CachedResponse with its header lines, and those of its 304 when it has an etag"""
+    common = [('Access-Control-Allow-Origin', '*')]
+    if vary:
+        common.append(('Vary', 'Accept-Encoding'))
+    if etag is not None:
+        common += [('ETag', etag), ('Last-Modified', last_modified), ('Cache-Control', CACHE_CONTROL)]
+    headers = [('Content-Type', content_type)]
+    if coding is not None:
+        headers.append(('Content-Encoding', coding))
+    headers.append(('Content-Length', len(body)))
+    return CachedResponse(status, encode_headers(common + headers), body, content_type,
+                          etag, last_modified, encode_headers(common) if etag is not None else b'')
@@ -0,0 +1,211 @@
+"""
+Structured, leveled request logging.
+
+Handlers log through ``KeepAliveRequestHandler.log_event``, which writes one
+JSON object per line: timestamp, level, message, request id and any fields
+given. Each request also gets one access line at info level, with method,
+path, status, duration, body bytes and whether it was served from the
+response cache.
+
+The request thread (or the event loop of the asyncio server) only puts a
+tuple on a queue: no record object, no formatting, no lock beyond the one
+inside the C queue. A background thread wakes up at most every
+``flush_interval`` seconds, formats everything queued as JSON and writes it
+with one call, so a slow stdout costs one write per batch instead of a
+blocked request per line. When the writer falls behind and ``queue_size``
+entries are waiting, new ones are dropped and counted instead of stalling
+requests.
+
+- ``--log-level``    debug, info, warning, error or off
+- ``--log-sample``   fraction of requests whose debug and info lines are
+                     kept; a request's lines are kept or dropped together,
+                     warnings and errors are always kept
+- ``--log-payloads`` also log decoded request bodies at debug level, with
+                     passwords and tokens redacted
+- ``--log-file``     append to a file instead of stdout
+
+Nothing is logged until configure() is called.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+import traceback
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+OFF = logging.CRITICAL + 10
+LEVELS = {'debug': DEBUG, 'info': INFO, 'warning': WARNING, 'error': ERROR, 'off': OFF}
+DEFAULT_LEVEL = 'info'
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_FLUSH_INTERVAL = 0.05
+REDACTED = '[redacted]'
+# Keys are compared case-insensitively; any key containing "password" is redacted too
+SECRET_FIELDS = frozenset({'token', 'useraccesstoken', 'accesstoken', 'refreshtoken', 'authorization', 'secret'})
+# Fractional parts of multiples of the golden ratio are evenly spread over [0, 1)
+_GOLDEN = 0.6180339887498949
+_LEVEL_NAMES = {level: name for name, level in LEVELS.items()}
+
+_level = OFF
+_sample_rate = 1.0
+_payloads = False
+_writer = None
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str).encode
+_second = [None, '']
+
+
+def _timestamp(created):
+    second = int(created)
+    if _second[0] != second:
+        _second[:] = [second, time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(second))]
+    return f'{_second[1]}.{int(created % 1 * 1000):03d}Z'
+
+
+def format_entry(entry):
+    """JSON line of a queued (created, level, message, fields, exc_info) entry"""
+    created, level, message, fields, exc_info = entry
+    line = {'ts': _timestamp(created), 'level': _LEVEL_NAMES.get(level, str(level)), 'msg': message}
+    line.update(fields)
+    if exc_info:
+        line['exc'] = ''.join(traceback.format_exception(*exc_info)).rstrip()
+    return _encode(line)
+
+
+class _Writer(threading.Thread):
+    def __init__(self, stream, queue_size, flush_interval):
+        super().__init__(name='mock-log-writer', daemon=True)
+        self.entries = queue.SimpleQueue()
+        self.stream = stream
+        self.queue_size = queue_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+
+    def put(self, entry):
+        if self.entries.qsize() < self.queue_size:
+            self.entries.put(entry)
+        else:
+            self.dropped += 1
+
+    def run(self):
+        reported = 0
+        stopping = False
+        while not stopping:
+            batch = [self.entries.get()]
+            # Let a burst pile up, then write it at once
+            time.sleep(self.flush_interval)
+            try:
+                while True:
+                    batch.append(self.entries.get_nowait())
+            except queue.Empty:
+                pass
+            stopping = None in batch
+            lines = [format_entry(entry) for entry in batch if entry is not None]
+            dropped = self.dropped
+            if dropped != reported:
+                lines.append(format_entry((time.time(), WARNING, 'Log entries dropped',
+                                           {'dropped': dropped - reported}, None)))
+                reported = dropped
+            if lines:
+                try:
+                    self.stream.write('\n'.join(lines) + '\n')
+                    self.stream.flush()
+                except (OSError, ValueError):
+                    # Closed pipe or a stream that cannot encode the line: lose the batch, keep serving
+                    self.dropped += len(lines)
+                    reported = self.dropped
+
+    def stop(self):
+        self.entries.put(None)
+        self.join(timeout=5)
+
+
+def configure(level=DEFAULT_LEVEL, sample=1.0, payloads=False, stream=None,
+              queue_size=DEFAULT_QUEUE_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL):
+    """Start (or restart) logging; stream defaults to the current sys.stdout"""
+    global _level, _sample_rate, _payloads, _writer
+    shutdown()
+    _sample_rate = sample
+    _payloads = payloads
+    if LEVELS[level] >= OFF:
+        return
+    _writer = _Writer(stream or sys.stdout, queue_size, flush_interval)
+    _writer.start()
+    _level = LEVELS[level]
+
+
+def shutdown():
+    """Write out the queued entries and stop the writer"""
+    global _level, _writer
+    _level = OFF
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
+
+
+atexit.register(shutdown)
+
+
+def enabled(level):
+    return level >= _level
+
+
+def sampled(request_id):
+    """Whether the debug and info lines of a request are kept"""
+    return _sample_rate >= 1.0 or (request_id * _GOLDEN) % 1.0 < _sample_rate
+
+
+def payloads_enabled():
+    return _payloads and DEBUG >= _level
+
+
+def emit(level, message, fields, exc_info=None):
+    writer = _writer
+    if writer is not None:
+        writer.put((time.time(), level, message, fields, sys.exc_info() if exc_info is True else exc_info))
+
+
+def redact(payload):
+    """Copy of a decoded JSON body with passwords and tokens replaced"""
+    if isinstance(payload, dict):
+        return {key: REDACTED if _secret(key) else redact(value) for key, value in payload.items()}
+    if isinstance(payload, list):
+        return [redact(value) for value in payload]
+    return payload
+
+
+def _secret(key):
+    key = str(key).lower()
+    return key in SECRET_FIELDS or 'password' in key
+
+
+def _sample_fraction(text):
+    value = float(text)
+    if not 0.0 < value <= 1.0:
+        raise ValueError(text)
+    return value
+
+
+def add_arguments(parser):
+    """Logging options for a script's argument parser"""
+    group = parser.add_argument_group('logging')
+    group.add_argument('--log-level', choices=list(LEVELS), default=DEFAULT_LEVEL,
+                       help=f'lowest level written (default: {DEFAULT_LEVEL})')
+    group.add_argument('--log-sample', type=_sample_fraction, default=1.0, metavar='FRACTION',
+                       help='fraction of requests whose debug and info lines are kept (default: 1)')
+    group.add_argument('--log-payloads', action='store_true',
+                       help='log decoded request bodies at debug level, passwords and tokens redacted')
+    group.add_argument('--log-file', help='append log lines to this file instead of stdout')
+    return parser
+
+
+def setup(options):
+    """configure() from the options added by add_arguments()"""
+    stream = open(options.log_file, 'a', encoding='utf-8') if options.log_file else None
+    configure(options.log_level, options.log_sample, options.log_payloads, stream)
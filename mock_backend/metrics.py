@@ -0,0 +1,149 @@
+"""
+Request metrics in the Prometheus text format.
+
+Per route template (``<unmatched>`` for paths no route matches) and method:
+requests by status, response body bytes, requests served from the response
+cache, requests in flight and a latency histogram.
+
+Recording happens once per request, when the response has been written, and
+takes no lock: every thread writes to its own shard of plain dicts and
+lists, registered once when the thread records its first request. A scrape
+copies and sums the shards. Copying a dict is a single C call under the
+GIL, so the scrape sees every shard at some consistent point while requests
+keep being recorded.
+
+Latency buckets are fixed and HDR-style log-linear: two per power of two
+from 2**-16 s (15 us) up to 24 s, so the relative error of a bucket is at
+most 50% at any scale and bucketing a sample is one C-level bisection.
+"""
+
+import bisect
+import threading
+import time
+
+UNMATCHED = '<unmatched>'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BOUNDS = tuple(mantissa * 2.0 ** exponent for exponent in range(-16, 5) for mantissa in (1.0, 1.5))
+
+
+class _Shard:
+    __slots__ = ('requests', 'latency', 'started')
+
+    def __init__(self):
+        # (route, method, status) -> [requests, bytes, cache hits]
+        self.requests = {}
+        # (route, method) -> [bucket counts..., sum of seconds]
+        self.latency = {}
+        # (route, method) -> requests that named their route when they started
+        self.started = {}
+
+
+class RequestMetrics:
+    def __init__(self, bounds=LATENCY_BOUNDS):
+        self.bounds = bounds
+        self._shards = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._created = time.time()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def started(self, route, method):
+        """A request has been routed; it counts as in flight until finished()"""
+        started = self._shard().started
+        key = (route, method)
+        started[key] = started.get(key, 0) + 1
+
+    def finished(self, route, method, status, sent_bytes, seconds, cache_hit=False):
+        shard = self._shard()
+        key = (route, method, status)
+        counters = shard.requests.get(key)
+        if counters is None:
+            counters = shard.requests[key] = [0, 0, 0]
+        counters[0] += 1
+        counters[1] += sent_bytes
+        if cache_hit:
+            counters[2] += 1
+        histogram = shard.latency.get(key[:2])
+        if histogram is None:
+            histogram = shard.latency[key[:2]] = [0] * (len(self.bounds) + 2)
+        histogram[bisect.bisect_left(self.bounds, seconds)] += 1
+        histogram[-1] += seconds
+
+    def _merged(self):
+        with self._lock:
+            shards = list(self._shards)
+        requests, latency, started = {}, {}, {}
+        for shard in shards:
+            for key, counters in dict(shard.requests).items():
+                total = requests.setdefault(key, [0, 0, 0])
+                for i, value in enumerate(counters):
+                    total[i] += value
+            for key, histogram in dict(shard.latency).items():
+                total = latency.setdefault(key, [0] * len(histogram))
+                for i, value in enumerate(histogram):
+                    total[i] += value
+            for key, count in dict(shard.started).items():
+                started[key] = started.get(key, 0) + count
+        return requests, latency, started
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        requests, latency, started = self._merged()
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        family('mock_http_requests_total', 'counter', 'Requests answered, by route template, method and status.')
+        for (route, method, status), counters in sorted(requests.items()):
+            lines.append(f'mock_http_requests_total{_labels(route, method, status=status)} {counters[0]}')
+        family('mock_http_response_bytes_total', 'counter', 'Response body bytes written.')
+        for (route, method, status), counters in sorted(requests.items()):
+            lines.append(f'mock_http_response_bytes_total{_labels(route, method, status=status)} {counters[1]}')
+        family('mock_http_cache_hits_total', 'counter', 'Requests answered from the response cache.')
+        for (route, method, status), counters in sorted(requests.items()):
+            if counters[2]:
+                lines.append(f'mock_http_cache_hits_total{_labels(route, method, status=status)} {counters[2]}')
+
+        family('mock_http_requests_in_flight', 'gauge', 'Routed requests not answered yet.')
+        answered = {}
+        for (route, method, _), counters in requests.items():
+            answered[route, method] = answered.get((route, method), 0) + counters[0]
+        for (route, method), count in sorted(started.items()):
+            # Unmatched requests never start, so they cannot be in flight
+            lines.append(f'mock_http_requests_in_flight{_labels(route, method)} '
+                         f'{max(count - answered.get((route, method), 0), 0)}')
+
+        family('mock_http_request_duration_seconds', 'histogram',
+               'Time from the request line to the response being written.')
+        for (route, method), histogram in sorted(latency.items()):
+            cumulative = 0
+            for bound, count in zip(self.bounds, histogram):
+                cumulative += count
+                lines.append(f'mock_http_request_duration_seconds_bucket{_labels(route, method, le=f"{bound:.9g}")} '
+                             f'{cumulative}')
+            cumulative += histogram[-2]
+            lines.append(f'mock_http_request_duration_seconds_bucket{_labels(route, method, le="+Inf")} {cumulative}')
+            lines.append(f'mock_http_request_duration_seconds_sum{_labels(route, method)} {histogram[-1]:.9g}')
+            lines.append(f'mock_http_request_duration_seconds_count{_labels(route, method)} {cumulative}')
+
+        family('mock_process_start_time_seconds', 'gauge', 'Start time of the metrics registry, in unix seconds.')
+        lines.append(f'mock_process_start_time_seconds {self._created:.3f}')
+        return ('\n'.join(lines) + '\n').encode()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(route, method, **extra):
+    pairs = [('route', route), ('method', method), *extra.items()]
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
@@ -0,0 +1,140 @@
+"""
+Indexed movie store.
+
+Both mock scripts keep their movies as a list of dicts. The store wraps that
+list with a dict on ``id`` and on ``movieId`` for the detail routes, plus
+secondary indexes on category, director and release date, so none of the
+routes has to scan the catalog. Records are shared, not copied.
+
+Category and director fields hold comma separated names
+("Action, Adventure, Sci-Fi", "Anthony Russo, Joe Russo"); each name is
+indexed on its own, case-insensitively.
+
+search() answers title, director, category and description queries from a
+SearchIndex (see mock_backend.search). It is built on the first search, so
+a catalog nobody searches does not pay for it, and kept up to date by add()
+from then on.
+"""
+
+import bisect
+import threading
+
+from mock_backend.search import SearchIndex
+
+
+def _names(value):
+    return [name.strip().casefold() for name in (value or '').split(',') if name.strip()]
+
+
+def _field(movie, *keys):
+    for key in keys:
+        value = movie.get(key)
+        if value:
+            return value
+    return None
+
+
+class MovieStore:
+    def __init__(self, movies=()):
+        self._movies = []
+        self._by_id = {}
+        self._by_movie_id = {}
+        self._by_category = {}
+        self._by_director = {}
+        self._by_release_date = {}
+        # (releaseDate, position) kept sorted for range queries
+        self._release_dates = []
+        self._search = None
+        self._lock = threading.Lock()
+        for movie in movies:
+            self._index(movie, self._release_dates.append)
+        self._release_dates.sort()
+
+    def __len__(self):
+        return len(self._movies)
+
+    def __iter__(self):
+        return iter(self._movies)
+
+    def _index(self, movie, insert_date):
+        position = len(self._movies)
+        self._movies.append(movie)
+        if movie.get('id') is not None:
+            self._by_id[movie['id']] = movie
+        if movie.get('movieId') is not None:
+            self._by_movie_id[movie['movieId']] = movie
+        for name in _names(_field(movie, 'categoryName', 'movieCategory')):
+            self._by_category.setdefault(name, []).append(movie)
+        for name in _names(_field(movie, 'directorName', 'movieDirector')):
+            self._by_director.setdefault(name, []).append(movie)
+        release_date = _field(movie, 'releaseDate', 'movieReleaseDate')
+        if release_date:
+            self._by_release_date.setdefault(release_date, []).append(movie)
+            insert_date((release_date, position))
+
+    def add(self, movie):
+        """Append a movie and update every index"""
+        with self._lock:
+            self._index(movie, lambda item: bisect.insort(self._release_dates, item))
+            if self._search is not None:
+                self._search.add(len(self._movies) - 1, movie)
+        return movie
+
+    def next_id(self):
+        """Smallest id above every id and movieId in the store"""
+        return max(max(self._by_id, default=0), max(self._by_movie_id, default=0)) + 1
+
+    def all(self):
+        """Every movie in insertion order (the live list, don't mutate it)"""
+        return self._movies
+
+    def first(self):
+        return self._movies[0] if self._movies else None
+
+    def get(self, movie_id):
+        """Movie by id, falling back to movieId"""
+        movie = self._by_id.get(movie_id)
+        if movie is None:
+            movie = self._by_movie_id.get(movie_id)
+        return movie
+
+    def by_movie_id(self, movie_id):
+        return self._by_movie_id.get(movie_id)
+
+    def by_category(self, name):
+        return list(self._by_category.get(name.strip().casefold(), ()))
+
+    def by_director(self, name):
+        return list(self._by_director.get(name.strip().casefold(), ()))
+
+    def released_on(self, date):
+        """Movies released on an ISO date (YYYY-MM-DD)"""
+        return list(self._by_release_date.get(date, ()))
+
+    def released_between(self, start=None, end=None):
+        """Movies released in [start, end], ordered by release date; either bound may be None"""
+        dates = self._release_dates
+        low = 0 if start is None else bisect.bisect_left(dates, (start,))
+        high = len(dates) if end is None else bisect.bisect_right(dates, (end, float('inf')))
+        movies = self._movies
+        return [movies[position] for _, position in dates[low:high]]
+
+    def search(self, query, limit=20):
+        """Movies best matching a text query, the last word also as a prefix"""
+        index = self._search
+        if index is None:
+            with self._lock:
+                index = self._search
+                if index is None:
+                    index = SearchIndex()
+                    for position, movie in enumerate(self._movies):
+                        index.add(position, movie)
+                    self._search = index
+        movies = self._movies
+        return [movies[position] for position in index.search(query, limit)]
+
+    def categories(self):
+        return sorted(self._by_category)
+
+    def directors(self):
+        return sorted(self._by_director)
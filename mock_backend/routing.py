@@ -0,0 +1,219 @@
+"""
+Compiled per-method router.
+
+Templates without parameters go into an exact-match dict. Templates with
+parameters go into a segment trie which is compiled into a single regular
+expression, so a path is resolved by one dict probe and at most one regex
+match no matter how many routes are registered or in which order. The
+regex follows the trie, so it only ever compares a path against the
+branches sharing its prefix.
+
+Most parameterized routes are a literal prefix and one parameter
+(``/api/movie/movies/{movieId:int}``). Those are also kept by prefix: a
+path whose part before its last ``/`` is such a prefix is resolved by a
+second dict probe, without the regex. Paths that this misses still go
+through the regex, so either way the same route wins.
+Parameters are written ``{name}`` or ``{name:int}``; ``int`` segments only
+match digits and are converted before the handler is called.
+
+    routes = Router()
+
+    @routes.get('/api/movie/movies/{movieId:int}')
+    def movie_by_id(self, params):
+        ...
+
+    route, params = routes.resolve('GET', '/api/movie/movies/3')
+
+At every trie level literal segments are tried first, then ``int``
+parameters, then plain string parameters.
+"""
+
+import re
+
+# kind -> (pattern, conversion of the matched text, None to keep it as is)
+PARAM_TYPES = {
+    'int': ('[0-9]+', int),
+    'str': ('[^/]+', None),
+}
+
+
+class Route:
+    __slots__ = ('method', 'template', 'handler', 'options', 'param_names')
+
+    def __init__(self, method, template, handler, options, param_names):
+        self.method = method
+        self.template = template
+        self.handler = handler
+        self.options = options
+        self.param_names = param_names
+
+    def __repr__(self):
+        return f"Route({self.method} {self.template})"
+
+
+class _Node:
+    __slots__ = ('literals', 'params', 'route')
+
+    def __init__(self):
+        self.literals = {}
+        self.params = {}
+        self.route = None
+
+
+def _params_builder(captures):
+    """Function building the params dict of a match from ((param name, group index, convert), ...)
+
+    Generated as one dict display, which costs a fraction of filling a dict
+    in a loop or from zip().
+    """
+    namespace = {}
+    items = []
+    for name, group, convert in captures:
+        value = f'match[{group}]'
+        if convert is not None:
+            namespace[f'_convert{group}'] = convert
+            value = f'_convert{group}({value})'
+        items.append(f'{name!r}: {value}')
+    return eval(f"lambda match: {{{', '.join(items)}}}", namespace)
+
+
+class _CompiledTree:
+    """Regex over one method's trie plus the group layout of every route"""
+
+    def __init__(self, root):
+        self._group = 0
+        # index of the empty group closing a route -> (route, function building its params from the match)
+        self.endpoints = {}
+        # literal prefix -> (route of prefix/{int}, route of prefix/{str}), either None
+        self.tails = {}
+        self.match = re.compile(self._emit(root, ())).match
+        self._collect_tails(root, '')
+
+    def _collect_tails(self, node, prefix):
+        routes = tuple(node.params[kind].route if kind in node.params else None for kind in ('int', 'str'))
+        if routes != (None, None):
+            self.tails[prefix] = routes
+        for literal, child in node.literals.items():
+            self._collect_tails(child, prefix + '/' + literal)
+
+    def _next_group(self):
+        self._group += 1
+        return self._group
+
+    def _emit(self, node, captured):
+        alternatives = []
+        for literal, child in node.literals.items():
+            alternatives.append('/' + re.escape(literal) + self._emit(child, captured))
+        for kind in ('int', 'str'):
+            child = node.params.get(kind)
+            if child is not None:
+                pattern, convert = PARAM_TYPES[kind]
+                group = self._next_group()
+                alternatives.append(f'/({pattern})' + self._emit(child, captured + ((group, convert),)))
+        if node.route is not None:
+            # Matched last, so the match's lastindex tells the route
+            marker = self._next_group()
+            names = node.route.param_names
+            self.endpoints[marker] = (node.route, _params_builder(tuple(
+                (name, group, convert) for name, (group, convert) in zip(names, captured))))
+            alternatives.append('()\\Z')
+        if not alternatives:
+            # Only the root of a method without parameterized routes: match nothing
+            return '(?!)'
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return '(?:' + '|'.join(alternatives) + ')'
+
+
+class Router:
+    def __init__(self):
+        self._static = {}
+        self._trees = {}
+        # method -> (static table, tails, match, endpoints) of its compiled tree, built on first resolve
+        self._resolvers = {}
+
+    def add(self, method, template, handler, **options):
+        """Register handler for method and template, returns the Route"""
+        if '{' not in template:
+            route = Route(method, template, handler, options, ())
+            table = self._static.setdefault(method, {})
+            if template in table:
+                raise ValueError(f"Duplicate route: {method} {template}")
+            table[template] = route
+            self._resolvers.pop(method, None)
+            return route
+
+        node = self._trees.setdefault(method, _Node())
+        names = []
+        for segment in template.strip('/').split('/'):
+            if segment.startswith('{') and segment.endswith('}'):
+                name, _, kind = segment[1:-1].partition(':')
+                kind = kind or 'str'
+                if kind not in PARAM_TYPES:
+                    raise ValueError(f"Unknown parameter type '{kind}' in {template}")
+                names.append(name)
+                node = node.params.setdefault(kind, _Node())
+            else:
+                node = node.literals.setdefault(segment, _Node())
+        if node.route is not None:
+            raise ValueError(f"Duplicate route: {method} {template}")
+        node.route = Route(method, template, handler, options, tuple(names))
+        self._resolvers.pop(method, None)
+        return node.route
+
+    def route(self, method, template, **options):
+        """Decorator form of add()"""
+        def register(handler):
+            self.add(method, template, handler, **options)
+            return handler
+        return register
+
+    def get(self, template, **options):
+        return self.route('GET', template, **options)
+
+    def post(self, template, **options):
+        return self.route('POST', template, **options)
+
+    def _resolver(self, method):
+        if method not in self._static and method not in self._trees:
+            return None
+        tree = self._trees.get(method)
+        compiled = _CompiledTree(tree if tree is not None else _Node())
+        resolver = (self._static.get(method, {}), compiled.tails, compiled.match, compiled.endpoints)
+        self._resolvers[method] = resolver
+        return resolver
+
+    def resolve(self, method, path):
+        """Return (route, params) for path, or (None, None) when nothing matches"""
+        resolver = self._resolvers.get(method) or self._resolver(method)
+        if resolver is None:
+            return None, None
+        static, tails, match, endpoints = resolver
+        route = static.get(path)
+        if route is not None:
+            return route, {}
+        head, _, segment = path.rpartition('/')
+        tail = tails.get(head)
+        if tail is not None and segment:
+            int_route, str_route = tail
+            if int_route is not None and segment.isascii() and segment.isdigit():
+                return int_route, {int_route.param_names[0]: int(segment)}
+            if str_route is not None:
+                return str_route, {str_route.param_names[0]: segment}
+        found = match(path)
+        if found is None:
+            return None, None
+        route, build = endpoints[found.lastindex]
+        return route, build(found)
+
+    def routes(self):
+        """All registered routes, static ones first"""
+        found = [route for table in self._static.values() for route in table.values()]
+        stack = list(self._trees.values())
+        while stack:
+            node = stack.pop()
+            if node.route is not None:
+                found.append(node.route)
+            stack.extend(node.literals.values())
+            stack.extend(node.params.values())
+        return found
@@ -0,0 +1,150 @@
+"""
+Full-text and prefix search over the movie catalog.
+
+An inverted index maps every term of movieName, description, directorName
+and categoryName to a postings list of (position, weight) pairs, position
+being the movie's place in the MovieStore. Terms are folded before indexing
+and querying: lowercased, with Vietnamese diacritics removed ("Hà Nội" and
+"Đà Lạt" index as "ha noi" and "da lat"), so a query typed with or without
+them finds the same movies.
+
+A query matches the movies containing every one of its terms. The last term
+is also matched as a prefix, for autocomplete while typing ("aven" finds
+"Avengers"), unless the query ends with a space. Prefixes are looked up by
+bisecting the sorted vocabulary, so only the terms that start with one are
+visited. Terms are intersected rarest first; a common term's postings,
+sorted by position, are then bisected for the few remaining candidates
+instead of walked.
+
+Ranking sums, over the query terms, the weight of the field a term was found
+in (a title match counts more than a description match) times its idf, so
+rare words rank above ones every movie has. A term matched only as a prefix
+counts for half. Ties keep catalog order.
+
+Adding a movie appends to the postings of its terms and inserts new terms in
+the vocabulary, so the index never has to be rebuilt. Postings are only ever
+appended to, which lets searches read them while an add runs.
+"""
+
+import bisect
+import heapq
+import math
+import re
+import unicodedata
+
+FIELDS = (
+    (('movieName',), 4.0),
+    (('directorName', 'movieDirector'), 2.0),
+    (('categoryName', 'movieCategory'), 2.0),
+    (('description', 'movieDescription'), 1.0),
+)
+PREFIX_WEIGHT = 0.5
+# Postings this many times longer than the candidates are bisected rather than walked
+_BISECT_RATIO = 16
+
+# đ is a letter of its own, not d with a combining mark, so NFD leaves it alone
+_LETTERS = str.maketrans({'đ': 'd', 'Đ': 'D'})
+_COMBINING = re.compile('[\u0300-\u036f]')
+_TERM = re.compile(r'\w+')
+
+
+def fold(text):
+    """text lowercased, without diacritics"""
+    return _COMBINING.sub('', unicodedata.normalize('NFD', text.translate(_LETTERS))).casefold()
+
+
+def terms(text):
+    return _TERM.findall(fold(text))
+
+
+class SearchIndex:
+    def __init__(self):
+        self._postings = {}
+        # Every indexed term, sorted, for prefix lookups
+        self._vocabulary = []
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, position, movie):
+        """Index a movie stored at position; positions must be added in increasing order"""
+        weights = {}
+        for keys, weight in FIELDS:
+            for key in keys:
+                value = movie.get(key)
+                if value:
+                    for term in terms(str(value)):
+                        weights[term] = weights.get(term, 0.0) + weight
+                    break
+        postings = self._postings
+        for term, weight in weights.items():
+            postings_list = postings.get(term)
+            if postings_list is None:
+                postings[term] = [(position, weight)]
+                bisect.insort(self._vocabulary, term)
+            else:
+                postings_list.append((position, weight))
+        self._size += 1
+
+    def _expand(self, term, prefix):
+        """Indexed words matching term, all those starting with it when prefix"""
+        if not prefix:
+            return [term] if term in self._postings else []
+        vocabulary = self._vocabulary
+        low = bisect.bisect_left(vocabulary, term)
+        return vocabulary[low:bisect.bisect_left(vocabulary, term + '\U0010ffff', low)]
+
+    def _matches(self, term, words, within):
+        """position -> score of the movies one of words occurs in, only those in within unless it is None"""
+        postings = self._postings
+        size = self._size
+        scores = {}
+        for word in words:
+            postings_list = postings[word]
+            count = len(postings_list)
+            idf = math.log(1.0 + size / count)
+            if word != term:
+                idf *= PREFIX_WEIGHT
+            if within is not None and len(within) * _BISECT_RATIO < count:
+                # Few candidates left: look them up in the sorted postings instead of walking them
+                for position in within:
+                    index = bisect.bisect_left(postings_list, (position,))
+                    if index < count and postings_list[index][0] == position:
+                        score = postings_list[index][1] * idf
+                        if score > scores.get(position, 0.0):
+                            scores[position] = score
+                continue
+            for position, weight in postings_list:
+                if within is not None and position not in within:
+                    continue
+                score = weight * idf
+                if score > scores.get(position, 0.0):
+                    scores[position] = score
+        return scores
+
+    def search(self, query, limit=20):
+        """Positions of the best matches of query, best first, at most limit of them"""
+        words = terms(query)
+        if not words or limit < 1:
+            return []
+        prefix = not query[-1].isspace()
+        postings = self._postings
+        plan = []
+        for index, term in enumerate(words):
+            found = self._expand(term, prefix and index == len(words) - 1)
+            if not found:
+                return []
+            plan.append((sum(len(postings[word]) for word in found), term, found))
+        # Rarest term first, so the others only score its candidates
+        plan.sort(key=lambda step: step[0])
+        scores = None
+        for _, term, found in plan:
+            matches = self._matches(term, found, scores)
+            if scores is not None:
+                matches = {position: score + scores[position] for position, score in matches.items()}
+            scores = matches
+            if not scores:
+                return []
+        best = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [position for position, _ in best]
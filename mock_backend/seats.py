@@ -0,0 +1,237 @@
+"""
+Seat inventory for ticket booking.
+
+The frontend picks chairs from a fixed hall plan (BuyTicketPage: rows A and
+B of 8 seats, C to E of 6, F of 7) and posts them to sendTicketDetail as one
+space-separated string such as " A1 B2", together with movieName, saloonName,
+movieDay and movieStartTime, which together identify the showtime.
+
+Every showtime gets two bitmaps, one bit per seat of the plan: seats sold and
+seats held by a reservation that has not been confirmed yet. Reserving,
+confirming and releasing several seats is a mask test and a mask update, done
+under the lock of the showtime, so a booking takes all of its seats or none
+of them and two concurrent bookings can never share a seat. The locks are
+striped by showtime, so bookings for different showtimes rarely wait for each
+other, and every critical section is a few integer operations, short enough
+to run on the event loop of the asyncio server.
+
+Holds expire after ``hold_seconds``; their seats are reclaimed when a later
+reservation for the same showtime needs them. Ticket and hold ids are a
+prefix (the start time in milliseconds) plus a counter, so they never repeat,
+however many bookings share a second.
+
+Every change is also passed to ``on_change`` as a plain tuple, which apply()
+makes again on another inventory; multi-process serving (see
+mock_backend.workers) uses that to keep the inventories of its workers
+equal, ids included.
+"""
+
+import itertools
+import threading
+import time
+
+SEAT_ROWS = (('A', 8), ('B', 8), ('C', 6), ('D', 6), ('E', 6), ('F', 7))
+SHOWTIME_FIELDS = ('movieName', 'saloonName', 'movieDay', 'movieStartTime')
+DEFAULT_HOLD_SECONDS = 300
+_LOCK_STRIPES = 64
+
+
+class SeatConflict(ValueError):
+    """Some of the requested seats are sold or held by another booking"""
+
+    def __init__(self, seats):
+        self.seats = seats
+        super().__init__(f"Seats already taken: {' '.join(seats)}")
+
+
+def showtime_key(record):
+    """(movieName, saloonName, movieDay, movieStartTime) of a ticket request"""
+    key = tuple(str(record.get(field) or '').strip() for field in SHOWTIME_FIELDS)
+    missing = [field for field, value in zip(SHOWTIME_FIELDS, key) if not value]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)}")
+    return key
+
+
+class SeatLayout:
+    """Seat names of a hall plan and their bit positions"""
+
+    def __init__(self, rows=SEAT_ROWS):
+        self.names = tuple(f'{row}{number}' for row, count in rows for number in range(1, count + 1))
+        self._bits = {name: bit for bit, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def mask(self, chair_numbers):
+        """Bitmap of chairNumbers, a string such as " A1 B2" or a list of seat names"""
+        if isinstance(chair_numbers, str):
+            chair_numbers = chair_numbers.replace(',', ' ').split()
+        mask = 0
+        for name in chair_numbers or ():
+            bit = self._bits.get(str(name).strip().upper())
+            if bit is None:
+                raise ValueError(f"Unknown seat {name!r}")
+            if mask >> bit & 1:
+                raise ValueError(f"Seat {name} requested twice")
+            mask |= 1 << bit
+        if not mask:
+            raise ValueError("No seats requested")
+        return mask
+
+    def seats(self, mask):
+        """Seat names of a bitmap, in plan order"""
+        names = []
+        while mask:
+            low = mask & -mask
+            names.append(self.names[low.bit_length() - 1])
+            mask ^= low
+        return names
+
+
+class SeatInventory:
+    def __init__(self, layout=None, hold_seconds=DEFAULT_HOLD_SECONDS, clock=time.monotonic, on_change=None):
+        self.layout = layout or SeatLayout()
+        self.hold_seconds = hold_seconds
+        self._clock = clock
+        self.on_change = on_change
+        self._locks = tuple(threading.Lock() for _ in range(_LOCK_STRIPES))
+        # showtime -> bitmap; each showtime's entries only change under its lock
+        self._sold = {}
+        self._held = {}
+        self._holds_of = {}
+        # hold id -> (showtime, mask, expires); single dict operations are atomic
+        self._holds = {}
+        prefix = time.time_ns() // 1000000
+        self._ticket_ids = (f"TK{prefix}{n:06d}" for n in itertools.count(1))
+        self._hold_ids = (f"HD{prefix}{n:06d}" for n in itertools.count(1))
+        self._id_lock = threading.Lock()
+
+    def _lock(self, showtime):
+        return self._locks[hash(showtime) % _LOCK_STRIPES]
+
+    def _next_id(self, ids):
+        # Ids are only taken for changes that happen, so inventories kept
+        # equal through apply() hand out the same ones
+        with self._id_lock:
+            return next(ids)
+
+    def _changed(self, *change):
+        if self.on_change is not None:
+            self.on_change(change)
+
+    def _expire(self, showtime, now):
+        # Called with the showtime's lock held
+        expired = [hold_id for hold_id in self._holds_of.get(showtime, ())
+                   if self._holds[hold_id][2] <= now]
+        for hold_id in expired:
+            self._drop_hold(hold_id)
+
+    def _drop_hold(self, hold_id):
+        showtime, mask, _ = self._holds.pop(hold_id)
+        self._held[showtime] &= ~mask
+        self._holds_of[showtime].discard(hold_id)
+        return mask
+
+    def _claim(self, showtime, mask):
+        """Check that every seat of mask is free, with the showtime's lock held"""
+        taken = (self._sold.get(showtime, 0) | self._held.get(showtime, 0)) & mask
+        if taken and self._held.get(showtime, 0) & taken:
+            self._expire(showtime, self._clock())
+            taken = (self._sold.get(showtime, 0) | self._held.get(showtime, 0)) & mask
+        if taken:
+            raise SeatConflict(self.layout.seats(taken))
+
+    def taken(self, showtime):
+        """Names of the seats sold or held for a showtime"""
+        with self._lock(showtime):
+            self._expire(showtime, self._clock())
+            return self.layout.seats(self._sold.get(showtime, 0) | self._held.get(showtime, 0))
+
+    def sold_count(self, showtime):
+        return self._sold.get(showtime, 0).bit_count()
+
+    def book(self, showtime, chair_numbers):
+        """Sell the seats at once, returns (ticket id, seat names); raises SeatConflict"""
+        mask = self.layout.mask(chair_numbers)
+        with self._lock(showtime):
+            self._claim(showtime, mask)
+            self._sold[showtime] = self._sold.get(showtime, 0) | mask
+            ticket_id = self._next_id(self._ticket_ids)
+            self._changed('sold', ticket_id, showtime, mask)
+        return ticket_id, self.layout.seats(mask)
+
+    def reserve(self, showtime, chair_numbers):
+        """Hold the seats until confirmed, released or expired, returns (hold id, seat names)"""
+        mask = self.layout.mask(chair_numbers)
+        with self._lock(showtime):
+            self._claim(showtime, mask)
+            hold_id = self._next_id(self._hold_ids)
+            expires = self._clock() + self.hold_seconds
+            self._hold(hold_id, showtime, mask, expires)
+            self._changed('held', hold_id, showtime, mask, expires)
+        return hold_id, self.layout.seats(mask)
+
+    def _hold(self, hold_id, showtime, mask, expires):
+        self._held[showtime] = self._held.get(showtime, 0) | mask
+        self._holds[hold_id] = (showtime, mask, expires)
+        self._holds_of.setdefault(showtime, set()).add(hold_id)
+
+    def confirm(self, hold_id):
+        """Sell the seats of a hold, returns (ticket id, showtime, seat names) or None when
+        there is no such hold or it has expired"""
+        hold = self._holds.get(hold_id)
+        if hold is None:
+            return None
+        showtime = hold[0]
+        with self._lock(showtime):
+            if self._holds.get(hold_id) is not hold:
+                return None
+            if hold[2] <= self._clock():
+                self._drop_hold(hold_id)
+                return None
+            mask = self._drop_hold(hold_id)
+            self._sold[showtime] = self._sold.get(showtime, 0) | mask
+            ticket_id = self._next_id(self._ticket_ids)
+            self._changed('confirmed', ticket_id, showtime, mask, hold_id)
+        return ticket_id, showtime, self.layout.seats(mask)
+
+    def release(self, hold_id):
+        """Free the seats of a hold, returns their names or None when there is no such hold"""
+        hold = self._holds.get(hold_id)
+        if hold is None:
+            return None
+        with self._lock(hold[0]):
+            if self._holds.get(hold_id) is not hold:
+                return None
+            mask = self._drop_hold(hold_id)
+            self._changed('released', hold_id)
+        return self.layout.seats(mask)
+
+    def apply(self, change):
+        """Make a change passed to another inventory's on_change; it is not passed on again"""
+        kind, *args = change
+        if kind == 'released':
+            hold_id, = args
+            hold = self._holds.get(hold_id)
+            if hold is not None:
+                with self._lock(hold[0]):
+                    if hold_id in self._holds:
+                        self._drop_hold(hold_id)
+            return
+        if kind == 'held':
+            hold_id, showtime, mask, expires = args
+        else:
+            _, showtime, mask, *hold = args
+        # JSON turns the showtime tuple into a list
+        showtime = tuple(showtime)
+        with self._lock(showtime):
+            if kind == 'held':
+                self._next_id(self._hold_ids)
+                self._hold(hold_id, showtime, mask, expires)
+                return
+            # The hold may be gone here already, expired a moment earlier by this inventory's clock
+            if hold and hold[0] in self._holds:
+                self._drop_hold(hold[0])
+            self._sold[showtime] = self._sold.get(showtime, 0) | mask
+            self._next_id(self._ticket_ids)
@@ -0,0 +1,271 @@
+"""
+Serving modes for the mock backend.
+
+- ``single``   the original HTTPServer, one connection at a time
+- ``threaded`` a bounded pool of worker threads with a configurable backlog
+- ``asyncio``  an event loop that drives the same BaseHTTPRequestHandler
+               subclass, so every route handler is shared between modes
+
+Any mode can run in several processes with ``--workers`` (see
+mock_backend.workers), which hands make_server() a listening socket instead
+of an address to bind.
+"""
+
+import argparse
+import asyncio
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer
+
+from mock_backend import workers
+from mock_backend.body import DEFAULT_MAX_BODY_SIZE
+from mock_backend.handler import DEFAULT_IDLE_TIMEOUT, DEFAULT_MAX_KEEPALIVE_REQUESTS
+
+MODES = ('single', 'threaded', 'asyncio')
+DEFAULT_MODE = 'threaded'
+DEFAULT_THREADS = 32
+DEFAULT_BACKLOG = 128
+
+
+class ThreadPoolHTTPServer(HTTPServer):
+    """HTTPServer that hands every accepted connection to a bounded thread pool"""
+
+    def __init__(self, server_address, handler_class, threads=DEFAULT_THREADS, backlog=DEFAULT_BACKLOG,
+                 bind_and_activate=True):
+        self.request_queue_size = backlog
+        self.threads = threads
+        self._slots = threading.BoundedSemaphore(threads)
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='mock-worker')
+        super().__init__(server_address, handler_class, bind_and_activate)
+
+    def process_request(self, request, client_address):
+        # Wait for a free worker before returning to accept(), so connections
+        # beyond the pool size queue up in the kernel backlog instead of here
+        self._slots.acquire()
+        self._pool.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=True)
+
+
+class AsyncioHTTPServer:
+    """Serve a BaseHTTPRequestHandler subclass from an asyncio event loop
+
+    Each request is read from the stream, replayed into an in-memory rfile and
+    run through the handler's own handle_one_request(), so the route code is
+    exactly the one used by the thread-based servers. Injected delays, and
+    work a route deferred with handler.defer(), are awaited here rather than
+    waited for in the handler.
+    """
+
+    defers_faults = True
+    defers_work = True
+
+    def __init__(self, server_address, handler_class, backlog=DEFAULT_BACKLOG, sock=None):
+        self.server_address = server_address
+        self.RequestHandlerClass = handler_class
+        self.backlog = backlog
+        self.socket = sock
+        self._loop = None
+        self._server = None
+
+    def serve_forever(self):
+        asyncio.run(self._serve())
+
+    def shutdown(self):
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+
+    def server_close(self):
+        pass
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        if self.socket is not None:
+            self._server = await asyncio.start_server(self._handle_connection, sock=self.socket)
+        else:
+            host, port = self.server_address[:2]
+            self._server = await asyncio.start_server(
+                self._handle_connection, host, port, backlog=self.backlog, reuse_address=True)
+        self.server_address = self._server.sockets[0].getsockname()[:2]
+        try:
+            await self._server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+
+    async def _read_request(self, reader):
+        head = await reader.readuntil(b'\r\n\r\n')
+        length, chunked = _framing(head)
+        limit = getattr(self, 'max_body_size', DEFAULT_MAX_BODY_SIZE)
+        if chunked:
+            return head + await _read_chunked(reader, limit)
+        # A body over the limit stays unread: the handler refuses it and closes the connection
+        if length and length <= limit:
+            return head + await reader.readexactly(length)
+        return head
+
+    async def _handle_connection(self, reader, writer):
+        client_address = writer.get_extra_info('peername')
+        idle_timeout = getattr(self, 'idle_timeout', None)
+        served = 0
+        try:
+            while True:
+                try:
+                    raw_request = await asyncio.wait_for(self._read_request(reader), idle_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError,
+                        asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                handler = self._run_handler(raw_request, client_address, served)
+                served += 1
+                if handler.deferred is not None:
+                    # Its outcome, exception included, is for resume() to handle
+                    await asyncio.wait([asyncio.wrap_future(handler.deferred[0])])
+                    handler.resume()
+                if handler.fault is not None:
+                    await handler.fault.deliver_async(writer, handler.wfile.getvalue())
+                    if handler.fault.reset:
+                        return
+                else:
+                    writer.writelines(handler.wfile)
+                    await writer.drain()
+                if handler.close_connection:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _run_handler(self, raw_request, client_address, served):
+        # Build the handler without BaseRequestHandler.__init__, which would
+        # try to drive a real socket
+        handler = self.RequestHandlerClass.__new__(self.RequestHandlerClass)
+        handler.request = None
+        handler.client_address = client_address
+        handler.server = self
+        handler.rfile = io.BytesIO(raw_request)
+        handler.wfile = _Output()
+        handler.close_connection = True
+        handler.requests_on_connection = served
+        handler.handle_one_request()
+        return handler
+
+
+class _Output(list):
+    """wfile of a handler run by the event loop: the written byte strings, kept as they are"""
+
+    write = list.append
+    writelines = list.extend
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return b''.join(self)
+
+
+def _framing(head):
+    """(Content-Length, whether the body is chunked) of a request head"""
+    length, chunked = 0, False
+    for line in head.split(b'\r\n'):
+        name = line[:18].lower()
+        if name.startswith(b'content-length:'):
+            try:
+                length = int(line[15:].strip())
+            except ValueError:
+                length = 0
+        elif name == b'transfer-encoding:':
+            chunked = line[18:].strip().lower() == b'chunked'
+    return length, chunked
+
+
+async def _read_chunked(reader, limit):
+    """Raw chunked body, framing included, for the handler to decode
+
+    Reading stops at the first malformed line or at the chunk that crosses
+    limit; the handler then answers 400 or 413 from what was read.
+    """
+    raw = []
+    size = 0
+    while True:
+        line = await reader.readuntil(b'\r\n')
+        raw.append(line)
+        try:
+            length = int(line.split(b';', 1)[0].strip(), 16)
+        except ValueError:
+            return b''.join(raw)
+        if length <= 0 or size + length > limit:
+            break
+        size += length
+        raw.append(await reader.readexactly(length + 2))
+    if length == 0:
+        while True:
+            line = await reader.readuntil(b'\r\n')
+            raw.append(line)
+            if line == b'\r\n':
+                break
+    return b''.join(raw)
+
+
+def _adopt_socket(httpd, sock):
+    # In place of the socket a server built with bind_and_activate=False made
+    httpd.socket.close()
+    httpd.socket = sock
+    httpd.server_address = sock.getsockname()
+    httpd.server_name, httpd.server_port = httpd.server_address[:2]
+
+
+def make_server(mode, server_address, handler_class, threads=DEFAULT_THREADS, backlog=DEFAULT_BACKLOG,
+                idle_timeout=DEFAULT_IDLE_TIMEOUT, max_keepalive_requests=DEFAULT_MAX_KEEPALIVE_REQUESTS,
+                max_body_size=DEFAULT_MAX_BODY_SIZE, sock=None):
+    """Build a server for the requested serving mode, on sock when given (already listening)"""
+    if mode == 'single':
+        httpd = HTTPServer(server_address, handler_class, bind_and_activate=sock is None)
+    elif mode == 'threaded':
+        httpd = ThreadPoolHTTPServer(server_address, handler_class, threads=threads, backlog=backlog,
+                                     bind_and_activate=sock is None)
+    elif mode == 'asyncio':
+        httpd = AsyncioHTTPServer(server_address, handler_class, backlog=backlog, sock=sock)
+    else:
+        raise ValueError(f"Unknown serving mode: {mode}")
+    if sock is not None and mode != 'asyncio':
+        _adopt_socket(httpd, sock)
+    httpd.idle_timeout = idle_timeout
+    httpd.max_keepalive_requests = max_keepalive_requests
+    httpd.max_body_size = max_body_size
+    return httpd
+
+
+def build_arg_parser(description=None):
+    """Command line options shared by both mock backend scripts"""
+    parser = argparse.ArgumentParser(description=description,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='localhost', help='interface to bind (default: localhost)')
+    parser.add_argument('--port', type=int, default=8080, help='port to bind (default: 8080)')
+    parser.add_argument('--mode', choices=MODES, default=DEFAULT_MODE,
+                        help=f'serving mode (default: {DEFAULT_MODE})')
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS,
+                        help=f'worker threads for the threaded mode (default: {DEFAULT_THREADS})')
+    parser.add_argument('--backlog', type=int, default=DEFAULT_BACKLOG,
+                        help=f'listen backlog (default: {DEFAULT_BACKLOG})')
+    parser.add_argument('--idle-timeout', type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help=f'seconds an idle keep-alive connection is kept open (default: {DEFAULT_IDLE_TIMEOUT})')
+    parser.add_argument('--max-keepalive-requests', type=int, default=DEFAULT_MAX_KEEPALIVE_REQUESTS,
+                        help=f'requests served per connection before closing it '
+                             f'(default: {DEFAULT_MAX_KEEPALIVE_REQUESTS})')
+    parser.add_argument('--max-body-size', type=int, default=DEFAULT_MAX_BODY_SIZE, metavar='BYTES',
+                        help=f'largest request body accepted, larger ones get 413 '
+                             f'(default: {DEFAULT_MAX_BODY_SIZE})')
+    workers.add_arguments(parser)
+    return parser
@@ -0,0 +1,120 @@
+"""
+Columnar showtime store.
+
+A real schedule has millions of showtimes, far too many for a dict per row.
+The store keeps one ``array`` per column: id, movieId and saloonId as machine
+integers, movieDate and movieBeginTime as small codes into sorted tables of
+the distinct values. Rows are never reordered; two permutations of the row
+numbers act as composite indexes:
+
+- ``by_saloon``  rows sorted by (movieId, saloonId, date, time)
+- ``by_date``    rows sorted by (movieId, date, time, saloonId)
+
+Each permutation has a parallel sorted array of integer keys, the sort
+columns packed in mixed radix (movie and saloon ids are replaced by their
+rank among the distinct ids, so the radices are the numbers of distinct
+values). A movie, a (saloonId, movieId) pair, a (saloonId, movieId, date)
+triple and a movie's date range are therefore each one contiguous run found
+by two C-level bisections of a key array. Only the rows of the answer are
+turned into dicts, by the caller.
+"""
+
+import bisect
+from array import array
+
+_MAX_KEY = 2 ** 63
+
+
+def _codes(values):
+    """Distinct values in order and value -> rank"""
+    ordered = sorted(values)
+    return ordered, {value: code for code, value in enumerate(ordered)}
+
+
+def _sorted_index(keys, packed):
+    """(row permutation, keys in that order) for a list of row keys"""
+    rows = sorted(range(len(keys)), key=keys.__getitem__)
+    ordered = [keys[row] for row in rows]
+    # Keys wider than 64 bits (huge schedules only) stay a list of Python ints
+    return array('l', rows), array('q', ordered) if packed else ordered
+
+
+class ShowtimeStore:
+    def __init__(self, records=()):
+        self.ids = array('q')
+        self.movie_ids = array('q')
+        self.saloon_ids = array('q')
+        movie_dates = []
+        begin_times = []
+        date_codes = {}
+        time_codes = {}
+        for record in records:
+            self.ids.append(record.get('id') or 0)
+            self.movie_ids.append(record.get('movieId') or 0)
+            self.saloon_ids.append(record.get('saloonId') or 0)
+            movie_dates.append(date_codes.setdefault(record.get('movieDate') or '', len(date_codes)))
+            begin_times.append(time_codes.setdefault(record.get('movieBeginTime') or '', len(time_codes)))
+
+        # Dates and times become codes in value order, so comparing codes compares values
+        self.date_values, date_rank = _codes(date_codes)
+        self.time_values, time_rank = _codes(time_codes)
+        date_recode = [date_rank[value] for value in date_codes]
+        time_recode = [time_rank[value] for value in time_codes]
+        self.dates = array('H', [date_recode[code] for code in movie_dates])
+        self.times = array('H', [time_recode[code] for code in begin_times])
+        del movie_dates, begin_times
+
+        _, self._movie_rank = _codes(set(self.movie_ids))
+        _, self._saloon_rank = _codes(set(self.saloon_ids))
+        self._saloons = max(len(self._saloon_rank), 1)
+        self._dates = max(len(self.date_values), 1)
+        self._times = max(len(self.time_values), 1)
+        packed = max(len(self._movie_rank), 1) * self._saloons * self._dates * self._times < _MAX_KEY
+
+        movie_rank, saloon_rank = self._movie_rank, self._saloon_rank
+        movies = [movie_rank[movie_id] for movie_id in self.movie_ids]
+        saloons = [saloon_rank[saloon_id] for saloon_id in self.saloon_ids]
+        S, D, T = self._saloons, self._dates, self._times
+        self.by_saloon, self._saloon_keys = _sorted_index([
+            ((m * S + s) * D + d) * T + t for m, s, d, t in zip(movies, saloons, self.dates, self.times)], packed)
+        self.by_date, self._date_keys = _sorted_index([
+            ((m * D + d) * T + t) * S + s for m, s, d, t in zip(movies, saloons, self.dates, self.times)], packed)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _date_code_range(self, start, end):
+        """[low, high) of the date codes inside [start, end] (ISO dates, None is open)"""
+        low = 0 if start is None else bisect.bisect_left(self.date_values, start)
+        high = len(self.date_values) if end is None else bisect.bisect_right(self.date_values, end)
+        return low, max(low, high)
+
+    @staticmethod
+    def _run(index, keys, low, high):
+        first = bisect.bisect_left(keys, low)
+        return index[first:bisect.bisect_left(keys, high, lo=first)]
+
+    def rows_for_movie(self, movie_id, start=None, end=None):
+        """Row numbers of the movie's showtimes, optionally within [start, end], by date and time"""
+        m = self._movie_rank.get(movie_id)
+        if m is None:
+            return self.by_date[:0]
+        D, TS = self._dates, self._times * self._saloons
+        low, high = self._date_code_range(start, end)
+        return self._run(self.by_date, self._date_keys, (m * D + low) * TS, (m * D + high) * TS)
+
+    def rows_at(self, saloon_id, movie_id, start=None, end=None):
+        """Row numbers of a movie's showtimes in one saloon, optionally within [start, end]"""
+        m = self._movie_rank.get(movie_id)
+        s = self._saloon_rank.get(saloon_id)
+        if m is None or s is None:
+            return self.by_saloon[:0]
+        base = (m * self._saloons + s) * self._dates
+        low, high = self._date_code_range(start, end)
+        return self._run(self.by_saloon, self._saloon_keys, (base + low) * self._times, (base + high) * self._times)
+
+    def movie_date(self, row):
+        return self.date_values[self.dates[row]]
+
+    def begin_time(self, row):
+        return self.time_values[self.times[row]]
@@ -0,0 +1,106 @@
+"""
+List responses encoded item by item.
+
+``json.dumps(movies).encode()`` holds the whole body twice, as a str and as
+its bytes, before the first byte is written. A list body built here is
+instead a Chunks: b'[', the bytes of each item, the separators and b']',
+never joined. Its length is known from the parts, so it still goes out with
+a Content-Length. The thread-based servers write it with sendmsg(), one
+batch of up to IOV_MAX buffers per call, and the asyncio server hands the
+parts to the transport's writelines().
+
+Items of stored records come from an ItemCache (see mock_backend.cache), so
+a list rebuilt after one movie was added encodes only that movie, and the
+ResponseCache entry shares its item bytes with the ItemCache instead of
+holding another copy of the body. encode_object() assembles an object from
+fragments encoded that way, such as the parts of the movie detail route,
+without encoding them again. Lists of records built per response (the
+showtime dicts) are encoded item by item without caching them.
+
+The bytes are those of ``json.dumps(records)``, so bodies and ETags are the
+same as before.
+"""
+
+import json
+import os
+
+try:
+    IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = 1024
+
+_OPEN = b'['
+_SEPARATOR = b', '
+_CLOSE = b']'
+
+
+class Chunks:
+    """Body made of byte strings written one after the other; len() is its size in bytes"""
+    __slots__ = ('parts', 'size')
+
+    def __init__(self, parts):
+        self.parts = parts
+        self.size = sum(map(len, parts))
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return iter(self.parts)
+
+    def __bytes__(self):
+        return b''.join(self.parts)
+
+
+def encode_item(record):
+    return json.dumps(record).encode()
+
+
+def encode_list(records, items=None, envelope=None):
+    """Chunks of json.dumps(records), items taken from an ItemCache.encoder() when given
+
+    With an envelope dict the list goes under its "data" key, after the envelope's own keys.
+    """
+    encode = items or encode_item
+    if envelope:
+        head = json.dumps(envelope)[:-1].encode() + b', "data": ['
+        tail = b']}'
+    else:
+        head, tail = _OPEN, _CLOSE
+    parts = [head]
+    append = parts.append
+    for record in records:
+        if len(parts) > 1:
+            append(_SEPARATOR)
+        append(encode(record))
+    append(tail)
+    return Chunks(parts)
+
+
+def encode_object(fields):
+    """Chunks of a JSON object from (key, encoded value) pairs, values being bytes or Chunks used as they are"""
+    parts = []
+    for key, value in fields:
+        parts.append((b', ' if parts else b'{') + json.dumps(key).encode() + b': ')
+        if isinstance(value, Chunks):
+            parts.extend(value.parts)
+        else:
+            parts.append(value)
+    parts.append(b'}' if parts else b'{}')
+    return Chunks(parts)
+
+
+def send_parts(sock, parts):
+    """Write every part to a blocking socket with scatter-gather sendmsg() calls"""
+    parts = [part for part in parts if part]
+    index = 0
+    while index < len(parts):
+        sent = sock.sendmsg(parts[index:index + IOV_MAX])
+        # Skip what went out; a part sent halfway continues from where it stopped
+        while sent:
+            length = len(parts[index])
+            if sent < length:
+                parts[index] = memoryview(parts[index])[sent:]
+                break
+            sent -= length
+            index += 1
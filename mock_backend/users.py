@@ -0,0 +1,151 @@
+"""
+In-memory user registry for users/add and auth/login.
+
+Users are kept by id and by email, the email index being unique and
+case-insensitive. Registered users get ids USER1, USER2, ... in order; ids
+are handed out inside STATE.mutation(), so they stay unique across worker
+processes as movie ids do.
+
+Passwords are stored salted and hashed with PBKDF2-HMAC-SHA256, as
+``pbkdf2_sha256$<iterations>$<salt>$<hash>``. Hashing is meant to cost real
+CPU time, so it runs in a small pool of threads of its own and the caller
+gets a Future: pbkdf2_hmac() releases the GIL while it works, so other
+requests keep being served, and the pool bounds how many hashes run at once
+however many requests wait on one. Handlers hand that Future to
+KeepAliveRequestHandler.defer(), which lets the asyncio server await it
+instead of blocking its event loop.
+
+Checking the password of an unknown email still hashes it (against a dummy
+hash), so a failed login costs the same whether the account exists or not.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ALGORITHM = 'pbkdf2_sha256'
+DEFAULT_ITERATIONS = 100_000
+DEFAULT_HASH_THREADS = max(os.cpu_count() or 1, 2)
+SALT_BYTES = 16
+ID_PREFIX = 'USER'
+
+
+class DuplicateEmail(ValueError):
+    """A user with that email is already registered"""
+
+
+def _email_key(email):
+    return email.strip().casefold()
+
+
+def hash_password(password, iterations=DEFAULT_ITERATIONS, salt=None):
+    """Encoded salted PBKDF2 hash of password; runs in the caller's thread"""
+    salt = salt or os.urandom(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+    return (f"{ALGORITHM}${iterations}${base64.b64encode(salt).decode()}$"
+            f"{base64.b64encode(digest).decode()}")
+
+
+def check_password(password, encoded):
+    """Whether password matches an encoded hash; runs in the caller's thread"""
+    try:
+        algorithm, iterations, salt, digest = encoded.split('$')
+        if algorithm != ALGORITHM:
+            return False
+        expected = base64.b64decode(digest)
+        actual = hashlib.pbkdf2_hmac('sha256', password.encode(), base64.b64decode(salt), int(iterations))
+    except ValueError:
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+class UserStore:
+    def __init__(self, users=(), iterations=DEFAULT_ITERATIONS, hash_threads=DEFAULT_HASH_THREADS):
+        self.iterations = iterations
+        self.hash_threads = hash_threads
+        self._by_id = {}
+        self._by_email = {}
+        self._last_number = 0
+        self._pool = None
+        self._dummy = None
+        self._lock = threading.Lock()
+        for user in users:
+            self.add(user)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def _executor(self):
+        # Started on first use, so that worker processes forked before it each get their own threads
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.hash_threads, thread_name_prefix='mock-hash')
+        return self._pool
+
+    def hash_password(self, password):
+        """Future of the encoded hash of password, computed in the hashing pool"""
+        return self._executor().submit(hash_password, password, self.iterations)
+
+    def check_password(self, user, password):
+        """Future of whether password is user's; user may be None, which never matches"""
+        if user is None:
+            return self._executor().submit(self._check_unknown, password)
+        return self._executor().submit(check_password, password, user.get('passwordHash', ''))
+
+    def _check_unknown(self, password):
+        if self._dummy is None:
+            self._dummy = hash_password('', self.iterations)
+        check_password(password, self._dummy)
+        return False
+
+    def next_id(self):
+        """Id of the next registered user, to be taken and added inside one mutation"""
+        return f'{ID_PREFIX}{self._last_number + 1}'
+
+    def add(self, user):
+        """Store a user record; raises DuplicateEmail"""
+        key = _email_key(user['email'])
+        with self._lock:
+            if key in self._by_email:
+                raise DuplicateEmail(f"Email {user['email']} is already registered")
+            self._by_email[key] = user
+            self._by_id[user['userId']] = user
+            number = user['userId'].removeprefix(ID_PREFIX)
+            if number.isdigit():
+                self._last_number = max(self._last_number, int(number))
+        return user
+
+    def get(self, user_id):
+        return self._by_id.get(user_id)
+
+    def by_email(self, email):
+        return self._by_email.get(_email_key(email))
+
+
+def user_record(user_id, email, full_name, password_hash, roles=('User',), phone=''):
+    """User record as stored, password hash included"""
+    return {
+        "userId": user_id,
+        "email": email.strip(),
+        "fullName": full_name,
+        "phone": phone,
+        "roles": list(roles),
+        "passwordHash": password_hash,
+        "registeredAt": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def add_arguments(parser):
+    """User store options for a script's argument parser"""
+    group = parser.add_argument_group('users')
+    group.add_argument('--pbkdf2-iterations', type=int, default=DEFAULT_ITERATIONS, metavar='N',
+                       help=f'PBKDF2 iterations of password hashes (default: {DEFAULT_ITERATIONS})')
+    group.add_argument('--hash-threads', type=int, default=DEFAULT_HASH_THREADS, metavar='N',
+                       help=f'threads hashing passwords, at most N hashes run at once '
+                            f'(default: {DEFAULT_HASH_THREADS})')
+    return parser
@@ -0,0 +1,309 @@
+"""
+Multi-process serving.
+
+With ``--workers N`` the script's process becomes a supervisor that forks N
+worker processes, each running the serving mode chosen with ``--mode``. By
+default the supervisor binds the listening socket once and every worker
+accepts from it; with ``--reuse-port`` each worker binds its own socket with
+SO_REUSEPORT and the kernel spreads new connections over them.
+
+- SIGHUP   graceful reload: a new generation of workers is forked and, once
+           it is accepting, the old one stops accepting and finishes the
+           requests and keep-alive connections it has
+- SIGTERM, SIGINT (Ctrl+C)  graceful stop of every worker
+- a worker that dies is replaced; one that dies right after starting stops
+  the supervisor, since its replacements would die the same way
+
+Workers start from the supervisor's copy of the data and share every
+mutation through a SharedState journal: an append-only file of JSON lines.
+A mutation runs under an exclusive flock of the journal, after replaying
+whatever other workers appended, and appends its own records before letting
+go, so ids handed out by one worker are seen by the next one and two workers
+never sell the same seat. A worker also replays new records before each
+request, which costs one fstat() when nothing changed. Workers of a new
+generation replay the whole journal before they accept.
+
+Metrics and response caches stay per worker.
+"""
+
+import contextlib
+import fcntl
+import json
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+from mock_backend import log
+
+JOURNAL_NAME = 'journal.ndjson'
+_SIGNALS = (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD)
+# A worker that exits sooner than this after its start is not restarted
+_MIN_UPTIME = 1.0
+_READY_TIMEOUT = 30.0
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str).encode
+
+
+class SharedState:
+    """Mutations of in-memory state, replayed into every worker process
+
+    Appliers are registered per record kind. apply() changes the local state
+    and records the change; record() only records a change the caller has
+    already made. Both must be called inside mutation(). Until open() is
+    called there is no journal and mutation() is a plain thread lock.
+    """
+
+    def __init__(self):
+        self._appliers = {}
+        self._lock = threading.RLock()
+        self._fd = None
+        self._offset = 0
+        self._pending = None
+
+    def register(self, kind, applier):
+        self._appliers[kind] = applier
+
+    def open(self, path):
+        """Share mutations through the journal at path and replay what it holds"""
+        self._fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT | os.O_CLOEXEC, 0o600)
+        self._offset = 0
+        self.sync()
+
+    @contextlib.contextmanager
+    def mutation(self):
+        with self._lock:
+            if self._fd is None or self._pending is not None:
+                # No journal, or a nested mutation that the outer one writes out
+                yield
+                return
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            self._pending = []
+            try:
+                self._replay()
+                yield
+            finally:
+                lines, self._pending = self._pending, None
+                try:
+                    if lines:
+                        data = ''.join(lines).encode()
+                        os.write(self._fd, data)
+                        self._offset += len(data)
+                finally:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def apply(self, kind, payload):
+        result = self._appliers[kind](payload)
+        self.record(kind, payload)
+        return result
+
+    def record(self, kind, payload):
+        if self._pending is not None:
+            self._pending.append(_encode([kind, payload]) + '\n')
+
+    def sync(self):
+        """Apply the records other processes appended since the last call"""
+        if self._fd is None or os.fstat(self._fd).st_size == self._offset:
+            return
+        with self._lock:
+            self._replay()
+
+    def _replay(self):
+        size = os.fstat(self._fd).st_size
+        if size == self._offset:
+            return
+        data = os.pread(self._fd, size - self._offset, self._offset)
+        # A record is applied once its line is complete
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b'\n'):
+                break
+            # Past the record before applying it, so a record that fails is not retried
+            self._offset += len(line)
+            kind, payload = json.loads(line)
+            self._appliers[kind](payload)
+
+
+def listen_socket(address, backlog, reuse_port=False):
+    sock = socket.create_server(address, backlog=backlog, reuse_port=reuse_port)
+    # Idle workers must not block in accept() after another one took the
+    # connection, or they would not notice a shutdown
+    sock.setblocking(False)
+    return sock
+
+
+class Supervisor:
+    """Fork, watch, reload and stop the worker processes
+
+    make_server(sock) runs in each new worker and returns the server to run
+    there; reload(), when given, runs in the supervisor before a new
+    generation is forked on SIGHUP.
+    """
+
+    def __init__(self, options, make_server, state, reload=None):
+        self.count = options.workers
+        self.address = (options.host, options.port)
+        self.backlog = options.backlog
+        self.reuse_port = options.reuse_port
+        self.make_server = make_server
+        self.state = state
+        self.reload = reload
+        # pid -> (worker number, start time) of the current generation
+        self.workers = {}
+        # pids told to stop, not reaped yet
+        self.retiring = set()
+        self.socket = None
+        self._ready_read, self._ready_write = os.pipe()
+        os.set_blocking(self._ready_read, False)
+        self._ready = b''
+        self._state_dir = None
+
+    def run(self):
+        """Serve until stopped, returns the exit status"""
+        if not hasattr(os, 'fork'):
+            print("❌ --workers needs os.fork(), which this platform does not have")
+            return 1
+        self._state_dir = tempfile.mkdtemp(prefix='mock-backend-')
+        self.journal = os.path.join(self._state_dir, JOURNAL_NAME)
+        if not self.reuse_port:
+            self.socket = listen_socket(self.address, self.backlog)
+        signal.pthread_sigmask(signal.SIG_BLOCK, _SIGNALS)
+        try:
+            for number in range(self.count):
+                self._spawn(number)
+            if not self._wait_ready(set(self.workers)):
+                print("❌ Workers did not start")
+                return 1
+            print(f"👷 {self.count} workers started (supervisor pid {os.getpid()}; SIGHUP reloads)")
+            return self._watch()
+        finally:
+            self._stop(set(self.workers))
+            self._wait_retired()
+            if self.socket is not None:
+                self.socket.close()
+            shutil.rmtree(self._state_dir, ignore_errors=True)
+
+    def _watch(self):
+        while True:
+            info = signal.sigtimedwait(_SIGNALS, 1.0)
+            if info is None or info.si_signo == signal.SIGCHLD:
+                if self._reap():
+                    return 1
+            elif info.si_signo == signal.SIGHUP:
+                self._reload()
+            else:
+                print("\n🛑 Stopping workers...")
+                return 0
+
+    def _reap(self):
+        """Replace workers that died, returns True when one died at startup"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return False
+            if pid == 0:
+                return False
+            worker = self.workers.pop(pid, None)
+            if worker is None:
+                self.retiring.discard(pid)
+                continue
+            number, started = worker
+            print(f"⚠️  Worker {number} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}")
+            if time.monotonic() - started < _MIN_UPTIME:
+                print("❌ Worker died while starting, stopping")
+                return True
+            self._spawn(number)
+
+    def _reload(self):
+        print("🔄 Reloading workers...")
+        if self.reload is not None:
+            self.reload()
+        old = set(self.workers)
+        new = {self._spawn(number) for number in range(self.count)}
+        if self._wait_ready(new):
+            self._stop(old)
+            print(f"✅ Reloaded: {self.count} new workers")
+        else:
+            self._stop(new & set(self.workers))
+            print("❌ New workers did not start, keeping the old ones")
+
+    def _spawn(self, number):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = (number, time.monotonic())
+            return pid
+        status = 1
+        try:
+            status = self._serve(number)
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            os._exit(status)
+
+    def _serve(self, number):
+        # Runs in the worker: Ctrl+C reaches the whole process group, but
+        # only the supervisor decides when workers stop
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, _SIGNALS)
+        os.close(self._ready_read)
+        sock = self.socket or listen_socket(self.address, self.backlog, reuse_port=True)
+        self.state.open(self.journal)
+        httpd = self.make_server(sock)
+
+        def stop(signum, frame):
+            # shutdown() waits for serve_forever(), which runs on this thread
+            threading.Thread(target=httpd.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, stop)
+        os.write(self._ready_write, f'{os.getpid()}\n'.encode())
+        httpd.serve_forever()
+        httpd.server_close()
+        log.shutdown()
+        sys.stdout.flush()
+        return 0
+
+    def _wait_ready(self, pids):
+        """Wait until every worker of pids is accepting, returns False on timeout"""
+        deadline = time.monotonic() + _READY_TIMEOUT
+        waiting = set(pids)
+        while waiting:
+            lines = self._ready.split(b'\n')
+            self._ready = lines.pop()
+            waiting.difference_update(int(line) for line in lines)
+            if not waiting:
+                return True
+            if not waiting <= set(self.workers) or time.monotonic() > deadline or self._reap():
+                return False
+            try:
+                self._ready += os.read(self._ready_read, 4096)
+            except BlockingIOError:
+                time.sleep(0.01)
+
+    def _stop(self, pids):
+        """Ask workers to finish; they are reaped as they exit"""
+        for pid in pids:
+            self.workers.pop(pid, None)
+            self.retiring.add(pid)
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGTERM)
+
+    def _wait_retired(self):
+        for pid in list(self.retiring):
+            with contextlib.suppress(ChildProcessError):
+                os.waitpid(pid, 0)
+            self.retiring.discard(pid)
+
+
+def add_arguments(parser):
+    """Multi-process options for a script's argument parser"""
+    group = parser.add_argument_group('workers')
+    group.add_argument('--workers', type=int, default=1, metavar='N',
+                       help='worker processes; above 1 the script supervises N forked workers (default: 1)')
+    group.add_argument('--reuse-port', action='store_true',
+                       help='let every worker bind its own SO_REUSEPORT socket instead of sharing one')
+    return parser
@@ -0,0 +1,24 @@
+import pytest
+
+from mock_backend.data import DataLayer, MemorySource
+
+
+def test_saloon_without_id_is_a_value_error():
+    source = MemorySource({'saloons': [{'saloonId': 1, 'cityId': 1}, {'saloonName': 'Salon 2', 'cityId': 1}]})
+    with pytest.raises(ValueError, match="saloons: record 1 has no 'saloonId'"):
+        DataLayer(source)
+
+
+def test_city_without_id_is_a_value_error():
+    source = MemorySource({'cities': [{'cityName': 'Hà Nội'}]})
+    with pytest.raises(ValueError, match="cities: record 0 has no 'cityId'"):
+        DataLayer(source)
+
+
+def test_lookups_by_id():
+    source = MemorySource({'cities': [{'cityId': 1, 'cityName': 'Hà Nội'}],
+                           'saloons': [{'saloonId': 5, 'saloonName': 'Salon 5', 'cityId': 1}]})
+    layer = DataLayer(source)
+    assert layer.saloons_by_id[5]['saloonName'] == 'Salon 5'
+    assert layer.saloons_in_city(1) == (layer.saloons_by_id[5],)
+    assert layer.cities_by_id[1]['cityName'] == 'Hà Nội'
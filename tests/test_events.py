@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from mock_backend import events
+
+SHOWTIME = ('Avengers: Endgame', 'Salon 1', '2024-12-25', '19:30')
+
+
+def ticket_event(number):
+    ticket = {"email": f"user{number}@example.com", "fullName": "Nguyễn Văn A", "chairNumbers": f"A{number}"}
+    return events.email_event(ticket, SHOWTIME, [f"A{number}"])
+
+
+def test_bad_paths_fail_when_the_pipeline_is_built(tmp_path):
+    with pytest.raises(OSError):
+        events.Topic(path=tmp_path / 'missing' / 'events.ndjson')
+    (tmp_path / 'file').write_text('')
+    with pytest.raises(OSError):
+        events.EmailPipeline(events.Topic(), tmp_path / 'file' / 'outbox')
+
+
+def test_published_events_are_written_and_delivered(tmp_path):
+    topic = events.Topic(path=tmp_path / 'events.ndjson', batch_size=2, linger=0.001)
+    pipeline = events.EmailPipeline(topic, tmp_path / 'outbox')
+    for number in range(1, 4):
+        assert pipeline.publish(ticket_event(number))
+    pipeline.close()
+    lines = [json.loads(line) for line in (tmp_path / 'events.ndjson').read_text(encoding='utf-8').splitlines()]
+    assert [line['offset'] for line in lines] == [0, 1, 2]
+    assert lines[2]['value']['recipient'] == 'user3@example.com'
+    assert len(list((tmp_path / 'outbox').glob('*.eml'))) == 3
+    state = pipeline.describe()
+    assert (state['consumed'], state['failed'], state['dropped'], state['fileErrors']) == (3, 0, 0, 0)
+
+
+def test_unwritable_topic_file_still_delivers(tmp_path):
+    topic = events.Topic(path=tmp_path / 'events.ndjson', linger=0.001)
+    topic._log_file.close()
+    # A file the writes fail on, as on a full disk
+    topic._log_file = open(tmp_path / 'events.ndjson', 'rb')
+    pipeline = events.EmailPipeline(topic)
+    pipeline.publish(ticket_event(1))
+    pipeline.publish(ticket_event(2))
+    pipeline.close()
+    state = pipeline.describe()
+    assert state['consumed'] == 2
+    assert state['fileErrors'] >= 1
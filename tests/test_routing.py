@@ -0,0 +1,65 @@
+import pytest
+
+from mock_backend.routing import Router
+
+
+def handler(self, params):
+    pass
+
+
+def resolve_by_regex(router, method, path):
+    """Resolve path with the compiled regex only, skipping the static table and the tail fast path"""
+    _, _, match, endpoints = router._resolver(method)
+    found = match(path)
+    if found is None:
+        return None, None
+    route, build = endpoints[found.lastindex]
+    return route, build(found)
+
+
+@pytest.fixture
+def router():
+    routes = Router()
+    routes.add('GET', '/api/movie/movies', handler)
+    routes.add('GET', '/api/movie/movies/{movieId:int}', handler)
+    routes.add('GET', '/api/movie/movies/{movieId:int}/comments', handler)
+    routes.add('GET', '/api/movie/saloons/{cityId:int}', handler)
+    routes.add('GET', '/api/movie/saloons/{name}', handler)
+    return routes
+
+
+def describe(result):
+    route, params = result
+    return (route.template if route else None), params
+
+
+@pytest.mark.parametrize('path', [
+    '/api/movie/movies/3',
+    '/api/movie/movies/²',
+    '/api/movie/movies/٣',
+    '/api/movie/movies/12³',
+    '/api/movie/movies/%C2%B2',
+    '/api/movie/movies/undefined',
+    '/api/movie/saloons/7',
+    '/api/movie/saloons/²',
+    '/api/movie/saloons/hanoi',
+])
+def test_fast_path_agrees_with_regex(router, path):
+    assert describe(router.resolve('GET', path)) == describe(resolve_by_regex(router, 'GET', path))
+
+
+def test_int_parameter_rejects_non_ascii_digits(router):
+    assert router.resolve('GET', '/api/movie/movies/²') == (None, None)
+    assert router.resolve('GET', '/api/movie/movies/²/comments') == (None, None)
+
+
+def test_non_ascii_digits_fall_back_to_string_parameter(router):
+    route, params = router.resolve('GET', '/api/movie/saloons/²')
+    assert route.template == '/api/movie/saloons/{name}'
+    assert params == {'name': '²'}
+
+
+def test_int_parameter_is_converted(router):
+    route, params = router.resolve('GET', '/api/movie/movies/42')
+    assert route.template == '/api/movie/movies/{movieId:int}'
+    assert params == {'movieId': 42}
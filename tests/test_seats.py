@@ -0,0 +1,91 @@
+import pytest
+
+from mock_backend.seats import SeatConflict, SeatInventory, showtime_key
+
+SHOWTIME = ('Avengers: Endgame', 'Salon 1', '2024-12-25', '19:30')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def inventory(clock):
+    return SeatInventory(hold_seconds=60, clock=clock)
+
+
+def test_booking_takes_all_seats_or_none(inventory):
+    inventory.book(SHOWTIME, ' B2')
+    with pytest.raises(SeatConflict) as conflict:
+        inventory.book(SHOWTIME, ' A1 B2 C3')
+    assert conflict.value.seats == ['B2']
+    assert inventory.taken(SHOWTIME) == ['B2']
+    ticket_id, seats = inventory.book(SHOWTIME, ' A1 C3')
+    assert seats == ['A1', 'C3']
+    assert inventory.sold_count(SHOWTIME) == 3
+
+
+def test_showtimes_are_separate(inventory):
+    inventory.book(SHOWTIME, 'A1')
+    other = SHOWTIME[:3] + ('22:00',)
+    inventory.book(other, 'A1')
+    assert inventory.taken(other) == ['A1']
+
+
+def test_unknown_and_repeated_seats_are_rejected(inventory):
+    with pytest.raises(ValueError, match='Unknown seat'):
+        inventory.book(SHOWTIME, 'A1 Z9')
+    with pytest.raises(ValueError, match='requested twice'):
+        inventory.book(SHOWTIME, 'A1 a1')
+    assert inventory.taken(SHOWTIME) == []
+
+
+def test_release_frees_the_held_seats(inventory):
+    hold_id, seats = inventory.reserve(SHOWTIME, ['A1', 'A2'])
+    with pytest.raises(SeatConflict):
+        inventory.book(SHOWTIME, 'A2')
+    assert inventory.release(hold_id) == ['A1', 'A2']
+    assert inventory.release(hold_id) is None
+    assert inventory.confirm(hold_id) is None
+    assert inventory.book(SHOWTIME, 'A1 A2')[1] == ['A1', 'A2']
+
+
+def test_confirm_sells_the_held_seats(inventory):
+    hold_id, _ = inventory.reserve(SHOWTIME, 'C1')
+    ticket_id, showtime, seats = inventory.confirm(hold_id)
+    assert (showtime, seats) == (SHOWTIME, ['C1'])
+    assert inventory.sold_count(SHOWTIME) == 1
+    assert inventory.release(hold_id) is None
+
+
+def test_expired_hold_is_reclaimed(inventory, clock):
+    hold_id, _ = inventory.reserve(SHOWTIME, 'D1')
+    clock.now += 61
+    assert inventory.book(SHOWTIME, 'D1')[1] == ['D1']
+    assert inventory.confirm(hold_id) is None
+
+
+def test_apply_replays_changes_on_another_inventory(clock):
+    changes = []
+    source = SeatInventory(clock=clock, on_change=changes.append)
+    replica = SeatInventory(clock=clock)
+    source.book(SHOWTIME, 'A1 A2')
+    hold_id, _ = source.reserve(SHOWTIME, 'B1')
+    source.release(hold_id)
+    for change in changes:
+        replica.apply(change)
+    assert replica.taken(SHOWTIME) == ['A1', 'A2']
+
+
+def test_showtime_key_names_the_missing_fields():
+    with pytest.raises(ValueError, match='Missing saloonName, movieStartTime'):
+        showtime_key({'movieName': 'Avengers: Endgame', 'movieDay': '2024-12-25'})
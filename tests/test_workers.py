@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from mock_backend.workers import SharedState
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return tmp_path / 'journal.ndjson'
+
+
+@pytest.fixture
+def make_state():
+    states = []
+
+    def make(path):
+        """A SharedState appending records of kind 'add' to a list, sharing the journal at path"""
+        state = SharedState()
+        state.items = []
+        state.register('add', state.items.append)
+        state.open(path)
+        states.append(state)
+        return state
+
+    yield make
+    for state in states:
+        os.close(state._fd)
+
+
+def test_records_are_replayed_by_another_state(journal, make_state):
+    writer, reader = make_state(journal), make_state(journal)
+    with writer.mutation():
+        writer.apply('add', 1)
+        writer.apply('add', {'seat': 'A1'})
+    reader.sync()
+    assert reader.items == [1, {'seat': 'A1'}]
+    assert writer.items == [1, {'seat': 'A1'}]
+
+
+def test_journal_is_replayed_on_open(journal, make_state):
+    writer = make_state(journal)
+    with writer.mutation():
+        writer.apply('add', 1)
+    assert make_state(journal).items == [1]
+
+
+def test_mutation_replays_before_changing(journal, make_state):
+    first, second = make_state(journal), make_state(journal)
+    with first.mutation():
+        first.apply('add', 1)
+    with second.mutation():
+        assert second.items == [1]
+        second.apply('add', 2)
+    first.sync()
+    assert first.items == [1, 2]
+
+
+def test_nested_mutation_is_written_once(journal, make_state):
+    writer = make_state(journal)
+    with writer.mutation():
+        writer.apply('add', 1)
+        with writer.mutation():
+            writer.apply('add', 2)
+    assert journal.read_text().splitlines() == ['["add",1]', '["add",2]']
+
+
+def test_torn_final_line_waits_for_its_end(journal, make_state):
+    writer, reader = make_state(journal), make_state(journal)
+    with writer.mutation():
+        writer.apply('add', 1)
+    with open(journal, 'ab') as f:
+        f.write(b'["add",')
+    reader.sync()
+    assert reader.items == [1]
+    with open(journal, 'ab') as f:
+        f.write(b'2]\n')
+    reader.sync()
+    assert reader.items == [1, 2]
+    assert make_state(journal).items == [1, 2]
+
+
+def test_without_journal_nothing_is_recorded():
+    state = SharedState()
+    items = []
+    state.register('add', items.append)
+    with state.mutation():
+        state.apply('add', 1)
+    state.sync()
+    assert items == [1]